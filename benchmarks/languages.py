@@ -0,0 +1,77 @@
+"""Benchmark of language resolution
+
+Resolves languages as a scrape does: the requested languages and their ISO639-3
+codes once, then the display name of each language of each talk, for its entry in
+the talk languages and in its subtitles. Done with memoized lookups, then without
+by clearing caches before each call.
+
+Usage: python benchmarks/languages.py [nb_talks] [nb_languages] [nb_uncached_talks]
+
+Defaults to 5000 talks in 100 languages. Uncached lookups are only measured on
+nb_uncached_talks talks (default 500) and extrapolated."""
+
+import sys
+import time
+
+from babel.localedata import locale_identifiers
+
+from ted2zim import languages as tedlang
+from ted2zim.constants import TEDLANGS, get_logger
+
+logger = get_logger()
+
+
+def get_lang_codes(nb_languages):
+    # languages with a native name, as TED ones
+    codes = sorted(
+        code
+        for code in locale_identifiers()
+        if "_" not in code and (tedlang.get_language_info(code) or {}).get("native")
+    )
+    return (TEDLANGS["locales"] + codes)[:nb_languages]
+
+
+def clear_caches():
+    for func in (
+        tedlang.get_language_info,
+        tedlang.get_display_name,
+        tedlang.get_ted_langcodes,
+        tedlang.get_iso639_3_langcode,
+    ):
+        func.cache_clear()
+
+
+def measure(nb_talks, lang_codes, *, cached):
+    clear_caches()
+    started = time.perf_counter()
+    tedlang.ted_to_iso639_3_langcodes(tedlang.to_ted_langcodes(lang_codes))
+    for _ in range(nb_talks):
+        for lang_code in lang_codes:
+            # talk languages, then subtitles
+            for _ in range(2):
+                if not cached:
+                    clear_caches()
+                tedlang.get_display_name(lang_code, lang_code.upper())
+    return time.perf_counter() - started
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:4]]
+    nb_talks, nb_languages, nb_uncached_talks = args + [5000, 100, 500][len(args) :]
+    nb_uncached_talks = min(nb_uncached_talks, nb_talks)
+    lang_codes = get_lang_codes(nb_languages)
+
+    cached_duration = measure(nb_talks, lang_codes, cached=True)
+    uncached_duration = measure(nb_uncached_talks, lang_codes, cached=False)
+    uncached_extrapolated = uncached_duration * nb_talks / nb_uncached_talks
+
+    logger.info(
+        f"{nb_talks} talks x {len(lang_codes)} languages: memoized "
+        f"{cached_duration:.2f}s ; uncached {uncached_duration:.2f}s for "
+        f"{nb_uncached_talks} talks, ~{uncached_extrapolated:.0f}s extrapolated to "
+        f"{nb_talks} talks"
+    )
+
+
+if __name__ == "__main__":
+    main()
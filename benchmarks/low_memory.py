@@ -0,0 +1,114 @@
+"""Benchmark of the peak memory used by videos metadata, in memory and on disk
+
+Each run is a separate process which records talks in several languages (as
+discovery does), updates each of them once (as downloads do) and writes the
+per-language index data files, then logs its peak RSS.
+
+Usage: python benchmarks/low_memory.py [nb_talks ...]
+
+Defaults to 1000 and 5000 talks, in 20 languages."""
+
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+from ted2zim.constants import get_logger
+from ted2zim.scraper import Ted2Zim
+from ted2zim.videos import (
+    ENCODED,
+    LocalizedText,
+    SpilledVideoRegistry,
+    Video,
+    VideoRegistry,
+)
+
+logger = get_logger()
+
+NB_LANGUAGES = 20
+
+
+def new_video(video_id, lang):
+    return Video(
+        id=video_id,
+        languages=[{"languageCode": lang, "languageName": lang}],
+        title=LocalizedText({lang: f"Title of talk {video_id} in {lang}"}),
+        description=LocalizedText({lang: f"Description {video_id} {lang} " * 20}),
+        speaker="Speaker",
+        speaker_profession="Profession",
+        speaker_bio="Speaker biography " * 60,
+        speaker_picture="https://pi.tedcdn.com/speaker.jpg",
+        date="01 January 2020",
+        thumbnail="https://pi.tedcdn.com/thumbnail.jpg",
+        video_link=f"https://py.tedcdn.com/{video_id}.mp4",
+        youtube_id=None,
+        length=10,
+        subtitles=[],
+        metadata_link=f"https://hls.ted.com/{video_id}/metadata.json",
+        native_talk_language=lang,
+    )
+
+
+def run(mode, nb_talks, work_dir):
+    videos = (
+        SpilledVideoRegistry(work_dir / "videos.db")
+        if mode == "disk"
+        else VideoRegistry()
+    )
+    started = time.perf_counter()
+    for lang_index in range(NB_LANGUAGES):
+        lang = f"l{lang_index}"
+        for talk_index in range(nb_talks):
+            video_id = str(talk_index)
+            video = videos.get(video_id)
+            if video is None:
+                videos.add(new_video(video_id, lang))
+                continue
+            video.title.add(lang, f"Title of talk {video_id} in {lang}")
+            video.description.add(lang, f"Description {video_id} {lang} " * 20)
+            video.languages.append({"languageCode": lang, "languageName": lang})
+            video.subtitles.append(
+                {
+                    "languageCode": lang,
+                    "languageName": lang,
+                    "link": f"https://www.ted.com/talks/subtitles/id/{video_id}/lang/"
+                    f"{lang}",
+                }
+            )
+            videos.save(video)
+    for video in videos:
+        video.done.append(ENCODED)
+        videos.save(video)
+    scraper = types.SimpleNamespace(build_dir=work_dir, videos=videos)
+    scraper._get_video_languages = lambda video: Ted2Zim._get_video_languages(
+        scraper, video
+    )
+    Ted2Zim.generate_language_index_file(scraper)  # pyright: ignore
+    duration = time.perf_counter() - started
+    videos.close()
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    logger.info(
+        f"{mode:>6}: {nb_talks} talks x {NB_LANGUAGES} languages, peak RSS "
+        f"{peak_rss:.0f} MiB, {duration:.1f}s"
+    )
+
+
+def main():
+    if sys.argv[1:2] == ["run"]:
+        with tempfile.TemporaryDirectory() as work_dir:
+            run(sys.argv[2], int(sys.argv[3]), pathlib.Path(work_dir))
+        return
+
+    for nb_talks in [int(arg) for arg in sys.argv[1:]] or [1000, 5000]:
+        for mode in ("memory", "disk"):
+            subprocess.run(
+                [sys.executable, __file__, "run", mode, str(nb_talks)], check=True
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Microbenchmark of videoData extraction from TED talk pages
+
+Compares the byte-scanning extractor with the full BeautifulSoup parse.
+
+Usage: python benchmarks/next_data.py [saved_talk_page.html ...]
+
+Without arguments, a synthetic page of a size similar to a TED talk page is used.
+Save pages with eg. `curl -o talk.html https://www.ted.com/talks/<slug>`"""
+
+import json
+import pathlib
+import sys
+import timeit
+
+from ted2zim.constants import get_logger
+from ted2zim.next_data import extract_video_data, extract_video_data_from_soup
+
+logger = get_logger()
+
+
+def synthetic_page():
+    player_data = {
+        "languages": [
+            {"languageCode": f"l{index}", "languageName": f"Language {index}"}
+            for index in range(60)
+        ],
+        "resources": {"h264": [{"bitrate": 320, "file": "https://example.com/a.mp4"}]},
+    }
+    video_data = {
+        "id": "1234",
+        "language": "en",
+        "description": "A talk " * 50,
+        "playerData": json.dumps(player_data),
+    }
+    next_data = {
+        "props": {
+            "pageProps": {
+                "videoData": video_data,
+                "transcriptData": {"paragraphs": ["Some transcript text. " * 20] * 300},
+            }
+        }
+    }
+    body = "".join(
+        f'<div class="c{index}"><a href="/talks/{index}">Talk {index}</a></div>'
+        for index in range(2000)
+    )
+    return (
+        f"<html><head><title>Talk</title></head><body>{body}"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}'
+        "</script></body></html>"
+    ).encode()
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = {path: pathlib.Path(path).read_bytes() for path in sys.argv[1:]}
+    else:
+        pages = {"synthetic": synthetic_page()}
+
+    for name, content in pages.items():
+        text = content.decode("utf-8")
+        if extract_video_data(content) != extract_video_data_from_soup(text):
+            raise ValueError(f"Extractors disagree on {name}")
+        number = 20
+        fast = timeit.timeit(
+            lambda content=content: extract_video_data(content), number=number
+        )
+        soup = timeit.timeit(
+            lambda text=text: extract_video_data_from_soup(text), number=number
+        )
+        logger.info(
+            f"{name} ({len(content) // 1024} KiB): byte scan "
+            f"{fast / number * 1000:.2f} ms, BeautifulSoup "
+            f"{soup / number * 1000:.2f} ms, x{soup / fast:.0f} faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark of the videos list built during discovery
+
+Inserts talks in several languages (one insert then one update per other language,
+as update_videos_list does) into the former list of dicts, looked up by scanning,
+and into the VideoRegistry.
+
+Usage: python benchmarks/video_registry.py [nb_talks] [nb_languages] [nb_list_talks]
+
+Defaults to 50000 talks in 20 languages. The list being quadratic, it is only
+measured on nb_list_talks talks (default 2000) and extrapolated."""
+
+import sys
+import time
+
+from ted2zim.constants import get_logger
+from ted2zim.videos import LocalizedText, Video, VideoRegistry
+
+logger = get_logger()
+
+
+def entries(nb_talks, nb_languages):
+    for lang_index in range(nb_languages):
+        lang = f"l{lang_index}"
+        for talk_index in range(nb_talks):
+            yield str(talk_index), lang, f"Title {talk_index} in {lang}"
+
+
+def new_video(video_id, lang, title):
+    return Video(
+        id=video_id,
+        languages=[{"languageCode": lang, "languageName": lang}],
+        title=LocalizedText({lang: title}),
+        description=LocalizedText({lang: title}),
+        speaker="Speaker",
+        speaker_profession=None,
+        speaker_bio="-",
+        speaker_picture="-",
+        date="01 January 2020",
+        thumbnail="",
+        video_link="",
+        youtube_id=None,
+        length=10,
+        subtitles=[],
+        metadata_link=None,
+        native_talk_language=lang,
+    )
+
+
+def update_list(videos, video_id, lang, title):
+    """former update_videos_list logic"""
+    if not [video for video in videos if video.get("id", None) == video_id]:
+        videos.append(new_video(video_id, lang, title).to_dict())
+        return
+    for index, video in enumerate(videos):
+        if video.get("failed", False):
+            continue
+        if video.get("id", None) == video_id:
+            if {"lang": lang, "text": title} not in video["title"]:
+                videos[index]["title"].append({"lang": lang, "text": title})
+                videos[index]["description"].append({"lang": lang, "text": title})
+                videos[index]["languages"].append(
+                    {"languageCode": lang, "languageName": lang}
+                )
+
+
+def update_registry(videos, video_id, lang, title):
+    """update_videos_list logic with the registry"""
+    video = videos.get(video_id)
+    if video is None:
+        videos.add(new_video(video_id, lang, title))
+        return
+    if video.failed:
+        return
+    if video.title.add(lang, title):
+        video.description.add(lang, title)
+        video.languages.append({"languageCode": lang, "languageName": lang})
+
+
+def measure(update, videos, nb_talks, nb_languages):
+    started = time.perf_counter()
+    for entry in entries(nb_talks, nb_languages):
+        update(videos, *entry)
+    return time.perf_counter() - started
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:4]]
+    nb_talks, nb_languages, nb_list_talks = args + [50000, 20, 2000][len(args) :]
+    nb_list_talks = min(nb_list_talks, nb_talks)
+
+    registry_duration = measure(
+        update_registry, VideoRegistry(), nb_talks, nb_languages
+    )
+    list_duration = measure(update_list, [], nb_list_talks, nb_languages)
+    # both the duplicate check and the update scan the whole list
+    list_extrapolated = list_duration * (nb_talks / nb_list_talks) ** 2
+
+    logger.info(
+        f"{nb_talks} talks x {nb_languages} languages: registry "
+        f"{registry_duration:.2f}s ; list {list_duration:.2f}s for {nb_list_talks} "
+        f"talks, ~{list_extrapolated:.0f}s extrapolated to {nb_talks} talks"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from ted2zim.constants import REQUESTS_TIMEOUT, get_logger
+from ted2zim.discovery import DiscoveryEngine
+from ted2zim.http_cache import http_cache
+from ted2zim.network import connection_stats, rate_limiter, retry_policy
+
+logger = get_logger()
+
+
+class AsyncDiscoveryEngine(DiscoveryEngine):
+    """DiscoveryEngine fetching talk pages from an asyncio event loop
+
+    fetch is a coroutine function fetch(url, get) (typically
+    Ted2Zim.extract_info_from_video_page_async), get being the coroutine function
+    of this engine requesting an URL. The loop runs in its own thread so that
+    hundreds of pages can be in flight without as many threads ; fetch_all blocks
+    the calling thread until all results are in, keeping the DiscoveryEngine
+    interface (order of results, coalescing of fetches of the same URL).
+
+    Requests go through the shared rate limiter, retry policy and HTTP cache, like
+    utils.request_url. Pages are parsed by fetch in the loop's executor. Search
+    pages are still fetched by the threads of the search executor."""
+
+    def __init__(self, fetch, concurrency):
+        super().__init__(fetch, concurrency)
+        self._loop = None
+        self._thread = None
+        # only used from the loop thread
+        self._session = None
+        self._semaphore = None
+        self._tasks = {}  # url: Task of its ongoing fetch
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(
+                    concurrent.futures.ThreadPoolExecutor(
+                        max_workers=os.cpu_count() or 1,
+                        thread_name_prefix="discovery-parse",
+                    )
+                )
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="discovery-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """result of coro, run in the loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def fetch_all(self, urls):
+        """list of fetch results for urls, in urls order"""
+        urls = list(urls)
+        if not urls:
+            return []
+        logger.debug(f"Fetching {len(urls)} talk page(s) concurrently")
+        return self.run(self._fetch_all(urls))
+
+    def fetch_once(self, url):
+        """fetch url, sharing the result with concurrent calls for the same url"""
+        return self.run(self._fetch_once(url))
+
+    def submit_all(self, urls):
+        """futures of fetch results for urls, in urls order, without waiting for them"""
+        urls = list(urls)
+        if urls:
+            logger.debug(f"Fetching {len(urls)} talk page(s) in the background")
+        return [
+            asyncio.run_coroutine_threadsafe(self._fetch_once(url), self.loop)
+            for url in urls
+        ]
+
+    async def _fetch_all(self, urls):
+        results = await asyncio.gather(
+            *[self._fetch_once(url) for url in urls], return_exceptions=True
+        )
+        # first error in urls order, as with the threads backend
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    async def _fetch_once(self, url):
+        task = self._tasks.get(url)
+        if task is None:
+            task = self._tasks[url] = asyncio.ensure_future(self._fetch(url))
+            task.add_done_callback(lambda _: self._tasks.pop(url, None))
+        else:
+            self.nb_coalesced += 1
+        return await task
+
+    async def _fetch(self, url):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await self.fetch(url, self.get)
+
+    @property
+    def session(self):
+        if self._session is None:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=REQUESTS_TIMEOUT, sock_read=REQUESTS_TIMEOUT
+                ),
+                trace_configs=[trace_config],
+            )
+        return self._session
+
+    @staticmethod
+    async def _on_connection_created(*_):
+        connection_stats.record_connection()
+
+    async def request(self, url, headers):
+        """requests.Response of a GET request, for the shared helpers using it"""
+        connection_stats.record_request()
+        async with self.session.get(url, headers=headers) as resp:
+            response = requests.Response()
+            response.status_code = resp.status
+            response.reason = resp.reason
+            response.url = str(resp.url)
+            response.headers = CaseInsensitiveDict(resp.headers)
+            response.encoding = get_encoding_from_headers(response.headers)
+            response._content = await resp.read()
+            return response
+
+    async def get(self, url):
+        """response to a GET request of url, as utils.request_url would return it"""
+
+        response, cached = http_cache.lookup(url)
+        if response is not None:
+            return response
+        headers = cached.validators if cached else {}
+
+        async def send():
+            await asyncio.sleep(rate_limiter.reserve(url))  # delay requests
+            return http_cache.resolve(
+                url, None, await self.request(url, headers), cached
+            )
+
+        return await retry_policy.run_async(send, url)
+
+    async def _close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._semaphore = None
+        await asyncio.get_running_loop().shutdown_default_executor()
+
+    def shutdown(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()  # pyright: ignore
+            loop.close()
+        super().shutdown()
@@ -0,0 +1,181 @@
+import contextlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from ted2zim.constants import get_logger
+
+logger = get_logger()
+
+DEFAULT_MAX_AGE = 30  # days
+# where the languages of a talk, used to check catalog freshness, come from
+HIT = "hit"  # subtitle_languages of search results
+PAGE = "page"  # playerData languages of talk pages
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS talks (
+    path TEXT PRIMARY KEY,
+    talk_id TEXT,
+    updated_on REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS talk_languages (
+    path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    languages TEXT NOT NULL,
+    PRIMARY KEY (path, source)
+);
+CREATE TABLE IF NOT EXISTS talk_pages (
+    path TEXT NOT NULL,
+    language TEXT NOT NULL,
+    data TEXT,
+    PRIMARY KEY (path, language)
+);
+"""
+
+
+class TalkCatalog:
+    """Talk pages data kept in a SQLite database, shared across runs
+
+    - talks: talk ID and last refresh of each talk, by path
+    - talk_languages: languages each talk is available in, as last seen in search
+      results and on its pages (the translation matrix)
+    - talk_pages: data extracted from a talk page (titles, descriptions, subtitles
+      and download links in playerData) per requested language ("" when none was
+      requested) ; NULL data when the talk is not translated in that language
+
+    Pages of a talk are only used once the talk has been checked fresh during this
+    run: the languages TED currently lists for it (in a search hit or on a fetched
+    page) are the recorded ones and it was refreshed less than max_age days ago.
+    Otherwise its pages are dropped, to be fetched again."""
+
+    def __init__(self, fpath, max_age=DEFAULT_MAX_AGE):
+        self.fpath = pathlib.Path(fpath).expanduser().resolve()
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age * 24 * 3600
+        self._lock = threading.Lock()
+        # autocommit, waiting on other processes (ted2zim-multi) using the catalog
+        self._conn = sqlite3.connect(
+            self.fpath, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._fresh = set()  # paths of talks whose pages can be used in this run
+        self._checked = set()  # (path, source) checked during this run
+        self.hits = self.misses = self.refreshed = 0
+        nb_talks = self._conn.execute("SELECT COUNT(*) FROM talks").fetchone()[0]
+        logger.info(f"Using talk catalog at {self.fpath} with {nb_talks} talks")
+
+    @staticmethod
+    def get_key(url):
+        """(talk path, requested language) of a talk page URL"""
+        parts = urllib.parse.urlparse(url)
+        language = dict(urllib.parse.parse_qsl(parts.query)).get("language", "")
+        return parts.path, language
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def check_freshness(self, url, languages, source):
+        """whether stored pages of url's talk are fresh given its current languages
+
+        languages are the language codes TED currently lists for the talk, from
+        source (HIT or PAGE). Stale pages are dropped."""
+        path, _ = self.get_key(url)
+        languages = json.dumps(sorted(set(languages)))
+        with self._lock:
+            if (path, source) in self._checked:
+                return path in self._fresh
+            self._checked.add((path, source))
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT languages, updated_on FROM talks LEFT JOIN talk_languages "
+                "ON talk_languages.path = talks.path AND source = ? "
+                "WHERE talks.path = ?",
+                (source, path),
+            ).fetchone()
+            stored, updated_on = row or (None, 0.0)
+            expired = time.time() - updated_on >= self.max_age
+            if not expired and stored == languages:
+                self._fresh.add(path)
+                return True
+            if not expired and stored is None and path in self._fresh:
+                # first seen from this source, talk already checked from the other
+                self._set_languages(conn, path, source, languages)
+                return True
+            if row is not None:
+                conn.execute("DELETE FROM talk_pages WHERE path = ?", (path,))
+                if path not in self._fresh:
+                    self.refreshed += 1
+            conn.execute(
+                "INSERT INTO talks (path, updated_on) VALUES (?, ?) ON CONFLICT (path) "
+                "DO UPDATE SET updated_on = excluded.updated_on",
+                (path, time.time()),
+            )
+            # other source's languages are kept: they may not have changed
+            self._set_languages(conn, path, source, languages)
+            # pages fetched from now on are up to date
+            self._fresh.add(path)
+            return False
+
+    @staticmethod
+    def _set_languages(conn, path, source, languages):
+        conn.execute(
+            "INSERT OR REPLACE INTO talk_languages (path, source, languages) "
+            "VALUES (?, ?, ?)",
+            (path, source, languages),
+        )
+
+    def get_page(self, url):
+        """(found, data) of a talk page ; found only for talks checked fresh"""
+        path, language = self.get_key(url)
+        with self._lock:
+            if path in self._fresh:
+                row = self._conn.execute(
+                    "SELECT data FROM talk_pages WHERE path = ? AND language = ?",
+                    (path, language),
+                ).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    return True, None if row[0] is None else json.loads(row[0])
+            self.misses += 1
+        return False, None
+
+    def save_page(self, url, data):
+        """record data of a fetched talk page, None if not in requested language"""
+        path, language = self.get_key(url)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO talk_pages (path, language, data) "
+                "VALUES (?, ?, ?)",
+                (
+                    path,
+                    language,
+                    None if data is None else json.dumps(data, ensure_ascii=False),
+                ),
+            )
+            if data is not None:
+                conn.execute(
+                    "UPDATE talks SET talk_id = ? WHERE path = ?", (data["id"], path)
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __str__(self):
+        with self._lock:
+            return (
+                f"{self.hits} talk page(s) from catalog, {self.misses} fetched, "
+                f"{self.refreshed} talk(s) refreshed"
+            )
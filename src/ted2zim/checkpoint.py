@@ -0,0 +1,107 @@
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from ted2zim.constants import get_logger
+from ted2zim.videos import VideoRegistry
+
+logger = get_logger()
+
+# minimum seconds between two (non-forced) saves of the videos progress
+DEFAULT_SAVE_INTERVAL = 10
+
+
+class Checkpoint:
+    """Discovery results and videos progress saved in the build directory
+
+    - discovery_path (ted_topics.json): scraper state resulting from discovery
+    - videos_path (ted_videos.json): videos, with the steps done for each of them
+
+    Files are written atomically so that an interrupted run can always be resumed
+    from its last save. Saves of videos progress are throttled unless forced, and
+    ignored until discovery has been saved (a run can't be resumed without it)."""
+
+    def __init__(self, videos_path, discovery_path, interval=DEFAULT_SAVE_INTERVAL):
+        self.videos_path = videos_path
+        self.discovery_path = discovery_path
+        self.interval = interval
+        self.enabled = True
+        self.discovered = False
+        self._lock = threading.Lock()
+        self._saved_on = 0.0
+
+    @property
+    def exists(self):
+        """whether discovery has been saved"""
+        return self.discovery_path.exists() and self.videos_path.exists()
+
+    def load(self, videos=None):
+        """(videos, discovery state dict) from saved files
+
+        Saved videos are added to videos, a new VideoRegistry if not set"""
+        with open(self.discovery_path, encoding="utf-8") as fh:
+            state = json.load(fh)
+        videos = VideoRegistry() if videos is None else videos
+        for video in VideoRegistry.read(self.videos_path):
+            videos.add(video)
+        self.discovered = True
+        return videos, state
+
+    def save_discovery(self, videos, state):
+        """save discovered videos and state (a JSON-serializable dict)"""
+        self.discovered = True
+        self.save(videos, force=True)
+        self._write(self.discovery_path, json.dumps(state, ensure_ascii=False))
+
+    def save(self, videos, *, force=False):
+        """save videos progress, unless saved less than interval seconds ago"""
+        if not self.enabled or not self.discovered:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._saved_on < self.interval:
+                return
+            videos.dump(self.videos_path)
+            self._saved_on = time.monotonic()
+
+    def disable(self):
+        """stop saving, keeping files as they are"""
+        with self._lock:
+            self.enabled = False
+
+    @staticmethod
+    def _write(fpath, content):
+        """atomically write content to fpath"""
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=fpath.parent, delete=False
+        ) as fh:
+            fh.write(content)
+        os.replace(fh.name, fpath)
+
+    @contextlib.contextmanager
+    def set_aside(self, paths=None):
+        """move checkpoint files (and other paths) out of the build dir temporarily
+
+        Used so that they are not included in the ZIM"""
+        paths = [
+            path
+            for path in [self.videos_path, self.discovery_path, *(paths or [])]
+            if path.exists()
+        ]
+        holding_dir = tempfile.mkdtemp(
+            dir=self.videos_path.parent.parent, prefix="checkpoint-"
+        )
+        moved = []
+        try:
+            for index, path in enumerate(paths):
+                target = os.path.join(holding_dir, str(index))
+                shutil.move(path, target)
+                moved.append((target, path))
+            yield
+        finally:
+            for target, path in moved:
+                shutil.move(target, path)
+            os.rmdir(holding_dir)
@@ -25,6 +25,19 @@ TEDLANGS = {
 
 REQUESTS_TIMEOUT = 30
 
+# talks requested per search page when scraping topics
+DEFAULT_SEARCH_PAGE_SIZE = 100
+
+# discovered videos waiting to be downloaded before discovery pauses
+DEFAULT_PIPELINE_SIZE = 100
+
+# how talk pages are fetched during discovery: by a pool of threads or by asyncio
+# (requires aiohttp), with that many pages in flight by default
+THREADS = "threads"
+ASYNCIO = "asyncio"
+DISCOVERY_BACKENDS = (THREADS, ASYNCIO)
+DEFAULT_ASYNC_CONCURRENCY = 100
+
 
 class Global:
     debug = False
@@ -0,0 +1,152 @@
+import concurrent.futures
+import threading
+
+from ted2zim.constants import get_logger
+
+logger = get_logger()
+
+
+class DiscoveryEngine:
+    """Bounded pool fetching TED talk pages concurrently during discovery
+
+    fetch is the callable retrieving a single URL (typically
+    Ted2Zim.extract_info_from_video_page). Results are always returned in the order
+    URLs were submitted so that callers can apply them deterministically.
+    Concurrent fetches of the same URL are coalesced into a single one."""
+
+    def __init__(self, fetch, concurrency):
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self._executor = None
+        self._search_executor = None
+        self._lock = threading.Lock()
+        self._in_flight = {}  # url: Future of its ongoing fetch
+        self.nb_coalesced = 0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="discovery"
+                )
+            return self._executor
+
+    @property
+    def search_executor(self):
+        """separate pool for search pages, which are waited for by the caller"""
+        with self._lock:
+            if self._search_executor is None:
+                self._search_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="search"
+                )
+            return self._search_executor
+
+    def paginate(self, query):
+        """SearchPaginator over query(page), starting to fetch right away"""
+        return SearchPaginator(query, self.search_executor)
+
+    def fetch_all(self, urls):
+        """list of fetch results for urls, in urls order"""
+        urls = list(urls)
+        if not urls:
+            return []
+        if len(urls) == 1 or self.concurrency == 1:
+            return [self.fetch_once(url) for url in urls]
+        logger.debug(f"Fetching {len(urls)} talk page(s) concurrently")
+        return list(self.executor.map(self.fetch_once, urls))
+
+    def submit_all(self, urls):
+        """futures of fetch results for urls, in urls order, without waiting for them
+
+        Used to process results one after the other as they come in"""
+        urls = list(urls)
+        if urls:
+            logger.debug(f"Fetching {len(urls)} talk page(s) in the background")
+        return [self.executor.submit(self.fetch_once, url) for url in urls]
+
+    def fetch_once(self, url):
+        """fetch url, sharing the result with concurrent calls for the same url"""
+        with self._lock:
+            future = self._in_flight.get(url)
+            owner = future is None
+            if owner:
+                future = self._in_flight[url] = concurrent.futures.Future()
+            else:
+                self.nb_coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = self.fetch(url)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+
+    def shutdown(self):
+        with self._lock:
+            for executor in (self._executor, self._search_executor):
+                if executor is not None:
+                    executor.shutdown(wait=True)
+            self._executor = self._search_executor = None
+
+
+class SearchPaginator:
+    """Iterates over all pages of a search, fetched concurrently
+
+    query(page) returns the search result JSON for a page. The first page is
+    requested on creation ; as soon as it is received, all other pages (based on its
+    nbPages) are requested as well. Pages are yielded in order, the first one as
+    soon as it is available. If the first page has no page count, pages are fetched
+    one after the other until an empty one is found."""
+
+    def __init__(self, query, executor):
+        self.query = query
+        self.executor = executor
+        self._others = None
+        self._others_ready = threading.Event()
+        self._first = executor.submit(query, 0)
+        self._first.add_done_callback(self._submit_others)
+
+    @staticmethod
+    def get_nb_pages(result_json):
+        try:
+            return int(result_json["results"][0]["nbPages"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    def _submit_others(self, future):
+        try:
+            nb_pages = (
+                None if future.exception() else self.get_nb_pages(future.result())
+            )
+            if nb_pages is not None:
+                self._others = [
+                    self.executor.submit(self.query, page)
+                    for page in range(1, nb_pages)
+                ]
+        finally:
+            self._others_ready.set()
+
+    def __iter__(self):
+        yield self._first.result()
+        self._others_ready.wait()
+        if self._others is not None:
+            for future in self._others:
+                yield future.result()
+            return
+
+        logger.debug("No page count in search results, fetching pages sequentially")
+        page = 1
+        while True:
+            result_json = self.query(page)
+            yield result_json
+            if not result_json["results"][0]["hits"]:
+                return
+            page += 1
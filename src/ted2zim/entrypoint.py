@@ -1,6 +1,92 @@
 import argparse
+import importlib.util
+import pathlib
+
+from ted2zim.catalog import DEFAULT_MAX_AGE
+from ted2zim.constants import (
+    ALL,
+    ASYNCIO,
+    DEFAULT_ASYNC_CONCURRENCY,
+    DEFAULT_PIPELINE_SIZE,
+    DEFAULT_SEARCH_PAGE_SIZE,
+    DISCOVERY_BACKENDS,
+    MATCHING,
+    NAME,
+    NONE,
+    SCRAPER,
+    THREADS,
+    get_logger,
+    set_debug,
+)
+from ted2zim.http_cache import DEFAULT_MAX_SIZE, DEFAULT_TTLS
+from ted2zim.network import (
+    DEFAULT_BASE_DELAY,
+    DEFAULT_BURST,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_DELAY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RATE,
+    DEFAULT_RETRY_BUDGET,
+    HOST_CLASSES,
+    parse_per_host_values,
+)
+from ted2zim.segmented_download import DEFAULT_CONNECTIONS
+
+
+def check_per_host_values(parser, arg_name, value, cast, minimum, keys=None):
+    """exits via parser if value is not a valid `value,key=value` argument"""
+    if not value:
+        return
+    try:
+        default, per_key = parse_per_host_values(value, cast)
+    except ValueError:
+        parser.error(f"--{arg_name} values must be of type {cast.__name__}")
+    if any(item < minimum for item in [*per_key.values(), default or minimum]):
+        parser.error(f"--{arg_name} values must be greater or equal to {minimum}")
+    if keys and set(per_key) - set(keys):
+        parser.error(f"--{arg_name} overrides must be one of {', '.join(keys)}")
+
 
-from ted2zim.constants import ALL, MATCHING, NAME, NONE, SCRAPER, get_logger, set_debug
+def add_retry_arguments(parser):
+    """add arguments configuring the HTTP requests retry policy"""
+
+    parser.add_argument(
+        "--retry-max-attempts",
+        help="Maximum number of attempts for each HTTP request. Defaults to "
+        f"{DEFAULT_MAX_ATTEMPTS}",
+        type=int,
+    )
+
+    parser.add_argument(
+        "--retry-base-delay",
+        help="Delay in seconds before first retry, doubled on each further retry "
+        f"(with jitter). Defaults to {DEFAULT_BASE_DELAY}",
+        type=float,
+    )
+
+    parser.add_argument(
+        "--retry-max-delay",
+        help="Maximum delay in seconds between two attempts, including delays "
+        f"requested by server via Retry-After. Defaults to {DEFAULT_MAX_DELAY}",
+        type=float,
+    )
+
+    parser.add_argument(
+        "--retry-budget",
+        help="Maximum number of retries for the whole run, after which failing "
+        f"requests fail immediately. -1 for unlimited. Defaults to "
+        f"{DEFAULT_RETRY_BUDGET}",
+        type=int,
+    )
+
+
+def check_retry_arguments(parser, args):
+    """exits via parser if retry policy arguments are invalid"""
+    if args.retry_max_attempts is not None and args.retry_max_attempts < 1:
+        parser.error("--retry-max-attempts must be provided a positive integer")
+    for arg_name in ("retry_base_delay", "retry_max_delay"):
+        if getattr(args, arg_name) is not None and getattr(args, arg_name) < 0:
+            parser.error(f"--{arg_name.replace('_', '-')} cannot be negative")
 
 
 def main():
@@ -136,6 +222,45 @@ def main():
         "data (storage space)",
     )
 
+    parser.add_argument(
+        "--resume",
+        help="Continue an interrupted run from its build folder (logged on start): "
+        "discovery and completed video downloads are not done again",
+        metavar="BUILD_DIR",
+    )
+
+    parser.add_argument(
+        "--update-from",
+        help="Path to a ZIM created previously with the same video format and "
+        "quality: videos which have not changed are copied from it instead of being "
+        "downloaded and encoded again",
+        metavar="ZIM_FILE",
+    )
+
+    parser.add_argument(
+        "--catalog",
+        help="Path to a SQLite database of talk pages data, shared across runs: "
+        "talks which have not changed since they were recorded (same languages "
+        "listed by TED) are not fetched again. Created if missing",
+        metavar="DB_FILE",
+    )
+
+    parser.add_argument(
+        "--catalog-max-age",
+        help="Days after which talks recorded in --catalog are fetched again "
+        f"anyway. Defaults to {DEFAULT_MAX_AGE}",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+    )
+
+    parser.add_argument(
+        "--low-memory",
+        help="Keep videos metadata in a file instead of memory, for very large "
+        "collections (eg. all topics in a single ZIM). Slower",
+        action="store_true",
+        default=False,
+    )
+
     parser.add_argument(
         "--zim-file",
         help="ZIM file name (based on --name if not provided)",
@@ -168,6 +293,111 @@ def main():
         type=int,
     )
 
+    parser.add_argument(
+        "--discovery-threads",
+        help="Maximum number of talk pages fetched in parallel while discovering "
+        "videos. Defaults to --threads, or to "
+        f"{DEFAULT_ASYNC_CONCURRENCY} with the {ASYNCIO} discovery backend",
+        type=int,
+    )
+
+    parser.add_argument(
+        "--transcode-threads",
+        help="Maximum number of videos transcoded (ffmpeg) in parallel, while "
+        "--threads workers keep downloading. Defaults to the number of CPUs",
+        type=int,
+    )
+
+    parser.add_argument(
+        "--video-connections",
+        help="Number of connections each video is downloaded over, in byte range "
+        "segments which are resumed if a connection drops. Defaults to "
+        f"{DEFAULT_CONNECTIONS}",
+        type=int,
+        default=DEFAULT_CONNECTIONS,
+    )
+
+    parser.add_argument(
+        "--stream-transcode",
+        help="Pipe video downloads which have to be re-encoded straight into ffmpeg, "
+        "encoding while downloading without writing the original video to disk. "
+        "Videos which can't be streamed are downloaded first",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--discovery-backend",
+        help=f"How talk pages are fetched while discovering videos: by {THREADS} "
+        f"or with {ASYNCIO} (requires aiohttp, see the async extra), which allows "
+        f"many more pages in flight. Defaults to {THREADS}",
+        choices=DISCOVERY_BACKENDS,
+        default=THREADS,
+    )
+
+    parser.add_argument(
+        "--pipeline-size",
+        help="Maximum number of discovered videos waiting to be downloaded: "
+        "discovery of other videos pauses until downloads catch up. Defaults to "
+        f"{DEFAULT_PIPELINE_SIZE}",
+        type=int,
+        default=DEFAULT_PIPELINE_SIZE,
+    )
+
+    parser.add_argument(
+        "--search-page-size",
+        help="Number of talks requested per search page when scraping topics. "
+        f"Defaults to {DEFAULT_SEARCH_PAGE_SIZE}",
+        type=int,
+        default=DEFAULT_SEARCH_PAGE_SIZE,
+    )
+
+    parser.add_argument(
+        "--http-pool-size",
+        help="Maximum number of kept-alive HTTP connections per host. Either a number "
+        "or comma-separated host=number overrides, eg. 16,www.ted.com=32. Defaults to "
+        "the largest of --threads times --video-connections, --discovery-threads "
+        f"and {DEFAULT_POOL_SIZE}",
+    )
+
+    parser.add_argument(
+        "--rate-limit",
+        help="Maximum number of requests per second, shared by all threads, for each "
+        f"class of host ({', '.join(HOST_CLASSES)}). Either a number or "
+        "comma-separated class=number overrides, eg. 2,search=1,cdn=10. 0 disables "
+        f"the limit. Defaults to {DEFAULT_RATE}. Video byte ranges and HLS segments "
+        "are not limited, --video-connections bounding them",
+    )
+
+    parser.add_argument(
+        "--rate-burst",
+        help="Number of requests which can be issued at once after an idle period, "
+        "for each class of host. Same format as --rate-limit. Defaults to "
+        f"{DEFAULT_BURST}",
+    )
+
+    add_retry_arguments(parser)
+
+    parser.add_argument(
+        "--http-cache-dir",
+        help="Folder to keep a persistent cache of TED pages and JSON responses in, "
+        "reused across runs. Disabled if not set",
+    )
+
+    parser.add_argument(
+        "--http-cache-size",
+        help=f"Maximum size of the HTTP cache in MiB. Defaults to {DEFAULT_MAX_SIZE}",
+        type=float,
+    )
+
+    parser.add_argument(
+        "--http-cache-ttl",
+        help="Seconds a cached response is used before being revalidated. Either a "
+        f"number or comma-separated class=seconds overrides ({', '.join(HOST_CLASSES)})"
+        ". Defaults to "
+        + ",".join(f"{key}={value}" for key, value in DEFAULT_TTLS.items()),
+    )
+
     parser.add_argument(
         "--version",
         help="Display scraper version and exit",
@@ -202,9 +432,59 @@ def main():
         if not args.threads >= 1:
             parser.error("--threads must be provided a positive integer")
 
+        if args.discovery_threads is not None and not args.discovery_threads >= 1:
+            parser.error("--discovery-threads must be provided a positive integer")
+
+        if args.transcode_threads is not None and not args.transcode_threads >= 1:
+            parser.error("--transcode-threads must be provided a positive integer")
+
+        if not args.video_connections >= 1:
+            parser.error("--video-connections must be provided a positive integer")
+
+        if args.discovery_backend == ASYNCIO and not importlib.util.find_spec(
+            "aiohttp"
+        ):
+            parser.error(
+                f"--discovery-backend {ASYNCIO} requires aiohttp to be installed"
+            )
+
+        if not args.pipeline_size >= 1:
+            parser.error("--pipeline-size must be provided a positive integer")
+
+        if not args.search_page_size >= 1:
+            parser.error("--search-page-size must be provided a positive integer")
+
+        check_per_host_values(parser, "http-pool-size", args.http_pool_size, int, 1)
+        check_per_host_values(
+            parser, "rate-limit", args.rate_limit, float, 0, HOST_CLASSES
+        )
+        check_per_host_values(
+            parser, "rate-burst", args.rate_burst, int, 1, HOST_CLASSES
+        )
+
+        check_retry_arguments(parser, args)
+
+        check_per_host_values(
+            parser, "http-cache-ttl", args.http_cache_ttl, float, 0, HOST_CLASSES
+        )
+        if args.http_cache_size is not None and args.http_cache_size <= 0:
+            parser.error("--http-cache-size must be positive")
+
+        if args.catalog_max_age < 0:
+            parser.error("--catalog-max-age must be positive")
+
         if not 0 < args.language_threshold <= 1:
             parser.error("--language-threshold must be between 0 and 1.")
 
+        if args.resume and not pathlib.Path(args.resume).expanduser().is_dir():
+            parser.error("--resume must be the build folder of a previous run")
+
+        if (
+            args.update_from
+            and not pathlib.Path(args.update_from).expanduser().is_file()
+        ):
+            parser.error("--update-from must be an existing ZIM file")
+
         scraper = Ted2Zim(**dict(args._get_kwargs()))
         scraper.run()
     except Exception as exc:
@@ -0,0 +1,227 @@
+import concurrent.futures
+import re
+import shutil
+import subprocess
+import urllib.parse
+
+from ted2zim.constants import REQUESTS_TIMEOUT, get_logger
+from ted2zim.network import get_session, retry_policy
+from ted2zim.processing import select_rendition
+from ted2zim.segmented_download import CHUNK_SIZE, DEFAULT_CONNECTIONS
+from ted2zim.utils import request_url
+
+logger = get_logger()
+
+# attributes of an HLS tag, values being quoted strings or bare values
+ATTRIBUTES_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HlsError(Exception):
+    """HLS stream which can't be downloaded"""
+
+
+def parse_attributes(line):
+    """dict of attributes of an HLS tag line, quotes removed"""
+    return {
+        name: value.strip('"')
+        for name, value in ATTRIBUTES_RE.findall(line.split(":", 1)[-1])
+    }
+
+
+def parse_master_playlist(text, base_url):
+    """(variants, media) of a master playlist
+
+    variants are dicts of the uri, bandwidth (in bps) and other attributes
+    (RESOLUTION, CODECS, AUDIO…) of each stream ; media are the attributes of
+    alternative renditions (EXT-X-MEDIA), with absolute URI"""
+
+    variants, media = [], []
+    attributes = None
+    for line in [line.strip() for line in text.splitlines()]:
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            attributes = parse_attributes(line)
+        elif line.startswith("#EXT-X-MEDIA:"):
+            item = parse_attributes(line)
+            if item.get("URI"):
+                item["URI"] = urllib.parse.urljoin(base_url, item["URI"])
+            media.append(item)
+        elif line and not line.startswith("#") and attributes is not None:
+            variants.append(
+                {
+                    **attributes,
+                    "uri": urllib.parse.urljoin(base_url, line),
+                    "bandwidth": int(attributes.get("BANDWIDTH", 0)),
+                }
+            )
+            attributes = None
+    return variants, media
+
+
+def parse_media_playlist(text, base_url):
+    """(init section URL or None, segment URLs) of a media playlist"""
+
+    init_uri, segments = None, []
+    for line in [line.strip() for line in text.splitlines()]:
+        if line.startswith("#EXT-X-KEY:"):
+            if parse_attributes(line).get("METHOD", "NONE") != "NONE":
+                raise HlsError("Encrypted HLS streams are not supported")
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            raise HlsError("HLS byte range segments are not supported")
+        elif line.startswith("#EXT-X-MAP:"):
+            init_uri = urllib.parse.urljoin(base_url, parse_attributes(line)["URI"])
+        elif line and not line.startswith("#"):
+            segments.append(urllib.parse.urljoin(base_url, line))
+    if not segments:
+        raise HlsError(f"No segment in {base_url}")
+    return init_uri, segments
+
+
+def select_variant(variants, preset, video_format, low_quality):
+    """variant of a master playlist to download, as select_rendition does for h264
+    renditions, the best one when videos are kept as is"""
+
+    if not variants:
+        return None
+    if not low_quality and video_format == "mp4":
+        return max(variants, key=lambda variant: variant["bandwidth"])
+    rendition = select_rendition(
+        [
+            {"bitrate": variant["bandwidth"] / 1000 or None, "file": variant["uri"]}
+            for variant in variants
+        ],
+        preset,
+        video_format,
+        low_quality,
+    )
+    if rendition is None:
+        return None
+    return next(variant for variant in variants if variant["uri"] == rendition["file"])
+
+
+def remux(track_paths, fpath):
+    """copy streams of track_paths (video first) into fpath, without re-encoding"""
+    args = ["/usr/bin/env", "ffmpeg", "-y", "-v", "error"]
+    for track_path in track_paths:
+        args += ["-i", f"file:{track_path}"]
+    if len(track_paths) > 1:
+        # video of the variant, audio of the alternative rendition
+        args += ["-map", "0:v", "-map", "1:a"]
+    args += ["-codec", "copy", "-movflags", "+faststart", f"file:{fpath}"]
+    process = subprocess.run(args, capture_output=True, text=True, check=False)
+    if process.returncode:
+        raise HlsError(f"Could not remux HLS stream into {fpath}: {process.stderr}")
+
+
+class HlsDownloader:
+    """Downloads HLS streams (TED's playerData resources.hls.stream)
+
+    The variant of the master playlist fitting the preset (see select_variant) is
+    picked, along with its audio rendition if audio comes separately. Segments of
+    each track are downloaded concurrently, at most `connections` at once, into a
+    `<file>.hls` directory next to the file, then concatenated and remuxed into
+    the file without re-encoding. Downloaded segments are kept when the download
+    is interrupted, so that downloading the file again resumes from there (e.g.
+    with --resume after the run was killed). Callers giving up on the stream
+    remove them with discard()."""
+
+    def __init__(
+        self, preset, video_format, low_quality, connections=DEFAULT_CONNECTIONS
+    ):
+        self.preset = preset
+        self.video_format = video_format
+        self.low_quality = low_quality
+        self.connections = connections
+
+    @staticmethod
+    def get_segments_dir(fpath):
+        return fpath.with_name(f"{fpath.name}.hls")
+
+    @staticmethod
+    def discard(fpath):
+        """remove segments of fpath, if any"""
+        shutil.rmtree(HlsDownloader.get_segments_dir(fpath), ignore_errors=True)
+
+    def get_tracks(self, url):
+        """media playlist URLs to download for the stream at url"""
+        text = request_url(url).text
+        if "#EXT-X-STREAM-INF" not in text:
+            return [url]
+        variants, media = parse_master_playlist(text, url)
+        variant = select_variant(
+            variants, self.preset, self.video_format, self.low_quality
+        )
+        if variant is None:
+            raise HlsError(f"No variant in {url}")
+        logger.debug(
+            f"Using HLS variant with bandwidth={variant['bandwidth']} "
+            f"out of {[item['bandwidth'] for item in variants]}"
+        )
+        tracks = [variant["uri"]]
+        audio = [
+            item
+            for item in media
+            if item.get("TYPE") == "AUDIO"
+            and item.get("GROUP-ID") == variant.get("AUDIO")
+            and item.get("URI")
+        ]
+        if audio:
+            default = [item for item in audio if item.get("DEFAULT") == "YES"]
+            tracks.append((default or audio)[0]["URI"])
+        return tracks
+
+    def download(self, url, fpath):
+        """download HLS stream at url into fpath"""
+        segments_dir = self.get_segments_dir(fpath)
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        track_paths = []
+        for index, track_url in enumerate(self.get_tracks(url)):
+            track_path = segments_dir.joinpath(f"track{index}")
+            self.download_track(track_url, track_path)
+            track_paths.append(track_path)
+        remux(track_paths, fpath)
+        shutil.rmtree(segments_dir)
+
+    def download_track(self, url, track_path):
+        """download segments of media playlist at url, concatenated into track_path"""
+        init_uri, segments = parse_media_playlist(request_url(url).text, url)
+        urls = ([init_uri] if init_uri else []) + segments
+        paths = [
+            track_path.with_name(f"{track_path.name}-{index:05}")
+            for index in range(len(urls))
+        ]
+        logger.debug(f"Downloading {len(segments)} HLS segment(s) of {url}")
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.connections, thread_name_prefix="hls"
+        ) as executor:
+            for future in [
+                executor.submit(self.download_segment, segment_url, path)
+                for segment_url, path in zip(urls, paths, strict=True)
+                if not path.exists()
+            ]:
+                future.result()
+
+        with open(track_path, "wb") as fh:
+            for path in paths:
+                with open(path, "rb") as segment_fh:
+                    shutil.copyfileobj(segment_fh, fh)
+
+    @staticmethod
+    def download_segment(url, path):
+        """download url into path, retried according to the shared retry policy
+
+        path only exists once the segment is complete. Like byte ranges of videos,
+        segments are not rate limited: they are bounded by `connections`"""
+
+        tmp_path = path.with_name(f"{path.name}.tmp")
+
+        def download():
+            with get_session().get(
+                url, stream=True, timeout=REQUESTS_TIMEOUT
+            ) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as fh:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        fh.write(chunk)
+            tmp_path.rename(path)
+
+        retry_policy.run(download, url)
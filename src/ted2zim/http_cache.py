@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ted2zim.constants import get_logger
+from ted2zim.network import RateLimiter
+
+logger = get_logger()
+
+# seconds a cached response is used without revalidation, per class of URL (see
+# network.RateLimiter.get_host_class)
+DEFAULT_TTLS = {
+    "pages": 24 * 3600,
+    "search": 3600,
+    "subtitles": 30 * 24 * 3600,
+    "cdn": 30 * 24 * 3600,
+}
+DEFAULT_MAX_SIZE = 1024  # MiB
+# response headers kept along cached bodies
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CacheEntry:
+    """A cached response on disk"""
+
+    def __init__(self, key, body_path, meta):
+        self.key = key
+        self.body_path = body_path
+        self.meta = meta
+
+    @property
+    def validators(self):
+        """conditional request headers to revalidate this entry"""
+        headers = {}
+        if self.meta["headers"].get("ETag"):
+            headers["If-None-Match"] = self.meta["headers"]["ETag"]
+        if self.meta["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = self.meta["headers"]["Last-Modified"]
+        return headers
+
+    def to_response(self):
+        """requests.Response rebuilt from this entry"""
+        response = requests.Response()
+        response.status_code = self.meta["status_code"]
+        response.url = self.meta["url"]
+        response.encoding = self.meta["encoding"]
+        response.headers = CaseInsensitiveDict(self.meta["headers"])
+        response._content = self.body_path.read_bytes()
+        return response
+
+
+class HttpCache:
+    """Persistent on-disk cache of successful HTTP responses
+
+    - entries are addressed by a hash of the request (method, URL and JSON body)
+    - entries are used as-is for a TTL depending on the URL class, then revalidated
+      with ETag / Last-Modified when the server provided them
+    - total size is capped, least recently used entries being evicted first
+    - callers discard entries whose content they fail to parse
+
+    Disabled until configured with a directory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.directory = None
+        self.max_size = DEFAULT_MAX_SIZE * 2**20
+        self.ttls = dict(DEFAULT_TTLS)
+        self._index = {}  # key: (last access timestamp, size in bytes)
+        self.hits = self.revalidated = self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def configure(self, directory, max_size=None, ttls=None):
+        """enable cache in directory ; max_size in MiB, ttls in seconds per class"""
+        with self._lock:
+            self.directory = pathlib.Path(directory).expanduser().resolve()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.max_size = int(
+                (DEFAULT_MAX_SIZE if max_size is None else max_size) * 2**20
+            )
+            self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+            self._index = {}
+            for meta_path in self.directory.glob("*/*.json"):
+                body_path = meta_path.with_suffix(".body")
+                try:
+                    stat = body_path.stat()
+                except FileNotFoundError:
+                    continue
+                self._index[meta_path.stem] = (
+                    stat.st_mtime,
+                    stat.st_size + meta_path.stat().st_size,
+                )
+            self._evict()
+        logger.info(
+            f"Using HTTP cache at {self.directory} with {len(self._index)} entries"
+        )
+
+    @staticmethod
+    def get_key(url, json_data=None):
+        method = "POST" if json_data else "GET"
+        body = json.dumps(json_data, sort_keys=True) if json_data else ""
+        return hashlib.sha256(f"{method} {url}\n{body}".encode()).hexdigest()
+
+    def _paths(self, key):
+        folder = self.directory.joinpath(key[:2])  # pyright: ignore
+        return folder.joinpath(f"{key}.body"), folder.joinpath(f"{key}.json")
+
+    def get(self, url, json_data=None):
+        """CacheEntry for this request or None"""
+        if not self.enabled:
+            return None
+        key = self.get_key(url, json_data)
+        body_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not body_path.exists():
+            return None
+        return CacheEntry(key, body_path, meta)
+
+    def lookup(self, url, json_data=None):
+        """(response, entry) for a request about to be done
+
+        response is the cached one when fresh, to be used without any request ;
+        None otherwise, entry being the one to revalidate (None if not cached)"""
+        entry = self.get(url, json_data)
+        if entry and self.is_fresh(entry, RateLimiter.get_host_class(url)):
+            self.use(entry)
+            return entry.to_response(), entry
+        return None, entry
+
+    def resolve(self, url, json_data, response, entry):
+        """response to return for a request done after lookup() returned entry
+
+        The cached response if the server answered it was not modified, response
+        otherwise, stored if successful. Raises HTTPError on error responses"""
+        if entry and response.status_code == HTTPStatus.NOT_MODIFIED:
+            self.use(entry, revalidated=True)
+            return entry.to_response()
+        response.raise_for_status()
+        self.store(url, json_data, response)
+        return response
+
+    def is_fresh(self, entry, url_class):
+        return time.time() - entry.meta["stored_on"] < self.ttls.get(url_class, 0)
+
+    def use(self, entry, *, revalidated=False):
+        """record usage of entry (for LRU), refreshing it when revalidated"""
+        now = time.time()
+        if revalidated:
+            entry.meta["stored_on"] = now
+            self._write(self._paths(entry.key)[1], json.dumps(entry.meta).encode())
+        os.utime(entry.body_path, (now, now))
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+            if entry.key in self._index:
+                self._index[entry.key] = (now, self._index[entry.key][1])
+
+    def store(self, url, json_data, response):
+        """save a successful response"""
+        if not self.enabled or response.status_code != HTTPStatus.OK:
+            return
+        key = self.get_key(url, json_data)
+        body_path, meta_path = self._paths(key)
+        meta = json.dumps(
+            {
+                "url": response.url or url,
+                "status_code": response.status_code,
+                "encoding": response.encoding,
+                "headers": {
+                    name: response.headers[name]
+                    for name in KEPT_HEADERS
+                    if name in response.headers
+                },
+                "stored_on": time.time(),
+            }
+        ).encode()
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write(body_path, response.content)
+        self._write(meta_path, meta)
+        with self._lock:
+            self.misses += 1
+            self._index[key] = (time.time(), len(response.content) + len(meta))
+            self._evict()
+
+    def discard(self, url, json_data=None):
+        """remove the entry of a response whose content turned out to be unusable,
+        so that it is requested again"""
+        if not self.enabled:
+            return
+        key = self.get_key(url, json_data)
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._index.pop(key, None)
+
+    @staticmethod
+    def _write(fpath, content):
+        """atomically write content to fpath"""
+        with tempfile.NamedTemporaryFile(dir=fpath.parent, delete=False) as fh:
+            fh.write(content)
+        os.replace(fh.name, fpath)
+
+    def _evict(self):
+        """remove least recently used entries until under max_size ; lock held"""
+        total = sum(size for _, size in self._index.values())
+        if total <= self.max_size:
+            return
+        for key, (_, size) in sorted(self._index.items(), key=lambda item: item[1]):
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+            del self._index[key]
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def __str__(self):
+        with self._lock:
+            return (
+                f"{self.hits} HTTP cache hit(s), {self.revalidated} revalidated, "
+                f"{self.misses} miss(es)"
+            )
+
+
+http_cache = HttpCache()
@@ -1,3 +1,5 @@
+import functools
+
 from zimscraperlib.i18n import get_language_details
 
 from ted2zim.constants import (
@@ -8,10 +10,23 @@ from ted2zim.constants import (
 logger = get_logger()
 
 
+# Language lookups are done for every language of every talk and subtitle while the
+# same few hundred languages keep coming back, so they are memoized: after the first
+# lookup of a language, resolving it is a dict hit. Cached values are shared and
+# must not be modified.
+
+
+@functools.cache
+def get_language_info(query):
+    """zimscraperlib.i18n.get_language_details of query, None if not found"""
+    return get_language_details(query, failsafe=True)
+
+
+@functools.cache
 def get_display_name(lang_code, lang_name):
     """Display name for language"""
 
-    lang_info = get_language_details(lang_code, failsafe=True)
+    lang_info = get_language_info(lang_code)
     if lang_code != "en" and lang_info:
         return lang_info["native"] + " - " + lang_name
     return lang_name
@@ -51,19 +66,29 @@ def to_ted_langcodes(languages):
 
     lang_code_list = []
     for lang in languages:
-        lang_info = get_language_details(lang, failsafe=True)
-        if lang_info:
-            if lang_info["querytype"] == "purecode":
-                append_part1_or_part3(lang_code_list, lang_info)
-            elif lang_info["querytype"] == "locale":
-                query = lang_info["query"].replace("_", "-")
-                if query in TEDLANGS["locales"]:
-                    lang_code_list.append(query)
-                else:
-                    append_part1_or_part3(lang_code_list, lang_info)
+        lang_code_list += get_ted_langcodes(lang)
+    # deduplicate while keeping a stable order
+    return list(dict.fromkeys(lang_code_list))
+
+
+@functools.cache
+def get_ted_langcodes(lang):
+    """TED language codes of a language query, see to_ted_langcodes"""
+
+    lang_code_list = []
+    lang_info = get_language_info(lang)
+    if lang_info:
+        if lang_info["querytype"] == "purecode":
+            append_part1_or_part3(lang_code_list, lang_info)
+        elif lang_info["querytype"] == "locale":
+            query = lang_info["query"].replace("_", "-")
+            if query in TEDLANGS["locales"]:
+                lang_code_list.append(query)
             else:
                 append_part1_or_part3(lang_code_list, lang_info)
-    return list(set(lang_code_list))
+        else:
+            append_part1_or_part3(lang_code_list, lang_info)
+    return tuple(lang_code_list)
 
 
 def ted_to_iso639_3_langcodes(ted_langcodes):
@@ -77,12 +102,14 @@ def ted_to_iso639_3_langcodes(ted_langcodes):
         ["zh", "zh-cn", "zh-tw"] => {"zh": "chi", "zh-cn": "chi", "zh-tw": "chi"}
     """
 
-    mapping = {}
-    for lang in set(ted_langcodes):
-        lang_info = get_language_details(lang, failsafe=True)
-        if lang_info and lang_info["iso-639-3"]:
-            mapping[lang] = lang_info["iso-639-3"]
-        else:
-            mapping[lang] = None
+    return {lang: get_iso639_3_langcode(lang) for lang in set(ted_langcodes)}
+
+
+@functools.cache
+def get_iso639_3_langcode(ted_langcode):
+    """ISO639-3 code of a TED language code, None if it does not exist"""
 
-    return mapping
+    lang_info = get_language_info(ted_langcode)
+    if lang_info and lang_info["iso-639-3"]:
+        return lang_info["iso-639-3"]
+    return None
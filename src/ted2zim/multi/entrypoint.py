@@ -2,6 +2,7 @@ import argparse
 import logging
 
 from ted2zim.constants import NAME, SCRAPER, get_logger, set_debug
+from ted2zim.entrypoint import add_retry_arguments, check_retry_arguments
 from ted2zim.utils import has_argument
 
 
@@ -80,6 +81,8 @@ def main():
         default=False,
     )
 
+    add_retry_arguments(parser)
+
     args, extra_args = parser.parse_known_args()
 
     # prevent launching without any topic(s)/playlist(s)
@@ -102,6 +105,8 @@ def main():
     if args.indiv_zims and not args.name_format:
         parser.error("--name-format is mandatory in individual ZIMs mode")
 
+    check_retry_arguments(parser, args)
+
     set_debug(args.debug)
     logger = get_logger()
     logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
@@ -7,12 +7,12 @@ import time
 import urllib.parse
 from http import HTTPStatus
 
-import requests
 from kiwixstorage import KiwixStorage
 from slugify import slugify
 from zimscraperlib.logging import nicer_args_join
 
 from ted2zim.constants import NAME, REQUESTS_TIMEOUT, get_logger
+from ted2zim.network import get_session, rate_limiter, retry_policy
 from ted2zim.utils import get_temp_fpath, request_url
 
 logger = get_logger()
@@ -26,6 +26,10 @@ class TedHandler:
     ):
         self.debug = False
         self.disable_metadata_checks = False
+        self.retry_max_attempts = None
+        self.retry_base_delay = None
+        self.retry_max_delay = None
+        self.retry_budget = None
         # save options as properties
         for key, value in options.items():
             if key not in ["topics", "playlists"]:
@@ -44,6 +48,29 @@ class TedHandler:
         )
         self.metadata = {}  # custom metadata holder
 
+        # retry policy for our own requests, also forwarded to ted2zim
+        retry_policy.configure(
+            max_attempts=self.retry_max_attempts,
+            base_delay=self.retry_base_delay,
+            max_delay=self.retry_max_delay,
+            budget=self.retry_budget,
+        )
+
+    @property
+    def retry_args(self):
+        """ted2zim arguments for the retry policy options which were set"""
+        args = []
+        for key in (
+            "retry-max-attempts",
+            "retry-base-delay",
+            "retry-max-delay",
+            "retry-budget",
+        ):
+            value = getattr(self, key.replace("-", "_"), None)
+            if value is not None:
+                args += [f"--{key}", str(value)]
+        return args
+
     @property
     def ted2zim_exe(self):
         """ted2zim executable"""
@@ -64,8 +91,11 @@ class TedHandler:
     @staticmethod
     def get_playlist_slug(item):
         partial_url = f"https://www.ted.com/playlists/{item}/"
-        for attempt in range(5):
-            resp = requests.get(
+        attempt = 0
+        while True:
+            attempt += 1
+            rate_limiter.acquire(partial_url)
+            resp = get_session().get(
                 partial_url, allow_redirects=True, timeout=REQUESTS_TIMEOUT
             )
             if resp.status_code == HTTPStatus.OK:
@@ -75,7 +105,9 @@ class TedHandler:
                     urllib.parse.unquote(resp.url.replace(partial_url, "")),
                     separator="-",
                 )
-            time.sleep(30 * attempt)
+            if not retry_policy.consume(attempt, resp):
+                break
+            time.sleep(retry_policy.get_delay(attempt, resp))
         raise Exception(f"Could not get slug for playlist {item}")
 
     @staticmethod
@@ -279,6 +311,7 @@ class TedHandler:
                 args += [f"--{key}", self.compute_format(item, str(value), mode)]
 
         # append regular ted2zim args
+        args += self.retry_args
         args += self.extra_args
 
         if self.debug:
@@ -313,6 +346,7 @@ class TedHandler:
             ]
         else:
             raise ValueError(f"Unsupported mode {mode}")
+        args += self.retry_args
         args += self.extra_args
         if self.debug:
             args += ["--debug"]
@@ -330,9 +364,11 @@ class TedHandler:
         # load JSON from source (URL or file)
         try:
             if str(self.metadata_from).startswith("http"):
-                self.metadata = requests.get(
-                    str(self.metadata_from), timeout=REQUESTS_TIMEOUT
-                ).json()
+                self.metadata = (
+                    get_session()
+                    .get(str(self.metadata_from), timeout=REQUESTS_TIMEOUT)
+                    .json()
+                )
             else:
                 if not self.metadata_from.exists():
                     raise OSError(
@@ -0,0 +1,417 @@
+import asyncio
+import datetime
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from http import HTTPStatus
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from ted2zim.constants import SEARCH_URL, get_logger
+
+logger = get_logger()
+
+DEFAULT_POOL_SIZE = 10
+
+# requests per second and burst size applied to each class of host by default
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+HOST_CLASSES = ("pages", "search", "subtitles", "cdn")
+
+# retry policy defaults
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 5.0
+DEFAULT_MAX_DELAY = 120.0
+DEFAULT_RETRY_BUDGET = 200
+# responses telling us to slow down, for which Retry-After is honoured
+THROTTLING_STATUSES = (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE)
+# responses which won't get any better by retrying
+NON_RETRYABLE_STATUSES = (HTTPStatus.NOT_FOUND, HTTPStatus.GONE)
+
+
+class ConnectionStats:
+    """Thread-safe counters of HTTP connections created vs reused"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.created = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.created += 1
+
+    @property
+    def reused(self):
+        with self._lock:
+            return max(self.requests - self.created, 0)
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.created = 0
+
+    def __str__(self):
+        return (
+            f"{self.requests} HTTP request(s), {self.created} connection(s) created, "
+            f"{self.reused} reused"
+        )
+
+
+connection_stats = ConnectionStats()
+
+
+class CountingHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_connection()
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_connection()
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter keeping connections alive and counting their reuse"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, *args, **kwargs):
+        connection_stats.record_request()
+        return super().send(*args, **kwargs)
+
+
+def parse_per_host_values(value, cast):
+    """default value and per-host overrides from a `value,host=value` string
+
+    Examples:
+        "10" => (10, {})
+        "10,www.ted.com=20" => (10, {"www.ted.com": 20})
+        "www.ted.com=20" => (None, {"www.ted.com": 20})
+    """
+
+    default, per_host = None, {}
+    for item in [item.strip() for item in str(value).split(",") if item.strip()]:
+        if "=" in item:
+            key, item_value = item.split("=", 1)
+            per_host[key.strip()] = cast(item_value.strip())
+        else:
+            default = cast(item)
+    return default, per_host
+
+
+class SessionPool:
+    """Shared requests.Session with per-host keep-alive connection pools
+
+    The session is built lazily on first use so that configure() can be called
+    once options are known."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self.pool_size = DEFAULT_POOL_SIZE
+        self.host_pool_sizes = {}
+
+    def configure(self, pool_size=None, host_pool_sizes=None):
+        """set pool sizes ; discards current session so they are applied"""
+        with self._lock:
+            self.pool_size = pool_size or DEFAULT_POOL_SIZE
+            self.host_pool_sizes = dict(host_pool_sizes or {})
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        session.headers.update({"User-Agent": "Mozilla/5.0"})
+        # keep at least one pool per known host in the PoolManager cache
+        nb_pools = max(DEFAULT_POOL_SIZE, len(self.host_pool_sizes) + 1)
+        for scheme in ("http://", "https://"):
+            session.mount(
+                scheme,
+                PooledAdapter(pool_connections=nb_pools, pool_maxsize=self.pool_size),
+            )
+        # most specific prefix wins in requests' adapter lookup
+        for host, size in self.host_pool_sizes.items():
+            for scheme in ("http://", "https://"):
+                session.mount(
+                    f"{scheme}{host}/",
+                    PooledAdapter(pool_connections=1, pool_maxsize=size),
+                )
+        logger.debug(
+            f"HTTP session ready with pools of {self.pool_size} connection(s)"
+            + (f", overrides: {self.host_pool_sizes}" if self.host_pool_sizes else "")
+        )
+        return session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+session_pool = SessionPool()
+
+
+def get_session():
+    """shared pooled requests.Session"""
+    return session_pool.session
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second
+
+    Up to `burst` tokens can be accumulated while idle. Tokens are reserved under
+    the lock (the count may go negative) and the wait happens outside of it, so that
+    concurrent callers are served in order without busy looping."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_on = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """reserve a token ; returns seconds to wait before it can be used"""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_on) * self.rate
+            )
+            self._updated_on = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """block until a token is available ; returns time waited in seconds"""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Per host class token buckets shared by all threads
+
+    Host classes are: pages (ted.com talk, playlist and topic pages), search (the
+    search API), subtitles (the subtitles endpoint) and cdn (everything else).
+    Video byte ranges and HLS segments don't go through it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, rate=None, burst=None, rates=None, bursts=None):
+        """set default rate/burst and per host class overrides
+
+        A rate of 0 disables limiting for the class"""
+        rates, bursts = rates or {}, bursts or {}
+        for name in [*rates.keys(), *bursts.keys()]:
+            if name not in HOST_CLASSES:
+                raise ValueError(
+                    f"Unknown host class {name}, must be one of {HOST_CLASSES}"
+                )
+        with self._lock:
+            self.buckets = {
+                name: TokenBucket(
+                    rate=rates.get(name, DEFAULT_RATE if rate is None else rate),
+                    burst=bursts.get(name, burst or DEFAULT_BURST),
+                )
+                for name in HOST_CLASSES
+            }
+
+    @staticmethod
+    def get_host_class(url):
+        """host class of an URL"""
+        parts = urllib.parse.urlparse(url)
+        if parts.netloc == urllib.parse.urlparse(SEARCH_URL).netloc:
+            return "search"
+        if parts.netloc in ("ted.com", "www.ted.com"):
+            if parts.path.startswith("/talks/subtitles/"):
+                return "subtitles"
+            return "pages"
+        return "cdn"
+
+    def reserve(self, url):
+        """reserve a request to url ; returns seconds to wait before doing it
+
+        For callers which can't block, such as coroutines"""
+        host_class = self.get_host_class(url)
+        with self._lock:
+            bucket = self.buckets[host_class]
+        wait = bucket.reserve()
+        if wait > 1:
+            logger.debug(f"Rate limited {host_class} request for {wait:.1f}s")
+        return wait
+
+    def acquire(self, url):
+        """block until a request to url is allowed"""
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+
+
+rate_limiter = RateLimiter()
+
+
+def parse_retry_after(value):
+    """number of seconds to wait from a Retry-After header value, or None
+
+    Value is either a number of seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_on = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_on.tzinfo is None:
+        retry_on = retry_on.replace(tzinfo=datetime.UTC)
+    return max((retry_on - datetime.datetime.now(datetime.UTC)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """How and how long failed requests are retried
+
+    - at most max_attempts attempts per request
+    - capped exponential backoff (base_delay * 2^retry, up to max_delay) with jitter
+    - Retry-After is honoured (up to max_delay) on throttling responses (429/503)
+    - a budget of retries shared by the whole run, so that an outage fails fast
+      instead of stalling every thread
+
+    run (or run_async) applies it to a request function."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(
+        self,
+        max_attempts=None,
+        base_delay=None,
+        max_delay=None,
+        budget=None,
+    ):
+        """set policy ; None uses defaults and a negative budget means unlimited"""
+        with self._lock:
+            self.max_attempts = max_attempts or DEFAULT_MAX_ATTEMPTS
+            self.base_delay = DEFAULT_BASE_DELAY if base_delay is None else base_delay
+            self.max_delay = DEFAULT_MAX_DELAY if max_delay is None else max_delay
+            if budget is None:
+                self.budget = DEFAULT_RETRY_BUDGET
+            else:
+                self.budget = None if budget < 0 else budget
+            self.retries = 0
+
+    @property
+    def budget_exhausted(self):
+        with self._lock:
+            return self.budget is not None and self.retries >= self.budget
+
+    @staticmethod
+    def is_retryable(response):
+        """whether a request which got response (None if none) may be retried"""
+        return response is None or response.status_code not in NON_RETRYABLE_STATUSES
+
+    def consume(self, attempt, response=None):
+        """whether attempt can be followed by another one ; uses budget if so"""
+        if attempt >= self.max_attempts or not self.is_retryable(response):
+            return False
+        with self._lock:
+            if self.budget is not None and self.retries >= self.budget:
+                return False
+            self.retries += 1
+            return True
+
+    def get_delay(self, attempt, response=None):
+        """seconds to wait before retrying after attempt (1-based)"""
+        if response is not None and response.status_code in THROTTLING_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        # "equal jitter": keep half of the delay and randomize the other half
+        return delay / 2 + random.uniform(0, delay / 2)  # noqa: S311
+
+    def on_failure(self, exc, attempt, description, fatal=()):
+        """seconds to wait before retrying attempt (1-based) which raised exc
+
+        Raises exc if it is one of fatal or came with a response not worth
+        retrying (see is_retryable), and ConnectionRefusedError once no retry is
+        left. description names what was requested in logs and errors"""
+
+        # HTTP errors (from raise_for_status) carry the response
+        response = getattr(exc, "response", None)
+        if isinstance(exc, fatal) or (
+            response is not None and not self.is_retryable(response)
+        ):
+            raise exc
+        if self.consume(attempt, response):
+            delay = self.get_delay(attempt, response)
+            logger.debug(
+                f"Attempt {attempt} to get {description} failed ({exc}), retrying in "
+                f"{delay:.1f}s"
+            )
+            return delay
+
+        reason = " (retry budget exhausted)" if self.budget_exhausted else ""
+        status = response.status_code if response is not None else "<unknown>"
+        raise ConnectionRefusedError(
+            f"Failed to get {description} after {attempt} attempts{reason} "
+            f"(HTTP status {status})"
+        ) from exc
+
+    def run(self, func, description, fatal=()):
+        """result of func(), called again on failure according to the policy
+
+        See on_failure for description and fatal"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func()
+            except Exception as exc:
+                delay = self.on_failure(exc, attempt, description, fatal)
+            time.sleep(delay)  # wait upon failure
+
+    async def run_async(self, func, description, fatal=()):
+        """run for a coroutine function func"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func()
+            except Exception as exc:
+                delay = self.on_failure(exc, attempt, description, fatal)
+            await asyncio.sleep(delay)  # wait upon failure
+
+
+retry_policy = RetryPolicy()
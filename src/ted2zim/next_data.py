@@ -0,0 +1,76 @@
+import json
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+NEXT_DATA_ID = b"__NEXT_DATA__"
+VIDEO_DATA_KEY = re.compile(r'"videoData"\s*:\s*')
+
+_decoder = json.JSONDecoder()
+
+
+class NextDataNotFoundError(Exception):
+    """__NEXT_DATA__ script is missing from the page"""
+
+
+def find_next_data(content: bytes) -> bytes | None:
+    """raw JSON payload of the __NEXT_DATA__ script, located by scanning bytes
+
+    Returns None if the script could not be located this way (not a proof that it
+    is not in the page)"""
+
+    marker = content.find(NEXT_DATA_ID)
+    while marker != -1:
+        tag_start = content.rfind(b"<", 0, marker)
+        if tag_start != -1 and content.startswith(b"<script", tag_start):
+            start = content.find(b">", marker)
+            end = content.find(b"</script>", start)
+            if start == -1 or end == -1:
+                return None
+            return content[start + 1 : end]
+        marker = content.find(NEXT_DATA_ID, marker + len(NEXT_DATA_ID))
+    return None
+
+
+def extract_video_data(content: bytes) -> dict | None:
+    """videoData dict from a TED talk page, without parsing the HTML
+
+    Only the videoData object is decoded when it can be located in the payload,
+    the whole payload otherwise.
+
+    Returns None if the __NEXT_DATA__ script could not be located, raises KeyError
+    if it has no videoData"""
+
+    payload = find_next_data(content)
+    if payload is None:
+        return None
+    text = payload.decode("utf-8")
+
+    # videoData is expected at props.pageProps.videoData ; it is decoded on its own
+    # and checked to look like a talk, otherwise we decode everything
+    for match in VIDEO_DATA_KEY.finditer(text):
+        try:
+            video_data, _ = _decoder.raw_decode(text, match.end())
+        except json.JSONDecodeError:
+            break
+        if isinstance(video_data, dict) and "playerData" in video_data:
+            return video_data
+
+    return json.loads(text)["props"]["pageProps"]["videoData"]
+
+
+def extract_video_data_from_soup(html_content: str) -> dict:
+    """videoData dict from a TED talk page, using a full BeautifulSoup parse
+
+    Raises NextDataNotFoundError if the __NEXT_DATA__ script is missing and KeyError
+    if it has no videoData"""
+
+    soup = BeautifulSoup(html_content, features="html.parser")
+    next_data_tag = soup.find("script", attrs={"id": "__NEXT_DATA__"})
+    if (
+        not next_data_tag
+        or not isinstance(next_data_tag, Tag)
+        or not isinstance(next_data_tag.string, str)
+    ):
+        raise NextDataNotFoundError()
+    return json.loads(next_data_tag.string)["props"]["pageProps"]["videoData"]
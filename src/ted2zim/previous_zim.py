@@ -0,0 +1,124 @@
+import json
+import pathlib
+import threading
+
+from libzim.reader import Archive
+
+from ted2zim.constants import get_logger
+
+logger = get_logger()
+
+# path (in build dir and ZIM) of the description of encoded videos, which allows a
+# later ZIM to reuse them
+VIDEOS_INFO_PATH = "videos/info.json"
+
+
+def get_video_source(video):
+    """identifies the original video file of a video"""
+    return video.video_link or video.youtube_id
+
+
+def write_videos_info(build_dir, videos, video_format, video_quality, preset_version):
+    """write VIDEOS_INFO_PATH for successful videos"""
+    fpath = pathlib.Path(build_dir).joinpath(VIDEOS_INFO_PATH)
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    with open(fpath, "w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "video_format": video_format,
+                "video_quality": video_quality,
+                "preset_version": preset_version,
+                "videos": {
+                    video.id: get_video_source(video)
+                    for video in videos
+                    if not video.failed
+                },
+            },
+            fh,
+        )
+
+
+class PreviousZim:
+    """Videos of a ZIM created by a previous run, to reuse instead of fetching
+
+    A video is reused when it is in the previous ZIM with the same original video
+    file and was encoded with the same format, quality and preset version. Its
+    video, images and subtitles entries are then copied from the previous ZIM."""
+
+    def __init__(self, fpath, video_format, video_quality, preset_version):
+        self.fpath = pathlib.Path(fpath).expanduser().resolve()
+        self.archive = Archive(self.fpath)
+        self.video_format = video_format
+        self._lock = threading.Lock()
+        self.nb_reused = 0
+
+        self.sources = {}
+        info = self.read_json(VIDEOS_INFO_PATH)
+        if info is None:
+            logger.warning(f"No videos info in {self.fpath}, no video can be reused")
+        elif (
+            info["video_format"],
+            info["video_quality"],
+            info["preset_version"],
+        ) != (video_format, video_quality, preset_version):
+            logger.warning(
+                f"Videos of {self.fpath} were encoded differently "
+                f"({info['video_format']}, {info['video_quality']} quality, preset "
+                f"version {info['preset_version']}), no video can be reused"
+            )
+        else:
+            self.sources = info["videos"]
+            logger.info(f"{len(self.sources)} video(s) can be reused from {self.fpath}")
+
+    def read_json(self, path):
+        if not self.archive.has_entry_by_path(path):
+            return None
+        return json.loads(
+            bytes(self.archive.get_entry_by_path(path).get_item().content)
+        )
+
+    @staticmethod
+    def get_video_dir(video):
+        return f"videos/{video.id}"
+
+    def has_video(self, video):
+        """whether video can be reused from the previous ZIM"""
+        if self.sources.get(video.id) != get_video_source(video):
+            return False
+        return self.archive.has_entry_by_path(
+            f"{self.get_video_dir(video)}/video.{self.video_format}"
+        )
+
+    def copy_entry(self, path, fpath):
+        """write entry at path to fpath ; False if there is no such entry"""
+        if not self.archive.has_entry_by_path(path):
+            return False
+        with open(fpath, "wb") as fh:
+            fh.write(self.archive.get_entry_by_path(path).get_item().content)
+        return True
+
+    def copy_video(self, video, video_dir):
+        """copy video and images of video to video_dir ; False if not reusable"""
+        if not self.has_video(video):
+            return False
+        video_dir.mkdir(parents=True, exist_ok=True)
+        for name in (f"video.{self.video_format}", "speaker.webp", "thumbnail.webp"):
+            self.copy_entry(f"{self.get_video_dir(video)}/{name}", video_dir / name)
+        with self._lock:
+            self.nb_reused += 1
+        return True
+
+    def has_subtitles(self, video, lang_codes):
+        """whether all subtitles of video in lang_codes can be reused"""
+        return self.has_video(video) and all(
+            self.archive.has_entry_by_path(
+                f"{self.get_video_dir(video)}/subs/subs_{lang_code}.vtt"
+            )
+            for lang_code in lang_codes
+        )
+
+    def copy_subtitles(self, video, lang_code, fpath):
+        """copy subtitles of video in lang_code to fpath ; False if not reusable"""
+        return self.has_video(video) and self.copy_entry(
+            f"{self.get_video_dir(video)}/subs/subs_{lang_code}.vtt", fpath
+        )
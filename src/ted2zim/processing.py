@@ -1,15 +1,99 @@
 from zimscraperlib.video.encoding import reencode
+from zimscraperlib.video.probing import get_media_info
 
 from ted2zim.constants import get_logger
 
 logger = get_logger()
 
 
+def get_target_bitrate(preset):
+    """total bitrate (video and audio, in kbps) of preset, None if unknown"""
+    try:
+        return sum(
+            int(str(preset.options[option]).removesuffix("k"))
+            for option in ("-b:v", "-b:a")
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+def get_bitrate(rendition):
+    """bitrate (kbps) of an h264 rendition of TED playerData resources, or None"""
+    try:
+        return float(rendition["bitrate"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def select_rendition(renditions, preset, video_format, low_quality):
+    """h264 rendition (of TED playerData resources) to download, None if none
+
+    - videos kept as is (mp4 in high quality): TED's default one, the first
+    - mp4 in low quality: the best one already within the preset target bitrate,
+      which doesn't need re-encoding (see post_process_video)
+    - otherwise, as it is re-encoded: the lightest one with at least the preset
+      target bitrate, not to degrade quality further
+
+    Falls back to the closest rendition, and to the first one if bitrates are
+    unknown. TED does not tell renditions resolution, only their bitrate."""
+
+    renditions = [rendition for rendition in renditions if rendition.get("file")]
+    if not renditions:
+        return None
+    target = get_target_bitrate(preset)
+    rated = [rendition for rendition in renditions if get_bitrate(rendition)]
+    if (not low_quality and video_format == "mp4") or not target or not rated:
+        return renditions[0]
+
+    if low_quality and video_format == "mp4":
+        within = [rendition for rendition in rated if get_bitrate(rendition) <= target]
+        if within:
+            return max(within, key=get_bitrate)
+    above = [rendition for rendition in rated if get_bitrate(rendition) >= target]
+    if above:
+        return min(above, key=get_bitrate)
+    return max(rated, key=get_bitrate)
+
+
+def estimate_bytes_saved(renditions, rendition, duration):
+    """bytes not downloaded by picking rendition instead of the first one
+
+    duration is in seconds. Negative if rendition is heavier, 0 if unknown"""
+
+    first_bitrate, bitrate = get_bitrate(renditions[0]), get_bitrate(rendition)
+    if first_bitrate is None or bitrate is None:
+        return 0
+    return int((first_bitrate - bitrate) * 1000 / 8 * duration)
+
+
+def meets_target(src_path, preset):
+    """whether video at src_path already meets preset: same codecs and a bitrate
+    within its target"""
+
+    target = get_target_bitrate(preset)
+    if not target:
+        return False
+    try:
+        media_info = get_media_info(src_path)
+    except Exception as exc:
+        logger.debug(f"Could not probe {src_path}", exc_info=exc)
+        return False
+    return (
+        set(media_info["codecs"])
+        <= {
+            preset.options.get("-codec:v"),
+            preset.options.get("-codec:a"),
+        }
+        and media_info["bitrate"] <= target * 1000
+    )
+
+
 def post_process_video(video_dir, video_id, preset, video_format, low_quality):
-    """apply custom post-processing to downloaded video
+    """apply custom post-processing to downloaded video ; whether it was re-encoded
 
     - resize thumbnail
-    - recompress video if incorrect video_format or low_quality requested
+    - recompress video if incorrect video_format or low_quality requested, unless
+      the video already meets the preset
     """
 
     # find downloaded video from video_dir
@@ -29,7 +113,12 @@ def post_process_video(video_dir, video_id, preset, video_format, low_quality):
 
     # don't reencode if not requesting low-quality and received wanted format
     if not low_quality and src_path.suffix[1:] == video_format:
-        return
+        return False
+
+    # don't reencode if received video is already as light as requested
+    if src_path.suffix[1:] == video_format and meets_target(src_path, preset):
+        logger.debug(f"Video {video_id} already meets the preset, not re-encoding")
+        return False
 
     dst_path = src_path.parent.joinpath(f"video.{video_format}")
     logger.debug(f"Converting video {video_id}")
@@ -45,3 +134,4 @@ def post_process_video(video_dir, video_id, preset, video_format, low_quality):
         if process:
             logger.error(process.stdout)
         raise Exception(f"Exception while re-encoding {src_path} for {video_id}")
+    return True
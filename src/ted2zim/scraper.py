@@ -1,18 +1,25 @@
+import asyncio
+import collections
 import concurrent.futures
 import datetime
 import json
 import locale
+import os
 import pathlib
+import queue
 import shutil
 import tempfile
+import threading
 import time
 import urllib.parse
-from itertools import groupby
+from collections import Counter
+from contextlib import ExitStack
+from itertools import islice
 
 import dateutil.parser
 import jinja2
 import yt_dlp
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup
 from kiwixstorage import KiwixStorage
 from pif import get_public_ip
 from slugify import slugify
@@ -33,21 +40,65 @@ from zimscraperlib.zim.metadata import (
 )
 
 from ted2zim import languages as tedlang
+from ted2zim.catalog import DEFAULT_MAX_AGE, HIT, PAGE, TalkCatalog
+from ted2zim.checkpoint import Checkpoint
 from ted2zim.constants import (
     ALL,
+    ASYNCIO,
     BASE_URL,
+    DEFAULT_ASYNC_CONCURRENCY,
+    DEFAULT_PIPELINE_SIZE,
+    DEFAULT_SEARCH_PAGE_SIZE,
     MATCHING,
     NONE,
     ROOT_DIR,
     SCRAPER,
     SEARCH_URL,
+    THREADS,
     get_logger,
 )
-from ted2zim.processing import post_process_video
+from ted2zim.discovery import DiscoveryEngine
+from ted2zim.hls import HlsDownloader
+from ted2zim.http_cache import http_cache
+from ted2zim.network import (
+    DEFAULT_POOL_SIZE,
+    HOST_CLASSES,
+    connection_stats,
+    parse_per_host_values,
+    rate_limiter,
+    retry_policy,
+    session_pool,
+)
+from ted2zim.next_data import (
+    NextDataNotFoundError,
+    extract_video_data,
+    extract_video_data_from_soup,
+)
+from ted2zim.previous_zim import PreviousZim, write_videos_info
+from ted2zim.processing import (
+    estimate_bytes_saved,
+    post_process_video,
+    select_rendition,
+)
+from ted2zim.segmented_download import DEFAULT_CONNECTIONS, SegmentedDownloader
+from ted2zim.stages import StageStats, WorkerStage
+from ted2zim.streaming import is_streamable, stream_reencode
 from ted2zim.utils import WebVTT, get_main_title, request_url, update_subtitles_list
+from ted2zim.videos import (
+    DOWNLOADED,
+    ENCODED,
+    SUBTITLES,
+    LocalizedText,
+    SpilledVideoRegistry,
+    Video,
+    VideoRegistry,
+)
 
 logger = get_logger()
 
+# number of videos whose subtitles offsets are fetched at once
+OFFSETS_BATCH_SIZE = 1000
+
 
 class Ted2Zim:
     def __init__(
@@ -80,6 +131,28 @@ class Ted2Zim:
         disable_metadata_checks,
         language_threshold,
         links,
+        discovery_threads=None,
+        http_pool_size=None,
+        rate_limit=None,
+        rate_burst=None,
+        retry_max_attempts=None,
+        retry_base_delay=None,
+        retry_max_delay=None,
+        retry_budget=None,
+        http_cache_dir=None,
+        http_cache_size=None,
+        http_cache_ttl=None,
+        search_page_size=DEFAULT_SEARCH_PAGE_SIZE,
+        resume=None,
+        update_from=None,
+        catalog=None,
+        catalog_max_age=DEFAULT_MAX_AGE,
+        low_memory=False,  # noqa: FBT002
+        pipeline_size=DEFAULT_PIPELINE_SIZE,
+        discovery_backend=THREADS,
+        transcode_threads=None,
+        video_connections=DEFAULT_CONNECTIONS,
+        stream_transcode=False,  # noqa: FBT002
     ):
         # video-encoding info
         self.video_format = video_format
@@ -117,9 +190,14 @@ class Ted2Zim:
 
         # directory setup
         self.output_dir = pathlib.Path(output_dir).expanduser().resolve()
-        if tmp_dir:
-            pathlib.Path(tmp_dir).mkdir(parents=True, exist_ok=True)
-        self.build_dir = pathlib.Path(tempfile.mkdtemp(dir=tmp_dir))
+        if resume:
+            # continue the work of a previous run in its build dir
+            self.build_dir = pathlib.Path(resume).expanduser().resolve()
+            self.build_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            if tmp_dir:
+                pathlib.Path(tmp_dir).mkdir(parents=True, exist_ok=True)
+            self.build_dir = pathlib.Path(tempfile.mkdtemp(dir=tmp_dir))
 
         # scraper options
         self.topics = [] if not topics else topics.split(",")
@@ -135,27 +213,136 @@ class Ted2Zim:
             )
         )
         self.threads = threads
+        self.discovery_threads = discovery_threads or threads
+        # ffmpeg processes run at once, downloads being done by self.threads workers
+        self.transcode_threads = transcode_threads or os.cpu_count() or 1
+        self.download_stats = None
+        self.transcoder = None
+        # videos from video_link are downloaded in segments over that many
+        # connections each
+        self.video_downloader = SegmentedDownloader(video_connections)
+        # and segments of HLS streams over that many connections
+        self.hls_downloader = HlsDownloader(
+            self.video_preset, video_format, low_quality, video_connections
+        )
+        # estimated bytes not downloaded thanks to the h264 rendition picked for
+        # videos not downloaded yet, by ID, and in total for downloaded ones
+        self.download_savings = {}
+        self.nb_bytes_saved = 0
+        # low quality videos which already met the preset
+        self.nb_reencodes_skipped = 0
+        # videos to re-encode are piped from their video link into ffmpeg, without
+        # writing the original to disk
+        self.stream_transcode = stream_transcode
+        self.nb_streamed = 0
+        self.search_page_size = search_page_size
         self.yt_downloader = None
 
+        # HTTP connection pools, large enough to keep a connection per thread alive
+        pool_size, host_pool_sizes = parse_per_host_values(http_pool_size or "", int)
+        session_pool.configure(
+            pool_size=pool_size
+            or max(
+                self.threads * video_connections,
+                self.discovery_threads,
+                DEFAULT_POOL_SIZE,
+            ),
+            host_pool_sizes=host_pool_sizes,
+        )
+        # requests rate, shared by all threads, per class of host
+        rate, rates = parse_per_host_values(rate_limit or "", float)
+        burst, bursts = parse_per_host_values(rate_burst or "", int)
+        rate_limiter.configure(rate=rate, burst=burst, rates=rates, bursts=bursts)
+        retry_policy.configure(
+            max_attempts=retry_max_attempts,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay,
+            budget=retry_budget,
+        )
+        if http_cache_dir:
+            ttl, ttls = parse_per_host_values(http_cache_ttl or "", float)
+            if ttl is not None:
+                ttls = {**dict.fromkeys(HOST_CLASSES, ttl), **ttls}
+            http_cache.configure(http_cache_dir, max_size=http_cache_size, ttls=ttls)
+        # talk pages data shared across runs, used when still fresh
+        self.catalog = TalkCatalog(catalog, catalog_max_age) if catalog else None
+
         # optimization cache
         self.s3_url_with_credentials = s3_url_with_credentials
         self.use_any_optimized_version = use_any_optimized_version
         self.s3_storage = None
         self.video_quality = "low" if self.low_quality else "high"
 
+        # ZIM created by a previous run, from which videos are reused
+        self.previous_zim = (
+            PreviousZim(
+                update_from,
+                self.video_format,
+                self.video_quality,
+                self.video_preset.VERSION,
+            )
+            if update_from
+            else None
+        )
+
         # debug/developer options
         self.no_zim = no_zim
         self.keep_build_dir = keep_build_dir
         self.debug = debug
 
         # class members
-        self.videos = []
+        if low_memory:
+            # videos are kept on disk, next to (and not in) the build dir
+            fd, videos_db = tempfile.mkstemp(
+                dir=self.build_dir.parent, prefix="videos-", suffix=".db"
+            )
+            os.close(fd)
+            self.videos = SpilledVideoRegistry(pathlib.Path(videos_db))
+        else:
+            self.videos = VideoRegistry()
         self.playlist_title = None
         self.playlist_description = None
         self.source_languages = (
             [] if not self.languages else tedlang.to_ted_langcodes(self.languages)
         )
         self.already_visited = set()
+        # slugs and IDs of talks extracted from search results, across all topics,
+        # and of the ones being fetched
+        self.seen_talks = set()
+        self.talks_in_flight = set()
+        self.nb_search_hits = 0
+        self.nb_duplicate_hits = 0
+        # talk page fetches skipped because the translation is known not to exist
+        self.nb_fetches_avoided = 0
+        # guards self.videos and self.already_visited which are accessed from
+        # discovery threads
+        self.lock = threading.RLock()
+        self.search_results = {}  # topic: SearchPaginator
+        # discovery results and videos progress, to resume an interrupted run
+        self.checkpoint = Checkpoint(self.ted_videos_json, self.ted_topics_json)
+        self.interrupted = False
+        # discovery ran into an error: downloads stop as soon as possible
+        self.discovery_failed = False
+        # videos left out of the ZIM because an interruption prevented completion
+        self.incomplete_videos = []
+        # IDs of discovered videos not yet handed off to downloads, and queue (see
+        # discover_and_download_videos) through which they are handed off
+        self.new_video_ids = []
+        self.pipeline_size = pipeline_size
+        self.pipeline = None
+        self.started_on = time.monotonic()
+        self.first_video_on = None
+        if discovery_backend == ASYNCIO:
+            from ted2zim.async_discovery import AsyncDiscoveryEngine
+
+            self.discovery = AsyncDiscoveryEngine(
+                self.extract_info_from_video_page_async,
+                discovery_threads or DEFAULT_ASYNC_CONCURRENCY,
+            )
+        else:
+            self.discovery = DiscoveryEngine(
+                self.extract_info_from_video_page, self.discovery_threads
+            )
 
         # set and record locale for translations
         locale_details = tedlang.get_language_details(locale_name)
@@ -188,6 +375,10 @@ class Ted2Zim:
     def ted_topics_json(self):
         return self.build_dir.joinpath("ted_topics.json")
 
+    @property
+    def video_preset(self):
+        return {"mp4": VideoMp4Low}.get(self.video_format, VideoWebmLow)()
+
     @property
     def talks_base_url(self):
         return BASE_URL + "talks/"
@@ -211,67 +402,41 @@ class Ted2Zim:
             "p", attrs={"class": "text-base"}
         ).string  # pyright: ignore
 
-        for element in video_elements:
-            relative_path = element.get("href")
-            url = urllib.parse.urljoin(self.talks_base_url, relative_path)
-            json_data = self.extract_info_from_video_page(url)
+        urls = [
+            urllib.parse.urljoin(self.talks_base_url, element.get("href"))
+            for element in video_elements
+        ]
 
-            if json_data is not None:
-                player_data = json_data["playerData"]
-                lang_code = json_data["language"]
-                if self.source_languages:
-                    # If the first video which was fetched is in source_languages,
-                    # save it.
-                    if lang_code in self.source_languages:
-                        self.update_videos_list_from_info(json_data)
-                    # Determine the next languages to fetch from source_languages
-                    other_languages = [
-                        code for code in self.source_languages if code != lang_code
-                    ]
-                else:
-                    # No languages were specified. Save the first video
+        def save_talk(url, json_data, variants_data):
+            lang_code = json_data["language"]
+            if self.source_languages:
+                # If the first video which was fetched is in source_languages,
+                # save it.
+                if lang_code in self.source_languages:
                     self.update_videos_list_from_info(json_data)
-                    # We use the the languages returned from the first
-                    # video to generate other language urls.
-                    other_languages = [
-                        language["languageCode"]
-                        for language in player_data["languages"]
-                        if language["languageCode"] != lang_code
-                    ]
+            else:
+                # No languages were specified. Save the first video
+                self.update_videos_list_from_info(json_data)
 
-                if not other_languages:
-                    # No need to generate urls for other languages as the list
-                    # is empty
-                    self.already_visited.add(urllib.parse.urlparse(url).path)
-                    continue
+            for data in variants_data:
+                if data is not None:
+                    self.update_videos_list_from_info(data)
 
-                other_lang_urls = self.generate_urls_for_other_languages(
-                    url, other_languages
-                )
+            self.mark_visited(url)
 
-                logger.debug(
-                    f"Searching info for the video in other {len(other_lang_urls)} "
-                    "other language(s)"
-                )
-                for lang_url in other_lang_urls:
-                    data = self.extract_info_from_video_page(lang_url)
-                    if data is not None:
-                        self.update_videos_list_from_info(data)
-
-                self.already_visited.add(urllib.parse.urlparse(url).path)
-            logger.debug(f"Seen {relative_path}")
+        self.extract_talks(urls, self.get_variant_urls, save_talk)
         logger.debug(f"Total videos found on playlist: {len(video_elements)}")
         if not video_elements:
             raise ValueError("Wrong playlist ID supplied. No videos found")
 
     def generate_search_results(self, topic):
-        """generates a search results and returns the total number of videos scraped"""
+        """generates a search results and returns the total number of videos scraped
+
+        Search pages are fetched concurrently (see prefetch_search_results) while
+        talks of the pages already received are being extracted"""
 
         total_videos_scraped = 0
-        page = 0
-        while True:
-            result = self.query_search_engine(topic, page)
-            result_json = result.json()
+        for result_json in self.prefetch_search_results(topic):
             (
                 nb_videos_extracted,
                 nb_videos_on_page,
@@ -279,22 +444,40 @@ class Ted2Zim:
             if nb_videos_on_page == 0:
                 break
             total_videos_scraped += nb_videos_extracted
-            page += 1
+            # talks are not seen again once extracted
+            self.hand_off_new_videos()
         return total_videos_scraped
 
+    def prefetch_search_results(self, topic):
+        """SearchPaginator of topic's search pages, started on first call"""
+
+        with self.lock:
+            if topic not in self.search_results:
+                self.search_results[topic] = self.discovery.paginate(
+                    lambda page: self.query_search_engine(topic, page)
+                )
+            return self.search_results[topic]
+
     def query_search_engine(self, topic, page):
         logger.debug(f"Fetching page {page} of topic {topic}")
+        facet_filters = [[f"tags:{topic}"]]
+        if self.source_languages:
+            # only search talks translated or subtitled in one of the requested
+            # languages ; results are still filtered once fetched
+            facet_filters.append(
+                [f"subtitle_languages:{code}" for code in self.source_languages]
+            )
         data = [
             {
                 "indexName": "relevance",
                 "params": {
                     "attributeForDistinct": "objectID",
                     "distinct": 1,
-                    "facetFilters": [[f"tags:{topic}"]],
+                    "facetFilters": facet_filters,
                     "facets": ["subtitle_languages", "tags"],
                     "highlightPostTag": "__/ais-highlight__",
                     "highlightPreTag": "__ais-highlight__",
-                    "hitsPerPage": 24,
+                    "hitsPerPage": self.search_page_size,
                     "maxValuesPerFacet": 500,
                     "page": page,
                     "query": "",
@@ -302,7 +485,12 @@ class Ted2Zim:
                 },
             },
         ]
-        return request_url(SEARCH_URL, data)
+        response = request_url(SEARCH_URL, data)
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            http_cache.discard(SEARCH_URL, data)
+            raise
 
     def extract_videos_from_topics(self, topic):
         """extracts metadata for required number of videos on different topics"""
@@ -351,25 +539,16 @@ class Ted2Zim:
     def compute_zim_languages(self):
         """Compute the ZIM language metadata based on expected videos"""
 
-        # count the number of videos per audio language
-        audio_lang_counts = {
-            lang: len(list(group))
-            for lang, group in groupby(
-                sorted(video["native_talk_language"] for video in self.videos)
-            )
-        }
-
-        # count the number of videos per subtitle language
-        subtitle_lang_counts = {
-            lang: len(list(group))
-            for lang, group in groupby(
-                sorted(
-                    subtitle["languageCode"]
-                    for video in self.videos
-                    for subtitle in video["subtitles"]
-                )
+        # count the number of videos per audio and per subtitle language
+        audio_lang_counts = Counter()
+        subtitle_lang_counts = Counter()
+        for video in self.videos:
+            audio_lang_counts[video.native_talk_language] += 1
+            subtitle_lang_counts.update(
+                subtitle["languageCode"] for subtitle in video.subtitles
             )
-        }
+        audio_lang_counts = dict(sorted(audio_lang_counts.items()))
+        subtitle_lang_counts = dict(sorted(subtitle_lang_counts.items()))
 
         # Attribute 10 "points" score to language in video audio and 1 "point" score
         # to language in video subtitle if language is present in at least
@@ -492,11 +671,35 @@ class Ted2Zim:
         nb_extracted = 0
         nb_listed = len(hits)
         logger.debug(f"{nb_listed} video(s) found on current page")
-        for hit in hits:
-            url = urllib.parse.urljoin(self.talks_base_url, hit["slug"])
-            json_data = self.extract_info_from_video_page(url)
 
+        # talks already found (in another topic) are not fetched again
+        hits = [hit for hit in hits if not self.is_duplicate_hit(hit)]
+
+        # talks not available in any of the requested languages are not fetched
+        if self.source_languages:
+            available_hits = []
+            for hit in hits:
+                if self.is_hit_in_source_languages(hit):
+                    available_hits.append(hit)
+                else:
+                    # they would be skipped in other topics as well
+                    self.end_hit(hit, seen=True)
+            hits = available_hits
+
+        urls = [urllib.parse.urljoin(self.talks_base_url, hit["slug"]) for hit in hits]
+        if self.catalog:
+            # languages listed in hits tell whether talks in catalog have changed
+            for hit, url in zip(hits, urls, strict=True):
+                if isinstance(hit.get("subtitle_languages"), list):
+                    self.catalog.check_freshness(url, hit["subtitle_languages"], HIT)
+        pages = list(zip(urls, self.discovery.fetch_all(urls), strict=True))
+        variants = self.fetch_language_variants(pages)
+
+        for hit, (url, json_data), variants_data in zip(
+            hits, pages, variants, strict=True
+        ):
             if json_data is None:
+                self.end_hit(hit, seen=False)
                 continue
 
             lang_code = json_data["language"]
@@ -512,31 +715,16 @@ class Ted2Zim:
                 ):
                     nb_extracted += 1
 
-                # Determine the next languages to fetch from source_languages
-                other_languages = [
-                    code for code in self.source_languages if code != lang_code
-                ]
-
-                # If there are any valid language codes which can be fetched, fetch them
-                # and save accordingly
-                if other_languages:
-                    other_lang_urls = self.generate_urls_for_other_languages(
-                        url, other_languages
-                    )
-                    logger.debug(
-                        f"Searching info for the video in {len(other_lang_urls)} "
-                        "other language(s)"
-                    )
-                    for lang_url in other_lang_urls:
-                        data = self.extract_info_from_video_page(lang_url)
-                        if data is not None and self.update_videos_list_from_info(data):
-                            # It is possible that this is the first time we
-                            # are saving this video as the first video might
-                            # not necessarily be in the source_languages.
-                            # We increment the counter relying on the fact that
-                            # update_videos_list returns True only if this
-                            # is the first time we are saving the video.
-                            nb_extracted += 1
+                # Save the other requested languages which could be fetched
+                for data in variants_data:
+                    if data is not None and self.update_videos_list_from_info(data):
+                        # It is possible that this is the first time we
+                        # are saving this video as the first video might
+                        # not necessarily be in the source_languages.
+                        # We increment the counter relying on the fact that
+                        # update_videos_list returns True only if this
+                        # is the first time we are saving the video.
+                        nb_extracted += 1
 
                 if lang_code not in self.source_languages:
                     # Video language fetched is not among the selected ones, we have to
@@ -562,32 +750,162 @@ class Ted2Zim:
                 if self.update_videos_list_from_info(json_data):
                     nb_extracted += 1
 
-                # We use the the languages returned from the json_data of
-                # this video to generate other language urls
-                other_languages = []
-                for language in player_data["languages"]:
-                    #  Do not include the language of the video that was just scraped
-                    if language["languageCode"] == lang_code:
-                        continue
-                    other_languages.append(language["languageCode"])
-
-                if other_languages:
-                    other_lang_urls = self.generate_urls_for_other_languages(
-                        url, other_languages
-                    )
-                    logger.debug(
-                        f"Searching info for the video in {len(other_lang_urls)} "
-                        "other language(s)"
-                    )
-                    for lang_url in other_lang_urls:
-                        data = self.extract_info_from_video_page(lang_url)
-                        if data is not None:
-                            self.update_videos_list_from_info(data)
+                # Then update it with the other languages of this video
+                for data in variants_data:
+                    if data is not None:
+                        self.update_videos_list_from_info(data)
 
             logger.debug(f"Seen {hit['slug']}")
-            self.already_visited.add(urllib.parse.urlparse(url).path)
+            self.mark_visited(url)
+            self.end_hit(hit, seen=True)
         return nb_extracted, nb_listed
 
+    @staticmethod
+    def get_hit_keys(hit):
+        return {hit["slug"], hit.get("objectID")} - {None}
+
+    def is_duplicate_hit(self, hit):
+        """whether a search hit is a talk already seen or being fetched, recording
+        it as being fetched otherwise (until end_hit)"""
+
+        keys = self.get_hit_keys(hit)
+        with self.lock:
+            self.nb_search_hits += 1
+            if keys & self.seen_talks or keys & self.talks_in_flight:
+                self.nb_duplicate_hits += 1
+                logger.debug(f"Skipping {hit['slug']}, already found")
+                return True
+            self.talks_in_flight |= keys
+            return False
+
+    def end_hit(self, hit, *, seen):
+        """record that a search hit is no longer being fetched
+
+        seen once extracted ; a hit which could not be fetched is not, so that the
+        talk is fetched again if found in another topic"""
+
+        keys = self.get_hit_keys(hit)
+        with self.lock:
+            self.talks_in_flight -= keys
+            if seen:
+                self.seen_talks |= keys
+
+    def is_hit_in_source_languages(self, hit):
+        """whether a search hit may be available in one of source_languages
+
+        Relies on the hit's subtitle_languages ; True if it is not present"""
+
+        hit_languages = hit.get("subtitle_languages")
+        if not isinstance(hit_languages, list) or not hit_languages:
+            return True
+        if any(code in hit_languages for code in self.source_languages):
+            return True
+        logger.debug(f"Skipping {hit['slug']}, not available in requested languages")
+        # the talk page and all its requested translations
+        self.record_avoided_fetches(1 + len(self.source_languages))
+        return False
+
+    def filter_available_languages(self, json_data, languages):
+        """languages the talk of a fetched talk page is available in
+
+        Availability is read from playerData languages ; all languages are kept if
+        it is not known"""
+
+        available = [
+            language["languageCode"]
+            for language in json_data["playerData"].get("languages") or []
+        ]
+        if not available:
+            return list(languages)
+        filtered = [code for code in languages if code in available]
+        self.record_avoided_fetches(len(languages) - len(filtered))
+        return filtered
+
+    def record_avoided_fetches(self, count):
+        if count:
+            with self.lock:
+                self.nb_fetches_avoided += count
+
+    def get_other_languages(self, json_data):
+        """language codes of the other versions of a fetched talk page to fetch"""
+
+        lang_code = json_data["language"]
+        if self.source_languages:
+            # Determine the next languages to fetch from source_languages, among the
+            # ones this video has been translated into
+            return self.filter_available_languages(
+                json_data,
+                [code for code in self.source_languages if code != lang_code],
+            )
+
+        # We use the the languages returned from the json_data of this video to
+        # generate other language urls, excluding the one that was just scraped
+        return [
+            language["languageCode"]
+            for language in json_data["playerData"]["languages"]
+            if language["languageCode"] != lang_code
+        ]
+
+    def fetch_language_variants(self, pages):
+        """fetch other language versions of already fetched talk pages in parallel
+
+        pages is a list of (url, json_data) tuples. Returns a list with, for each page,
+        the list of json_data (or None) of its other language versions"""
+
+        plans = [
+            self.get_variant_urls(url, json_data) if json_data is not None else []
+            for url, json_data in pages
+        ]
+        results = iter(self.discovery.fetch_all(url for plan in plans for url in plan))
+        return [[next(results) for _ in plan] for plan in plans]
+
+    def get_variant_urls(self, url, json_data):
+        """URLs of the other language versions to fetch of a fetched talk page"""
+
+        other_languages = self.get_other_languages(json_data)
+        if not other_languages:
+            return []
+        logger.debug(
+            f"Searching info for the video in {len(other_languages)} other language(s)"
+        )
+        return self.generate_urls_for_other_languages(url, other_languages)
+
+    def extract_talks(self, urls, get_variant_urls, save_talk):
+        """extract talks of urls, handing each off to downloads as soon as its other
+        language versions are in
+
+        All talk pages are requested at once. As soon as a talk page is in, the
+        URLs of its other language versions, get_variant_urls(url, json_data), are
+        requested as well. Talks are then saved, save_talk(url, json_data,
+        variants_data), and handed off in urls order."""
+
+        pending = collections.deque()  # (url, json_data, futures of other versions)
+        for url, future in zip(urls, self.discovery.submit_all(urls), strict=True):
+            json_data = future.result()
+            if json_data is not None:
+                variant_urls = get_variant_urls(url, json_data)
+                pending.append(
+                    (url, json_data, self.discovery.submit_all(variant_urls))
+                )
+            # talks which are complete already are handed off without waiting
+            while pending and all(variant.done() for variant in pending[0][2]):
+                self.complete_talk(save_talk, *pending.popleft())
+        while pending:
+            self.complete_talk(save_talk, *pending.popleft())
+
+    def complete_talk(self, save_talk, url, json_data, futures):
+        save_talk(url, json_data, [future.result() for future in futures])
+        logger.debug(f"Seen {url}")
+        self.hand_off_new_videos([json_data["id"]])
+
+    def is_visited(self, url):
+        with self.lock:
+            return urllib.parse.urlparse(url).path in self.already_visited
+
+    def mark_visited(self, url):
+        with self.lock:
+            self.already_visited.add(urllib.parse.urlparse(url).path)
+
     def get_lang_code_from_url(self, url, *, with_full_query=False):
         """gets the queried language code from a ted talk url"""
 
@@ -603,16 +921,18 @@ class Ted2Zim:
 
     def extract_download_link(self, talk_data):
         """Returns download link / youtube video ID for a TED video"""
-        if (
-            isinstance(talk_data.get("resources", {}).get("h264"), list)
-            and len(talk_data["resources"]["h264"])
-            and talk_data["resources"]["h264"][0].get("file")
-        ):
+        renditions = talk_data.get("resources", {}).get("h264")
+        if not isinstance(renditions, list):
+            renditions = []
+        rendition = select_rendition(
+            renditions, self.video_preset, self.video_format, self.low_quality
+        )
+        if rendition:
             logger.debug(
-                "Using h264 resource link for bitrate="
-                f"{talk_data['resources']['h264'][0].get('bitrate')}"
+                f"Using h264 resource link for bitrate={rendition.get('bitrate')} "
+                f"out of {[item.get('bitrate') for item in renditions]}"
             )
-            download_link = talk_data["resources"]["h264"][0]["file"]
+            download_link = rendition["file"]
         else:
             download_link = None
 
@@ -647,26 +967,15 @@ class Ted2Zim:
         subtitles,
         metadata_link,
         native_talk_language,
+        hls_link=None,
     ):
         # append to self.videos and return if not present
-        if not [video for video in self.videos if video.get("id", None) == video_id]:
-
-            # Fetch metadata and compute subtitles offset (sum up all domains durations
-            # up till the primary domain) - we do it only once per video since this
-            # information is same for all languages
-            subtitles_offset = 0
-            if metadata_link:
-                metadatas = request_url(metadata_link).json()
-                if "domains" in metadatas:
-                    for domain in metadatas["domains"]:
-                        if domain["primaryDomain"]:
-                            break
-                        subtitles_offset += int(domain["duration"] * 1000)
-
-            self.videos.append(
-                {
-                    "id": video_id,
-                    "languages": [
+        video = self.videos.get(video_id)
+        if video is None:
+            self.videos.add(
+                Video(
+                    id=video_id,
+                    languages=[
                         {
                             "languageCode": lang_code,
                             "languageName": tedlang.get_display_name(
@@ -674,50 +983,44 @@ class Ted2Zim:
                             ),
                         }
                     ],
-                    "title": [{"lang": lang_code, "text": title}],
-                    "description": [{"lang": lang_code, "text": description}],
-                    "speaker": speaker,
-                    "speaker_profession": speaker_profession,
-                    "speaker_bio": speaker_bio,
-                    "speaker_picture": speaker_picture,
-                    "date": date,
-                    "thumbnail": thumbnail,
-                    "video_link": video_link,
-                    "youtube_id": youtube_id,
-                    "length": length,
-                    "subtitles": subtitles,
-                    "subtitles_offset": subtitles_offset,
-                    "native_talk_language": native_talk_language,
-                }
+                    title=LocalizedText({lang_code: title}),
+                    description=LocalizedText({lang_code: description}),
+                    speaker=speaker,
+                    speaker_profession=speaker_profession,
+                    speaker_bio=speaker_bio,
+                    speaker_picture=speaker_picture,
+                    date=date,
+                    thumbnail=thumbnail,
+                    video_link=video_link,
+                    youtube_id=youtube_id,
+                    length=length,
+                    subtitles=subtitles,
+                    metadata_link=metadata_link,
+                    native_talk_language=native_talk_language,
+                    hls_link=hls_link,
+                )
             )
+            self.new_video_ids.append(video_id)
             logger.debug(f"Successfully inserted video {video_id} into video list")
             return True
 
         # update localized meta for video if already in self.videos
         # based on --subtitles=matching
         logger.debug(f"Video {video_id} already present in video list")
-        for index, video in enumerate(self.videos):
-            if video.get("failed", False):
-                continue
-            if video.get("id", None) == video_id:
-                if {"lang": lang_code, "text": title} not in video["title"]:
-                    self.videos[index]["title"].append(
-                        {"lang": lang_code, "text": title}
-                    )
-                    self.videos[index]["description"].append(
-                        {"lang": lang_code, "text": description}
-                    )
-                    self.videos[index]["languages"].append(
-                        {
-                            "languageCode": lang_code,
-                            "languageName": tedlang.get_display_name(
-                                lang_code, lang_name
-                            ),
-                        }
-                    )
+        if video.failed:
+            return False
+        if video.title.add(lang_code, title):
+            video.description.add(lang_code, description)
+            video.languages.append(
+                {
+                    "languageCode": lang_code,
+                    "languageName": tedlang.get_display_name(lang_code, lang_name),
+                }
+            )
 
-                if self.subtitles_setting in (MATCHING, NONE) and len(subtitles) == 1:
-                    self.videos[index]["subtitles"] += subtitles
+        if self.subtitles_setting in (MATCHING, NONE) and len(subtitles) == 1:
+            video.subtitles += subtitles
+        self.videos.save(video)
         return False
 
     def get_lang_code_and_name(self, json_data):
@@ -785,36 +1088,65 @@ class Ted2Zim:
         length = int(json_data["duration"]) // 60
         thumbnail = player_data["thumb"]
         video_link, youtube_id = self.extract_download_link(player_data)
-        if not video_link and not youtube_id:
+        hls_link = player_data.get("resources", {}).get("hls", {}).get("stream")
+        if not video_link and not hls_link and not youtube_id:
             logger.error(
-                "No suitable download link or Youtube ID found. Skipping video"
+                "No suitable download link, HLS stream or Youtube ID found. Skipping "
+                "video"
             )
             return False
 
+        if video_link:
+            bytes_saved = estimate_bytes_saved(
+                player_data["resources"]["h264"],
+                next(
+                    rendition
+                    for rendition in player_data["resources"]["h264"]
+                    if rendition.get("file") == video_link
+                ),
+                int(json_data["duration"]),
+            )
+            if bytes_saved:
+                self.download_savings[video_id] = bytes_saved
+
         langs = player_data["languages"]
         metadata_link = player_data["resources"]["hls"]["metadata"]
         subtitles = self.generate_subtitle_list(
             video_id, langs, lang_code, native_talk_language
         )
-        return self.update_videos_list(
-            video_id=video_id,
-            lang_code=lang_code,
-            lang_name=lang_name,
-            title=title,
-            description=description,
-            speaker=speaker,
-            speaker_profession=speaker_profession,
-            speaker_bio=speaker_bio,
-            speaker_picture=speaker_picture,
-            date=date,
-            thumbnail=thumbnail,
-            video_link=video_link,
-            youtube_id=youtube_id,
-            length=length,
-            subtitles=subtitles,
-            metadata_link=metadata_link,
-            native_talk_language=native_talk_language,
-        )
+        with self.lock:
+            return self.update_videos_list(
+                video_id=video_id,
+                lang_code=lang_code,
+                lang_name=lang_name,
+                title=title,
+                description=description,
+                speaker=speaker,
+                speaker_profession=speaker_profession,
+                speaker_bio=speaker_bio,
+                speaker_picture=speaker_picture,
+                date=date,
+                thumbnail=thumbnail,
+                video_link=video_link,
+                youtube_id=youtube_id,
+                length=length,
+                subtitles=subtitles,
+                metadata_link=metadata_link,
+                native_talk_language=native_talk_language,
+                hls_link=hls_link,
+            )
+
+    def get_known_video_page(self, url):
+        """(True, talk data or None) if url needs not be fetched, (False, None) if so"""
+
+        # don't scrape if URL already visited
+        if self.is_visited(url):
+            return True, None
+
+        # use data from catalog if talk has not changed
+        if self.catalog:
+            return self.catalog.get_page(url)
+        return False, None
 
     def extract_info_from_video_page(
         self, url: str, retry_count: int = 0
@@ -829,9 +1161,9 @@ class Ted2Zim:
         # signature and load the json to extract meta-data out of it.
         # returns True if successfully scraped new video
 
-        # don't scrape if URL already visited
-        if urllib.parse.urlparse(url).path in self.already_visited:
-            return None
+        found, json_data = self.get_known_video_page(url)
+        if found:
+            return json_data
 
         # don't scrape if maximum retry count is reached
         if retry_count > 5:  # noqa: PLR2004
@@ -839,44 +1171,72 @@ class Ted2Zim:
             return None
 
         logger.debug(f"extract_info_from_video_page: {url}")
-        html_content = request_url(url).text
+        response = request_url(url)
         try:
-            soup = BeautifulSoup(html_content, features="html.parser")
+            return self.parse_video_page(url, response)
+        # TED is sometimes inconsistant in sending HTML content, it sometimes sends
+        # the HTML without the required script containing the talks data, so we
+        # retry after 5 seconds
+        except NextDataNotFoundError as exc:
+            logger.debug(
+                f"Insufficient data returned by server, {exc}. Retrying in 5 "
+                "seconds..."
+            )
+            time.sleep(5)
+            return self.extract_info_from_video_page(url, retry_count=retry_count + 1)
 
-            next_data_tag = soup.find("script", attrs={"id": "__NEXT_DATA__"})
+    async def extract_info_from_video_page_async(self, url, get):
+        """extract_info_from_video_page for the asyncio discovery backend
 
-            # TED is sometimes inconsistant in sending HTML content, it sometimes sends
-            # the HTML without the required script containing the talks data, so we
-            # retry after 5 seconds
-            if (
-                not next_data_tag
-                or not isinstance(next_data_tag, Tag)
-                or not isinstance(next_data_tag.string, str)
-            ):
-                logger.debug(
-                    "Insufficient data returned by server, __NEXT_DATA__ script not "
-                    "found in HTML page. Retrying in 5 seconds..."
-                )
-                time.sleep(5)
-                return self.extract_info_from_video_page(
-                    url, retry_count=retry_count + 1
-                )
+        get is the coroutine function requesting an URL. Pages are parsed in the
+        default executor, not to block the event loop"""
+
+        loop = asyncio.get_running_loop()
+        retry_count = 0
+        while True:
+            found, json_data = self.get_known_video_page(url)
+            if found:
+                return json_data
 
-            # Sometimes, the video data is not included in the json data, so we retry
-            # the request.
+            if retry_count > 5:  # noqa: PLR2004
+                logger.error("Max retries exceeded. Skipping video")
+                return None
+
+            logger.debug(f"extract_info_from_video_page_async: {url}")
+            response = await get(url)
             try:
-                json_data = json.loads(next_data_tag.string)["props"]["pageProps"][
-                    "videoData"
-                ]
-            except KeyError:
-                logger.debug(
-                    "Insufficient data returned by server, videoData not "
-                    "found in JSON string. Retrying in 5 seconds..."
+                return await loop.run_in_executor(
+                    None, self.parse_video_page, url, response
                 )
-                time.sleep(5)
-                return self.extract_info_from_video_page(
-                    url, retry_count=retry_count + 1
+            except NextDataNotFoundError as exc:
+                logger.debug(
+                    f"Insufficient data returned by server, {exc}. Retrying in 5 "
+                    "seconds..."
                 )
+                await asyncio.sleep(5)
+                retry_count += 1
+
+    def parse_video_page(self, url, response):
+        """talk data of a fetched talk page, None if not in the requested language
+
+        Raises NextDataNotFoundError if the page lacks the talk data"""
+
+        try:
+            try:
+                # locate and decode the videoData JSON straight from the page bytes,
+                # falling back to a full HTML parse if the script can't be found so
+                json_data = extract_video_data(response.content)
+                if json_data is None:
+                    json_data = extract_video_data_from_soup(response.text)
+            except NextDataNotFoundError as exc:
+                raise NextDataNotFoundError(
+                    "__NEXT_DATA__ script not found in HTML page"
+                ) from exc
+            # Sometimes, the video data is not included in the json data
+            except KeyError as exc:
+                raise NextDataNotFoundError(
+                    "videoData not found in JSON string"
+                ) from exc
 
             requested_lang_code = self.get_lang_code_from_url(url)
             if requested_lang_code and json_data["language"] != requested_lang_code:
@@ -884,45 +1244,99 @@ class Ted2Zim:
                     f"Video at {url} has not yet been translated into "
                     f"{requested_lang_code}"
                 )
+                if self.catalog:
+                    self.catalog.save_page(url, None)
                 return None
             # Desrialize the data at json_data["playerData"] into a dict
             # and overwrite it accordingly
             json_data["playerData"] = json.loads(json_data["playerData"])
+            if self.catalog:
+                self.catalog.check_freshness(
+                    url,
+                    [
+                        language["languageCode"]
+                        for language in json_data["playerData"]["languages"]
+                    ],
+                    PAGE,
+                )
+                self.catalog.save_page(url, json_data)
             return json_data
+        except NextDataNotFoundError:
+            # not to get the same incomplete page when retrying
+            http_cache.discard(url)
+            raise
         except Exception as exc:
             logger.error(
                 f"Problem occured while parsing {url}, error: {exc!s}. "
-                f"HTML content was:\n{html_content}"
+                f"HTML content was:\n{response.text}"
             )
             raise
 
-    def add_default_language(self):
-        """add metatada in default language (english or first avail) on all videos"""
+    def add_default_language(self, video):
+        """add metatada in default language (english or first avail) on video"""
 
-        for video in self.videos:
-            if video.get("failed", False):
+        # english if available, first language otherwise
+        default_lang = "en" if "en" in video.title else None
+        for field in (video.title, video.description):
+            field.set_default(
+                field.get(default_lang) if default_lang else field.default
+            )
+
+        # update video slug
+        video.slug = slugify(video.title.default, separator="-")
+
+    def hand_off_new_videos(self, video_ids=None):
+        """complete videos inserted since last call and queue them for downloads
+
+        Called once all languages of these videos (only video_ids among them if
+        given) have been extracted. Waits while the pipeline is full, unless
+        interrupted (videos are then not queued)"""
+
+        with self.lock:
+            if video_ids is None:
+                video_ids, self.new_video_ids = self.new_video_ids, []
+            else:
+                video_ids = [
+                    video_id for video_id in self.new_video_ids if video_id in video_ids
+                ]
+                self.new_video_ids = [
+                    video_id
+                    for video_id in self.new_video_ids
+                    if video_id not in video_ids
+                ]
+        for video_id in video_ids:
+            video = self.videos.get(video_id)
+            if video is None or video.failed:
+                continue
+            self.add_default_language(video)
+            self.videos.save(video)
+            self.put_in_pipeline(video_id)
+
+    def put_in_pipeline(self, item):
+        """queue item for downloads if they are running and were not interrupted"""
+
+        while (
+            self.pipeline is not None
+            and not self.interrupted
+            and not self.discovery_failed
+        ):
+            try:
+                self.pipeline.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def iter_pipeline(self):
+        """videos handed off by discovery, until it ends or fails"""
+
+        while not self.discovery_failed:
+            try:
+                video_id = self.pipeline.get(timeout=1)  # pyright: ignore
+            except queue.Empty:
                 continue
-            en_found = False
-            for index, lang in enumerate(video["languages"]):
-                if lang["languageCode"] == "en":
-                    en_found = True
-                    video["title"] = [
-                        {"lang": "default", "text": video["title"][index]["text"]}
-                    ] + video["title"]
-                    video["description"] = [
-                        {"lang": "default", "text": video["description"][index]["text"]}
-                    ] + video["description"]
-
-            if not en_found:
-                video["title"] = [
-                    {"lang": "default", "text": video["title"][0]["text"]}
-                ] + video["title"]
-                video["description"] = [
-                    {"lang": "default", "text": video["description"][0]["text"]}
-                ] + video["description"]
-
-            # update video slug
-            video["slug"] = slugify(video["title"][0]["text"], separator="-")
+            if video_id is None:
+                return
+            yield self.videos.get(video_id)
 
     def render_video_pages(self):
         # Render static html pages from the scraped video data and
@@ -931,26 +1345,25 @@ class Ted2Zim:
             loader=jinja2.FileSystemLoader(str(self.templates_dir)), autoescape=True
         )
         for video in self.videos:
-            if video.get("failed", False):
+            if video.failed:
                 continue
-            titles = video["title"]
             html = env.get_template("article.html").render(
-                speaker=video["speaker"],
-                languages=video["subtitles"],
-                speaker_bio=video["speaker_bio"].replace("Full bio", ""),
-                speaker_img=video["speaker_picture"],
-                date=video["date"],
-                profession=video["speaker_profession"],
+                speaker=video.speaker,
+                languages=video.subtitles,
+                speaker_bio=video.speaker_bio.replace("Full bio", ""),
+                speaker_img=video.speaker_picture,
+                date=video.date,
+                profession=video.speaker_profession,
                 video_format=self.video_format,
                 autoplay=self.autoplay,
-                video_id=str(video["id"]),
-                title=get_main_title(titles, self.locale_ted_codes),
-                titles=titles,
-                descriptions=video["description"],
+                video_id=str(video.id),
+                title=get_main_title(video.title, self.locale_ted_codes),
+                titles=video.title.to_list(),
+                descriptions=video.description.to_list(),
                 back_to_list=_("Back to the list"),
-                native_talk_language=video["native_talk_language"],
+                native_talk_language=video.native_talk_language,
             )
-            html_path = self.build_dir.joinpath(video["slug"])
+            html_path = self.build_dir.joinpath(video.slug)
             with open(html_path, "w", encoding="utf-8") as html_page:
                 html_page.write(html)  # pyright: ignore[reportGeneralTypeIssues]
 
@@ -962,8 +1375,8 @@ class Ted2Zim:
         all_langs = {
             language["languageCode"]: language["languageName"]
             for video in self.videos
-            if not video.get("failed", False)
-            for language in video["subtitles"] + video["languages"]
+            if not video.failed
+            for language in video.subtitles + video.languages
         }
         languages = [
             {"languageName": value, "languageCode": key}
@@ -1004,31 +1417,37 @@ class Ted2Zim:
         assets_path = self.build_dir / "assets"
         assets_path.mkdir(parents=True, exist_ok=True)
 
-        per_language = {}
-        for video in self.videos:
-            if video.get("failed", False):
-                continue
-
-            languages = self._get_video_languages(video)
-
-            for lang in languages:
-                per_language.setdefault(lang, []).append(
-                    {
-                        "id": video["id"],
-                        "slug": video["slug"],
-                        "title": self._pick_lang(video["title"], lang),
-                        "speaker": video["speaker"],
-                    }
-                )
+        # files are written as videos come, one per language
+        with ExitStack() as stack:
+            files = {}
+            for video in self.videos:
+                if video.failed:
+                    continue
 
-        for lang, videos in per_language.items():
-            filename = f"data_{lang}.js"
+                languages = self._get_video_languages(video)
 
-            with open(assets_path / filename, "w", encoding="utf-8") as f:
-                f.write(
-                    "window.json_data = "
-                    + json.dumps(videos, ensure_ascii=False, separators=(",", ":"))
-                )
+                for lang in languages:
+                    if lang in files:
+                        files[lang].write(",")
+                    else:
+                        files[lang] = stack.enter_context(
+                            open(assets_path / f"data_{lang}.js", "w", encoding="utf-8")
+                        )
+                        files[lang].write("window.json_data = [")
+                    files[lang].write(
+                        json.dumps(
+                            {
+                                "id": video.id,
+                                "slug": video.slug,
+                                "title": video.title.get(lang),
+                                "speaker": video.speaker,
+                            },
+                            ensure_ascii=False,
+                            separators=(",", ":"),
+                        )
+                    )
+            for file in files.values():
+                file.write("]")
 
     def generate_video_details_file(self):
         """Generate data_{lang}_{slug}.js inside assets"""
@@ -1037,22 +1456,22 @@ class Ted2Zim:
         assets_path.mkdir(parents=True, exist_ok=True)
 
         for video in self.videos:
-            if video.get("failed", False):
+            if video.failed:
                 continue
 
             languages = self._get_video_languages(video)
 
             for lang in languages:
-                filename = f"data_{lang}_{video['slug']}.js"
+                filename = f"data_{lang}_{video.slug}.js"
 
                 detailed_data = {
-                    "id": video["id"],
-                    "slug": video["slug"],
-                    "title": video["title"],
-                    "description": video["description"],
-                    "speaker": video["speaker"],
+                    "id": video.id,
+                    "slug": video.slug,
+                    "title": video.title.to_list(),
+                    "description": video.description.to_list(),
+                    "speaker": video.speaker,
                     "languages": list(languages),
-                    "subtitles": video.get("subtitles", []),
+                    "subtitles": video.subtitles,
                 }
 
                 with open(assets_path / filename, "w", encoding="utf-8") as f:
@@ -1066,17 +1485,9 @@ class Ted2Zim:
     def _get_video_languages(self, video):
         """Helper Function to collect languages per video"""
         return {
-            lang["languageCode"]
-            for lang in video.get("languages", [])
-            if "languageCode" in lang
+            lang["languageCode"] for lang in video.languages if "languageCode" in lang
         }
 
-    def _pick_lang(self, items, lang):
-        for item in items:
-            if item["lang"] == lang:
-                return item["text"]
-        return None
-
     def download_jpeg_image_and_convert(self, url, fpath, preset_options, resize=None):
         """downloads a JPEG image and convert to proper format
 
@@ -1162,7 +1573,10 @@ class Ted2Zim:
                     self.upload_to_cache(s3_key, thumbnail_path, preset.VERSION)
 
     def download_video_files(self, video):
-        """download all video files (video, thumbnail, speaker)"""
+        """download all video files (video, thumbnail, speaker)
+
+        Videos which still need transcoding (see transcode_video_files) are left
+        DOWNLOADED"""
 
         # Download all the TED talk videos and the meta-data for it.
         # Save the videos in build_dir/{video id}/video.mp4.
@@ -1172,16 +1586,16 @@ class Ted2Zim:
         if not self.yt_downloader:
             raise Exception("yt_downloader is not setup")
 
+        if ENCODED in video.done:
+            return
+
         # set up variables
-        video_id = str(video["id"])
+        video_id = str(video.id)
         # Take the english version of title or else whatever language it's available in
-        video_title = video["title"][0]["text"]
-        video_link = video["video_link"]
-        youtube_id = video["youtube_id"]
-        video_speaker = video["speaker_picture"]
-        video_thumbnail = video["thumbnail"]
+        video_title = video.title.default
+        video_speaker = video.speaker_picture
+        video_thumbnail = video.thumbnail
         video_dir = self.videos_dir.joinpath(video_id)
-        org_video_file_path = video_dir.joinpath("video.mp4")
         req_video_file_path = video_dir.joinpath(f"video.{self.video_format}")
         speaker_path = video_dir.joinpath("speaker.webp")
         thumbnail_path = video_dir.joinpath("thumbnail.webp")
@@ -1191,108 +1605,268 @@ class Ted2Zim:
             video_dir.mkdir(parents=True)
 
         # set preset
-        preset = {"mp4": VideoMp4Low}.get(self.video_format, VideoWebmLow)()
+        preset = self.video_preset
+
+        # reuse video and images of the previous ZIM if they are the same
+        if self.previous_zim and self.previous_zim.copy_video(video, video_dir):
+            logger.debug(f"Reused {video_title} from previous ZIM")
+            self.mark_done(video, ENCODED)
+            return
 
-        # download video
+        # download video, unless done by a previous run
+        already_downloaded = DOWNLOADED in video.done
         downloaded_from_cache = False
-        logger.debug(f"Downloading {video_title}")
+        if already_downloaded:
+            logger.debug(f"{video_title} already downloaded")
+        else:
+            logger.debug(f"Downloading {video_title}")
         s3_key = (
             f"{self.video_format}/{self.video_quality}/{video_id}"
             if self.s3_storage
             else None
         )
-        if self.s3_storage:
+        if self.s3_storage and not already_downloaded:
             downloaded_from_cache = self.download_from_cache(
                 s3_key, req_video_file_path, preset.VERSION
             )
-        if not downloaded_from_cache:
-            downloaded = False
-            # First try to download from video link
-            if video_link:
-                try:
-                    save_large_file(video_link, org_video_file_path)
-                    downloaded = True
-                except Exception as exc:
-                    logger.error(
-                        f"Could not download from {video_link} for "
-                        f"{org_video_file_path}",
-                    )
-                    logger.debug("", exc_info=exc)
-                    org_video_file_path.unlink(missing_ok=True)
-            # Second try to download from youtube ID (used both when no video link AND
-            # when video link download failed - we experience sometimes 403 errors on
-            # video link, see #167)
-            if not downloaded and youtube_id:
-                try:
-                    options = (
-                        BestWebm if self.video_format == "webm" else BestMp4
-                    ).get_options(
-                        target_dir=video_dir, filepath=pathlib.Path("video.%(ext)s")
-                    )
-                    with yt_dlp.YoutubeDL(options) as ydl:
-                        ydl.download([youtube_id])
-                    downloaded = True
-                except Exception as exc:
-                    logger.error(
-                        f"Could not download from {youtube_id} for "
-                        f"{org_video_file_path}",
-                    )
-                    logger.debug("", exc_info=exc)
-            if not downloaded:
-                video["failed"] = True
+        if not downloaded_from_cache and not already_downloaded:
+            # streamed into ffmpeg by the transcode stage
+            if self.can_stream(video):
+                logger.debug(f"{video_title} will be streamed into ffmpeg")
+            elif not self.download_video_file(video, video_dir):
+                video.failed = True
                 return
 
         # download speaker and thumbnail images
-        self.download_speaker_image(video_id, video_title, video_speaker, speaker_path)
-        self.download_thumbnail(video_id, video_title, video_thumbnail, thumbnail_path)
+        if not already_downloaded:
+            self.download_speaker_image(
+                video_id, video_title, video_speaker, speaker_path
+            )
+            self.download_thumbnail(
+                video_id, video_title, video_thumbnail, thumbnail_path
+            )
+            # videos from cache are already encoded
+            if downloaded_from_cache:
+                self.mark_done(video, ENCODED)
+            else:
+                self.mark_done(video, DOWNLOADED)
+
+    def download_video_file(self, video, video_dir):
+        """download the video of video into video_dir from its video link, HLS
+        stream or Youtube ID, in that order ; whether it was downloaded"""
+
+        video_link = video.video_link
+        hls_link = video.hls_link
+        youtube_id = video.youtube_id
+        org_video_file_path = video_dir.joinpath("video.mp4")
+        downloaded = False
+        # First try to download from video link
+        if video_link:
+            try:
+                self.video_downloader.download(video_link, org_video_file_path)
+                downloaded = True
+                with self.lock:
+                    self.nb_bytes_saved += self.download_savings.pop(video.id, 0)
+            except Exception as exc:
+                logger.error(
+                    f"Could not download from {video_link} for "
+                    f"{org_video_file_path}",
+                )
+                logger.debug("", exc_info=exc)
+                # failed videos are not retried on --resume, and their segments
+                # must not end up in the ZIM
+                org_video_file_path.unlink(missing_ok=True)
+                SegmentedDownloader.discard(org_video_file_path)
+        # Second try to download from HLS stream, remuxed without re-encoding
+        if not downloaded and hls_link:
+            try:
+                self.hls_downloader.download(hls_link, org_video_file_path)
+                downloaded = True
+            except Exception as exc:
+                logger.error(
+                    f"Could not download from {hls_link} for {org_video_file_path}",
+                )
+                logger.debug("", exc_info=exc)
+                org_video_file_path.unlink(missing_ok=True)
+                HlsDownloader.discard(org_video_file_path)
+        # Then try to download from youtube ID (used both when no video link AND
+        # when video link download failed - we experience sometimes 403 errors on
+        # video link, see #167)
+        if not downloaded and youtube_id:
+            try:
+                options = (
+                    BestWebm if self.video_format == "webm" else BestMp4
+                ).get_options(
+                    target_dir=video_dir, filepath=pathlib.Path("video.%(ext)s")
+                )
+                with yt_dlp.YoutubeDL(options) as ydl:
+                    ydl.download([youtube_id])
+                downloaded = True
+            except Exception as exc:
+                logger.error(
+                    f"Could not download from {youtube_id} for "
+                    f"{org_video_file_path}",
+                )
+                logger.debug("", exc_info=exc)
+        return downloaded
+
+    def can_stream(self, video):
+        """whether video is to be downloaded straight into ffmpeg by the transcode
+        stage: its video link has to be re-encoded into another format"""
+        return bool(
+            self.stream_transcode and video.video_link and self.video_format != "mp4"
+        )
+
+    def stream_video(self, video, video_dir):
+        """re-encode video from its video link piped into ffmpeg ; whether it was"""
+        video_link = video.video_link
+        try:
+            if not is_streamable(video_link):
+                logger.debug(f"{video_link} can't be streamed, downloading it first")
+                return False
+            stream_reencode(
+                video_link,
+                video_dir.joinpath(f"video.{self.video_format}"),
+                self.video_preset.to_ffmpeg_args(),
+            )
+        except Exception as exc:
+            logger.warning(
+                f"Could not stream {video_link} into ffmpeg for {video.id}, "
+                "downloading it first"
+            )
+            logger.debug("", exc_info=exc)
+            return False
+        with self.lock:
+            self.nb_bytes_saved += self.download_savings.pop(video.id, 0)
+            self.nb_streamed += 1
+        return True
+
+    def transcode_video_files(self, video):
+        """recompress a downloaded video if necessary, and upload it to cache
 
-        # recompress if necessary
+        Videos left to be streamed by the download stage are downloaded into ffmpeg,
+        or downloaded then recompressed if that fails"""
+
+        video_id = str(video.id)
+        video_dir = self.videos_dir.joinpath(video_id)
+        preset = self.video_preset
+        streamed = False
+        if self.can_stream(video) and not video_dir.joinpath("video.mp4").exists():
+            streamed = self.stream_video(video, video_dir)
+            if not streamed and not self.download_video_file(video, video_dir):
+                video.failed = True
+                return
         try:
-            if not downloaded_from_cache:
-                post_process_video(
+            if not streamed:
+                reencoded = post_process_video(
                     video_dir,
                     video_id,
                     preset,
                     self.video_format,
                     self.low_quality,
                 )
+                if self.low_quality and not reencoded:
+                    with self.lock:
+                        self.nb_reencodes_skipped += 1
         except Exception as e:
             logger.error(f"Failed to post process video {video_id}")
             logger.debug("", exc_info=e)
-            video["failed"] = True
+            video.failed = True
             return
         else:
             # upload to cache only if recompress was successful
-            if self.s3_storage and not downloaded_from_cache:
-                self.upload_to_cache(s3_key, req_video_file_path, preset.VERSION)
+            if self.s3_storage:
+                self.upload_to_cache(
+                    f"{self.video_format}/{self.video_quality}/{video_id}",
+                    video_dir.joinpath(f"video.{self.video_format}"),
+                    preset.VERSION,
+                )
+            self.mark_done(video, ENCODED)
 
-    def download_video_files_parallel(self):
-        """download videos and images parallely"""
+    def download_video(self, video):
+        """download stage of a video"""
+        if self.discovery_failed:
+            return
+        with self.download_stats.measure_busy():
+            self.download_video_files(video)
+
+    def hand_off_to_transcoder(self, video):
+        """queue a downloaded video for transcoding, waiting for room if needed"""
+        if video.failed or ENCODED in video.done:
+            return
+        with self.download_stats.measure_waiting():
+            self.transcoder.put(video)  # pyright: ignore
+
+    def transcode_video(self, video):
+        """transcode stage of a video"""
+        # left DOWNLOADED if interrupted, to be completed with --resume
+        if self.interrupted or self.discovery_failed:
+            return
+        self.process_video(self.transcode_video_files, video)
+
+    def download_video_files_parallel(self, videos=None):
+        """download then transcode videos, and download images, of all videos by
+        default
+
+        Downloads are done by self.threads workers. They hand videos over to
+        self.transcode_threads transcoding workers through a bounded queue, so that
+        the network is used while ffmpeg runs without running more encodes than
+        there are CPUs. Utilisation of both stages is logged."""
 
         self.yt_downloader = YoutubeDownloader(threads=1)
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.threads
-        ) as executor:
-            fs = [
-                executor.submit(self.download_video_files, video)
-                for video in self.videos
-                if not video.get("failed", False)
-            ]
-            concurrent.futures.wait(fs, return_when=concurrent.futures.ALL_COMPLETED)
+        self.download_stats = StageStats("Downloads", self.threads)
+        self.transcoder = WorkerStage(
+            "Transcodes",
+            self.transcode_video,
+            self.transcode_threads,
+            2 * self.transcode_threads,
+        )
+        self.process_videos_parallel(
+            self.download_video, videos, on_done=self.hand_off_to_transcoder
+        )
+        self.download_stats.end()
+        try:
+            self.transcoder.join()
+        except KeyboardInterrupt:
+            logger.warning(
+                "Interrupted, waiting for videos in progress (interrupt again to "
+                "abort)"
+            )
+            self.interrupted = True
+            self.transcoder.join()
+        logger.info(str(self.download_stats))
+        logger.info(str(self.transcoder.stats))
+        if self.nb_bytes_saved or self.nb_reencodes_skipped:
+            logger.info(
+                f"Picking h264 renditions for the preset saved "
+                f"{self.nb_bytes_saved / 2**20:.1f} MiB of downloads ; "
+                f"{self.nb_reencodes_skipped} video(s) already met the preset and "
+                "were not re-encoded"
+            )
+        if self.nb_streamed:
+            logger.info(
+                f"{self.nb_streamed} video(s) were streamed into ffmpeg while "
+                "downloading"
+            )
+        self.transcoder = None
         self.yt_downloader.shutdown()
+        self.checkpoint.save(self.videos, force=True)
 
-    def download_subtitles(self, index, video):
-        """download, converts and writes VTT subtitles
+    def download_subtitles(self, video):
+        """download, converts and writes VTT subtitles of a video
 
-        Subtitles a written for a given video at a specific index in self.videos
+        Subtitles which could not be converted are removed from video.subtitles
         """
 
         # Download the subtitle files, generate a WebVTT file
         # and save the subtitles in
         # build_dir/{video id}/subs/subs_{language code}.vtt
-        if not video["subtitles"]:
+        if SUBTITLES in video.done:
             return
-        video_dir = self.videos_dir.joinpath(video["id"])
+        if not video.subtitles:
+            self.mark_done(video, SUBTITLES)
+            return
+        video_dir = self.videos_dir.joinpath(video.id)
         subs_dir = video_dir.joinpath("subs")
         if not subs_dir.exists():
             subs_dir.mkdir(parents=True)
@@ -1300,14 +1874,19 @@ class Ted2Zim:
             logger.debug("Subs dir exists already")
 
         # download subtitles
-        logger.debug(f"Downloading subtitles for {video['title'][0]['text']}")
-        if video["subtitles_offset"]:
-            logger.debug(f"Subtitles will be offset by {video['subtitles_offset']} ms")
+        logger.debug(f"Downloading subtitles for {video.title.default}")
+        if video.subtitles_offset:
+            logger.debug(f"Subtitles will be offset by {video.subtitles_offset} ms")
         valid_subs = []
-        for subtitle in video["subtitles"]:
-            time.sleep(0.5)  # throttling
+        for subtitle in video.subtitles:
+            vtt_path = subs_dir.joinpath(f"subs_{subtitle['languageCode']}.vtt")
+            if self.previous_zim and self.previous_zim.copy_subtitles(
+                video, subtitle["languageCode"], vtt_path
+            ):
+                valid_subs.append(subtitle)
+                continue
             vtt_subtitle = WebVTT(subtitle["link"]).convert(
-                offset=video["subtitles_offset"]
+                offset=video.subtitles_offset
             )
             if not vtt_subtitle:
                 logger.error(
@@ -1315,23 +1894,176 @@ class Ted2Zim:
                 )
                 continue
             valid_subs.append(subtitle)
-            vtt_path = subs_dir.joinpath(f"subs_{subtitle['languageCode']}.vtt")
             with open(vtt_path, "w", encoding="utf-8") as sub_file:
                 sub_file.write(vtt_subtitle)
-        self.videos[index]["subtitles"] = valid_subs
+        video.subtitles = valid_subs
+        self.mark_done(video, SUBTITLES)
+
+    def get_subtitles_offset(self, metadata_link):
+        """subtitles offset in ms from a video HLS metadata
+
+        Sum of all domains durations up till the primary domain"""
+
+        subtitles_offset = 0
+        try:
+            metadatas = request_url(metadata_link).json()
+        except json.JSONDecodeError:
+            http_cache.discard(metadata_link)
+            raise
+        if "domains" in metadatas:
+            for domain in metadatas["domains"]:
+                if domain["primaryDomain"]:
+                    break
+                subtitles_offset += int(domain["duration"] * 1000)
+        return subtitles_offset
+
+    def get_subtitles_offset_failsafe(self, video):
+        """get_subtitles_offset of video, 0 if it can't be computed
+
+        Subtitles are then not shifted rather than failing the whole run once all
+        videos were downloaded"""
+        try:
+            return self.get_subtitles_offset(video.metadata_link)
+        except Exception as exc:
+            logger.error(
+                f"Could not compute subtitles offset of {video.id} from "
+                f"{video.metadata_link}, subtitles won't be shifted"
+            )
+            logger.debug("", exc_info=exc)
+            return 0
+
+    def needs_subtitles_offset(self, video):
+        if video.failed or not video.subtitles or video.subtitles_offset is not None:
+            return False
+        # offsets are not needed for subtitles reused from the previous ZIM
+        return not self.previous_zim or not self.previous_zim.has_subtitles(
+            video, [subtitle["languageCode"] for subtitle in video.subtitles]
+        )
+
+    def fetch_subtitles_offsets(self):
+        """compute subtitles_offset of videos with subtitles, in parallel
+
+        Offsets are only computed once (they are the same for all languages) and
+        kept with the video. Videos are processed by batches to bound memory use"""
+
+        videos = (video for video in self.videos if self.needs_subtitles_offset(video))
+        nb_fetched = 0
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.discovery_threads
+        ) as executor:
+            while batch := list(islice(videos, OFFSETS_BATCH_SIZE)):
+                for video in batch:
+                    if not video.metadata_link:
+                        video.subtitles_offset = 0
+                batch_to_fetch = [
+                    video for video in batch if video.subtitles_offset is None
+                ]
+                offsets = executor.map(
+                    self.get_subtitles_offset_failsafe, batch_to_fetch
+                )
+                for video, subtitles_offset in zip(
+                    batch_to_fetch, offsets, strict=True
+                ):
+                    video.subtitles_offset = subtitles_offset
+                for video in batch:
+                    self.videos.save(video)
+                nb_fetched += len(batch_to_fetch)
+        if nb_fetched:
+            logger.debug(f"Fetched subtitles offsets of {nb_fetched} video(s)")
 
     def download_subtitles_parallel(self):
         """download subtitles for all videos parallely"""
 
+        self.fetch_subtitles_offsets()
+        self.process_videos_parallel(self.download_subtitles)
+        self.checkpoint.save(self.videos, force=True)
+
+    def mark_done(self, video, step):
+        """record a completed processing step of a video in the checkpoint"""
+        video.done.append(step)
+        self.videos.save(video)
+        self.checkpoint.save(self.videos)
+        if step == ENCODED:
+            with self.lock:
+                if self.first_video_on is None:
+                    self.first_video_on = time.monotonic()
+                    logger.info(
+                        "First video written after "
+                        f"{self.first_video_on - self.started_on:.1f}s"
+                    )
+
+    def process_video(self, func, video, on_done=None):
+        """call func on video, recording its changes, then on_done if passed"""
+        try:
+            func(video)
+        finally:
+            self.videos.save(video)
+        if on_done:
+            on_done(video)
+
+    def process_videos_parallel(self, func, videos=None, on_done=None):
+        """call func on videos (all by default) which have not failed, with
+        self.threads workers, then on_done (if passed) once changes are recorded
+
+        Videos are submitted as workers become available so that only a few of them
+        are held at once. If interrupted (Ctrl-C), only videos in progress are
+        completed, so that the ZIM can be built with completed videos. A second
+        interruption aborts."""
+
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=self.threads
         ) as executor:
-            fs = [
-                executor.submit(self.download_subtitles, index, video)
-                for index, video in enumerate(self.videos)
-                if not video.get("failed", False)
-            ]
-            concurrent.futures.wait(fs, return_when=concurrent.futures.ALL_COMPLETED)
+            pending = set()
+            try:
+                for video in self.videos if videos is None else videos:
+                    if video.failed:
+                        continue
+                    while len(pending) >= 2 * self.threads:
+                        # wake up regularly so that signals are handled in the main
+                        # thread
+                        _, pending = concurrent.futures.wait(
+                            pending,
+                            timeout=1,
+                            return_when=concurrent.futures.FIRST_COMPLETED,
+                        )
+                    pending.add(
+                        executor.submit(self.process_video, func, video, on_done)
+                    )
+                while pending:
+                    _, pending = concurrent.futures.wait(pending, timeout=1)
+            except KeyboardInterrupt:
+                logger.warning(
+                    "Interrupted, waiting for videos in progress (interrupt again to "
+                    "abort)"
+                )
+                self.interrupted = True
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def exclude_incomplete_videos(self, step):
+        """leave videos which have not completed step out of the ZIM, if interrupted
+
+        The checkpoint is saved as is beforehand so that they can be completed with
+        --resume"""
+
+        if not self.interrupted:
+            return
+        incomplete = [
+            video
+            for video in self.videos
+            if not video.failed and step not in video.done
+        ]
+        if not incomplete:
+            return
+        self.checkpoint.save(self.videos, force=True)
+        self.checkpoint.disable()
+        self.keep_build_dir = True
+        self.incomplete_videos += incomplete
+        for video in incomplete:
+            self.videos.remove(video.id)
+        logger.warning(
+            f"Leaving {len(self.incomplete_videos)} incomplete video(s) out of the "
+            f"ZIM, use --resume {self.build_dir} to complete them"
+        )
 
     def s3_credentials_ok(self):
         logger.info("Testing S3 Optimization Cache credentials")
@@ -1402,53 +2134,40 @@ class Ted2Zim:
         """
         logger.debug(f"Extracting videos from {len(links)} links")
 
+        urls = []
         for original_url in links:
             url = original_url.strip()
             # Ensure the URL is a valid TED talk URL
             if not url.startswith(BASE_URL) and "ted.com/talks" not in url:
                 logger.warning(f"Skipping invalid TED talk URL: {url}")
                 continue
+            urls.append(url)
 
+        # Process the video data ; the talk in other languages is only fetched for
+        # videos which have been saved and if source_languages specified
+        def get_variant_urls(url, json_data):
             logger.debug(f"Processing link: {url}")
-            json_data = self.extract_info_from_video_page(url)
+            if self.update_videos_list_from_info(json_data) and self.source_languages:
+                return self.generate_urls_for_other_languages(
+                    url,
+                    self.filter_available_languages(json_data, self.source_languages),
+                )
+            return []
 
-            # Skip if we couldn't retrieve the data
-            if json_data is None:
-                continue
+        def save_talk(url, json_data, variants_data):  # noqa: ARG001
+            for data in variants_data:
+                if data:
+                    self.update_videos_list_from_info(data)
 
-            # Process the video data
-            if self.update_videos_list_from_info(json_data):
-                # Try to get the talk in other languages if source_languages specified
-                if self.source_languages:
-                    urls = self.generate_urls_for_other_languages(
-                        url, self.source_languages
-                    )
-                    for lang_url in urls:
-                        json_data = self.extract_info_from_video_page(lang_url)
-                        if json_data:
-                            self.update_videos_list_from_info(json_data)
-            logger.debug(f"Processed {url}")
+        self.extract_talks(urls, get_variant_urls, save_talk)
 
         # Process finished
         logger.debug(f"Total links processed: {len(links)}")
         if not self.videos:
             raise ValueError("No valid videos found from the provided links")
 
-    def run(self):
-        logger.info(
-            f"Starting scraper with:\n"
-            f"  langs: {', '.join(self.source_languages)}\n"
-            f"  subtitles : {', '.join(self.subtitles_setting) if isinstance(self.subtitles_setting, list) else self.subtitles_setting}\n"  # noqa: E501
-            f"  video format : {self.video_format}"
-        )
-
-        if self.s3_url_with_credentials and not self.s3_credentials_ok():
-            raise ValueError("Unable to connect to Optimization Cache. Check its URL.")
-        if self.s3_storage:
-            logger.info(
-                f"Using cache: {self.s3_storage.url.netloc} with bucket: "
-                f"{self.s3_storage.bucket_name}"
-            )
+    def discover_videos(self):
+        """find videos to include and their metadata, saving them in the checkpoint"""
 
         # links mode requested
         if self.links:
@@ -1458,6 +2177,10 @@ class Ted2Zim:
             self.extract_videos_from_playlist(self.playlist)
         # topic(s) mode requested
         else:
+            # start fetching search pages of all topics at once ; talks are then
+            # extracted topic after topic as their pages come in
+            for topic in self.topics:
+                self.prefetch_search_results(topic)
             failed = []
             for topic in self.topics:
                 if not self.extract_videos_from_topics(topic):
@@ -1465,54 +2188,186 @@ class Ted2Zim:
                 else:
                     logger.debug(f"Successfully scraped {topic}")
             self.remove_failed_topics_and_check_extraction(failed)
+        self.discovery.shutdown()
+        logger.debug(f"Discovery done: {connection_stats}")
+        if self.nb_search_hits:
+            logger.info(
+                f"{self.nb_duplicate_hits} of {self.nb_search_hits} search hit(s) "
+                "were duplicates across topics "
+                f"({self.nb_duplicate_hits / self.nb_search_hits:.1%})"
+            )
+        if self.discovery.nb_coalesced:
+            logger.debug(
+                f"{self.discovery.nb_coalesced} concurrent fetch(es) of the same "
+                "page were coalesced"
+            )
+        if self.nb_fetches_avoided:
+            logger.info(
+                f"Skipped {self.nb_fetches_avoided} talk page fetch(es) for "
+                "translations which do not exist"
+            )
+        if http_cache.enabled:
+            logger.info(f"HTTP cache: {http_cache}")
+        if self.catalog:
+            logger.info(f"Talk catalog: {self.catalog}")
+            self.catalog.close()
+
+        self.hand_off_new_videos()
 
-        self.add_default_language()
-        self.update_zim_metadata()
-        self.download_video_files_parallel()
-        self.download_subtitles_parallel()
-        self.render_home_page()
-        self.render_video_pages()
-        self.compute_zim_languages()  # Compute ZIM language (second/final call)
-        self.copy_files_to_build_directory()
-        self.generate_datafile()
-
-        # display final stats and abort processing if no videos are left
-        nb_success = sum(
-            0 if video.get("failed", False) else 1 for video in self.videos
+        self.checkpoint.save_discovery(
+            self.videos,
+            {
+                "topics": self.topics,
+                "playlist_title": self.playlist_title,
+                "playlist_description": self.playlist_description,
+            },
         )
-        nb_failed = sum(1 if video.get("failed", False) else 0 for video in self.videos)
-        logger.debug(f"Stats: {nb_success} videos ok, {nb_failed} videos failed")
-        if nb_success == 0:
-            raise Exception("No successfull video, aborting ZIM creation")
-
-        # zim creation and cleanup
-        if not self.no_zim:
-            self.fname = (
-                self.fname or f"{self.name.replace(' ', '-')}_{{period}}.zim"
-            ).format(
-                period=datetime.datetime.now().strftime("%Y-%m")  # noqa: DTZ005
+
+    def discover_and_download_videos(self):
+        """discover videos, downloading them as soon as they are complete
+
+        Discovery runs in a thread, handing videos off to downloads through a
+        bounded queue: it pauses while pipeline_size videos are waiting. If
+        interrupted, discovery is completed without downloading other videos so
+        that the run can be resumed. If discovery fails (including ZIM metadata
+        checks), videos not started yet are left and its error is raised once
+        those in progress are done."""
+
+        errors = []
+
+        def discover():
+            try:
+                self.discover_videos()
+                self.update_zim_metadata()
+            except BaseException as exc:
+                errors.append(exc)
+                logger.error(f"Discovery failed ({exc!r}), stopping downloads")
+                self.discovery_failed = True
+            finally:
+                self.put_in_pipeline(None)
+
+        self.pipeline = queue.Queue(maxsize=self.pipeline_size)
+        discovery = threading.Thread(target=discover, name="discovery", daemon=True)
+        discovery.start()
+        self.download_video_files_parallel(self.iter_pipeline())
+        if self.interrupted:
+            logger.warning(
+                "Completing discovery so that the run can be resumed (interrupt "
+                "again to abort)"
             )
-            logger.info("building ZIM file")
-            if not self.output_dir.exists():
-                self.output_dir.mkdir(parents=True)
-            make_zim_file(
-                build_dir=self.build_dir,
-                fpath=self.output_dir.joinpath(self.fname),
-                name=self.name,
-                main_page="index",
-                illustration="favicon.png",
-                title=self.title,
-                description=self.description,
-                language=self.zim_languages,  # pyright: ignore[reportArgumentType]
-                long_description=self.long_description,  # pyright: ignore[reportArgumentType]
-                creator=self.creator,
-                publisher=self.publisher,
-                tags=self.tags,
-                scraper=SCRAPER,
-                disable_metadata_checks=self.disable_metadata_checks,
+        discovery.join()
+        self.pipeline = None
+        if errors:
+            raise errors[0]
+
+    def load_checkpoint(self):
+        """restore discovery results and videos progress of a previous run"""
+
+        self.videos, state = self.checkpoint.load(self.videos)
+        self.topics = state["topics"]
+        self.playlist_title = state["playlist_title"]
+        self.playlist_description = state["playlist_description"]
+        nb_done = sum(1 for video in self.videos if ENCODED in video.done)
+        logger.info(
+            f"Resuming from {self.build_dir} with {len(self.videos)} videos, "
+            f"{nb_done} already encoded ; discovery options are ignored"
+        )
+
+    def run(self):
+        try:
+            logger.info(
+                f"Starting scraper with:\n"
+                f"  langs: {', '.join(self.source_languages)}\n"
+                f"  subtitles : {', '.join(self.subtitles_setting) if isinstance(self.subtitles_setting, list) else self.subtitles_setting}\n"  # noqa: E501
+                f"  video format : {self.video_format}\n"
+                f"  build dir : {self.build_dir}"
             )
-            if not self.keep_build_dir:
-                logger.info("removing temp folder")
-                shutil.rmtree(self.build_dir, ignore_errors=True)
 
-        logger.info("Done Everything")
+            if self.s3_url_with_credentials and not self.s3_credentials_ok():
+                raise ValueError(
+                    "Unable to connect to Optimization Cache. Check its URL."
+                )
+            if self.s3_storage:
+                logger.info(
+                    f"Using cache: {self.s3_storage.url.netloc} with bucket: "
+                    f"{self.s3_storage.bucket_name}"
+                )
+
+            if self.checkpoint.exists:
+                self.load_checkpoint()
+                self.update_zim_metadata()
+                self.download_video_files_parallel()
+            else:
+                self.discover_and_download_videos()
+            self.exclude_incomplete_videos(ENCODED)
+            self.download_subtitles_parallel()
+            self.exclude_incomplete_videos(SUBTITLES)
+            self.render_home_page()
+            self.render_video_pages()
+            self.compute_zim_languages()  # Compute ZIM language (second/final call)
+            self.copy_files_to_build_directory()
+            self.generate_datafile()
+            write_videos_info(
+                self.build_dir,
+                self.videos,
+                self.video_format,
+                self.video_quality,
+                self.video_preset.VERSION,
+            )
+
+            # display final stats and abort processing if no videos are left
+            nb_success = sum(0 if video.failed else 1 for video in self.videos)
+            nb_failed = sum(1 if video.failed else 0 for video in self.videos)
+            logger.debug(f"Stats: {nb_success} videos ok, {nb_failed} videos failed")
+            logger.info(f"Network stats: {connection_stats}")
+            if self.previous_zim:
+                logger.info(
+                    f"Reused {self.previous_zim.nb_reused} video(s) from "
+                    f"{self.previous_zim.fpath}"
+                )
+            if http_cache.enabled:
+                logger.info(f"HTTP cache: {http_cache}")
+            if nb_success == 0:
+                raise Exception("No successfull video, aborting ZIM creation")
+
+            # zim creation and cleanup
+            if not self.no_zim:
+                self.fname = (
+                    self.fname or f"{self.name.replace(' ', '-')}_{{period}}.zim"
+                ).format(
+                    period=datetime.datetime.now().strftime("%Y-%m")  # noqa: DTZ005
+                )
+                logger.info("building ZIM file")
+                if not self.output_dir.exists():
+                    self.output_dir.mkdir(parents=True)
+                # checkpoint and incomplete videos must not end up in the ZIM
+                with self.checkpoint.set_aside(
+                    [
+                        self.videos_dir.joinpath(video.id)
+                        for video in self.incomplete_videos
+                    ]
+                ):
+                    make_zim_file(
+                        build_dir=self.build_dir,
+                        fpath=self.output_dir.joinpath(self.fname),
+                        name=self.name,
+                        main_page="index",
+                        illustration="favicon.png",
+                        title=self.title,
+                        description=self.description,
+                        language=self.zim_languages,  # pyright: ignore[reportArgumentType]
+                        long_description=self.long_description,  # pyright: ignore[reportArgumentType]
+                        creator=self.creator,
+                        publisher=self.publisher,
+                        tags=self.tags,
+                        scraper=SCRAPER,
+                        disable_metadata_checks=self.disable_metadata_checks,
+                    )
+                if not self.keep_build_dir:
+                    logger.info("removing temp folder")
+                    shutil.rmtree(self.build_dir, ignore_errors=True)
+
+            logger.info(f"Done Everything in {time.monotonic() - self.started_on:.1f}s")
+        finally:
+            # the on-disk videos store must not outlive the run, whatever happens
+            self.videos.close()
@@ -0,0 +1,163 @@
+import concurrent.futures
+import json
+import re
+import shutil
+from http import HTTPStatus
+
+from zimscraperlib.download import save_large_file
+
+from ted2zim.constants import REQUESTS_TIMEOUT, get_logger
+from ted2zim.network import get_session, rate_limiter, retry_policy
+
+logger = get_logger()
+
+DEFAULT_CONNECTIONS = 4
+# files smaller than this per connection are downloaded in fewer segments
+MIN_SEGMENT_SIZE = 2**20
+CHUNK_SIZE = 2**16
+
+
+class RangesNotSupportedError(Exception):
+    """Server does not answer byte range requests"""
+
+
+class SegmentedDownloader:
+    """Downloads files in byte range segments, over parallel connections
+
+    Segments are written in a `<file>.parts` directory next to the file and are
+    resumed (from their current size) when a request fails, so that a dropped
+    connection only costs the bytes in flight. They are kept when the download
+    is interrupted, so that downloading the file again resumes from there (e.g.
+    with --resume after the run was killed), unless the file changed on the
+    server. Callers giving up on the file remove them with discard().
+
+    The file size (and validators) are obtained with a first one byte range request,
+    the only one going through the rate limiter: segments are bounded by the number
+    of connections instead. The final file is checked against that size. Servers
+    not supporting ranges are downloaded with zimscraperlib's save_large_file."""
+
+    def __init__(self, connections=DEFAULT_CONNECTIONS):
+        self.connections = connections
+
+    @staticmethod
+    def get_parts_dir(fpath):
+        return fpath.with_name(f"{fpath.name}.parts")
+
+    @staticmethod
+    def discard(fpath):
+        """remove segments of fpath, if any"""
+        shutil.rmtree(SegmentedDownloader.get_parts_dir(fpath), ignore_errors=True)
+
+    def download(self, url, fpath):
+        """download url to fpath"""
+        try:
+            info = self.get_info(url)
+        except RangesNotSupportedError:
+            logger.debug(f"{url} does not support ranges, downloading it at once")
+            save_large_file(url, fpath)
+            return
+
+        parts_dir = self.get_parts_dir(fpath)
+        info_path = parts_dir.joinpath("info.json")
+        if parts_dir.exists() and (
+            not info_path.exists() or json.loads(info_path.read_text()) != info
+        ):
+            logger.debug(f"{url} changed since segments were downloaded")
+            shutil.rmtree(parts_dir)
+        if not parts_dir.exists():
+            parts_dir.mkdir(parents=True)
+            info_path.write_text(json.dumps(info))
+
+        segments = self.get_segments(info["size"])
+        parts = [parts_dir.joinpath(f"{index:04}") for index in range(len(segments))]
+        already_downloaded = sum(part.stat().st_size for part in parts if part.exists())
+        logger.debug(
+            f"Downloading {url} ({info['size']} bytes) in {len(segments)} segment(s)"
+            + (f", {already_downloaded} bytes resumed" if already_downloaded else "")
+        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(segments), thread_name_prefix="segment"
+        ) as executor:
+            for future in [
+                executor.submit(self.download_segment, url, part, *segment)
+                for part, segment in zip(parts, segments, strict=True)
+            ]:
+                future.result()
+
+        with open(fpath, "wb") as fh:
+            for part in parts:
+                with open(part, "rb") as part_fh:
+                    shutil.copyfileobj(part_fh, fh)
+        if fpath.stat().st_size != info["size"]:
+            fpath.unlink()
+            shutil.rmtree(parts_dir)
+            raise OSError(
+                f"Downloaded {url} does not have the expected size of {info['size']} "
+                "bytes"
+            )
+        shutil.rmtree(parts_dir)
+
+    def get_segments(self, size):
+        """(start, end) byte ranges (end included) of segments of a size bytes file"""
+        nb_segments = max(min(self.connections, size // MIN_SEGMENT_SIZE), 1)
+        segment_size = -(-size // nb_segments)  # rounded up
+        return [
+            (start, min(start + segment_size, size) - 1)
+            for start in range(0, size, segment_size)
+        ]
+
+    @staticmethod
+    def get_info(url):
+        """size and validators of url's file, from a one byte range request"""
+        rate_limiter.acquire(url)
+        with get_session().get(
+            url, headers={"Range": "bytes=0-0"}, stream=True, timeout=REQUESTS_TIMEOUT
+        ) as response:
+            # empty file
+            if response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                raise RangesNotSupportedError(url)
+            response.raise_for_status()
+            match = re.match(
+                r"bytes 0-0/(\d+)$", response.headers.get("Content-Range", "")
+            )
+            if response.status_code != HTTPStatus.PARTIAL_CONTENT or not match:
+                raise RangesNotSupportedError(url)
+            return {
+                "url": url,
+                "size": int(match.group(1)),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+
+    @staticmethod
+    def download_segment(url, part, start, end):
+        """download bytes start to end (included) of url into part, resuming it
+
+        Failed requests are retried according to the shared retry policy, from the
+        bytes already received."""
+
+        def resume():
+            offset = start + (part.stat().st_size if part.exists() else 0)
+            if offset > end + 1:
+                part.unlink()
+                offset = start
+            if offset == end + 1:
+                return
+            with get_session().get(
+                url,
+                headers={"Range": f"bytes={offset}-{end}"},
+                stream=True,
+                timeout=REQUESTS_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                if response.status_code != HTTPStatus.PARTIAL_CONTENT:
+                    raise RangesNotSupportedError(url)
+                with open(part, "ab") as fh:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        fh.write(chunk)
+            if part.stat().st_size != end - start + 1:
+                raise OSError(f"Segment {start}-{end} of {url} is incomplete")
+
+        retry_policy.run(
+            resume, f"bytes {start}-{end} of {url}", fatal=(RangesNotSupportedError,)
+        )
@@ -0,0 +1,110 @@
+import contextlib
+import queue
+import threading
+import time
+
+from ted2zim.constants import get_logger
+
+logger = get_logger()
+
+
+class StageStats:
+    """Thread-safe utilisation of the workers of a processing stage
+
+    Workers are either busy (processing an item), waiting (for the next stage to
+    accept an item) or idle (waiting for items)."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.nb_items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+        self.started_on = time.monotonic()
+        self.ended_on = None
+
+    @contextlib.contextmanager
+    def measure_busy(self):
+        started_on = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.nb_items += 1
+                self.busy += time.monotonic() - started_on
+
+    @contextlib.contextmanager
+    def measure_waiting(self):
+        started_on = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.waiting += time.monotonic() - started_on
+
+    def end(self):
+        self.ended_on = time.monotonic()
+
+    def __str__(self):
+        with self._lock:
+            duration = (self.ended_on or time.monotonic()) - self.started_on
+            capacity = max(duration * self.workers, 1e-9)
+            return (
+                f"{self.name}: {self.nb_items} video(s) by {self.workers} worker(s) "
+                f"in {duration:.1f}s, {self.busy / capacity:.0%} busy"
+                + (
+                    f", {self.waiting / capacity:.0%} waiting for next stage"
+                    if self.waiting
+                    else ""
+                )
+            )
+
+
+class WorkerStage:
+    """Processing stage: workers threads calling func on items put in a queue
+
+    The queue is bounded: put() blocks while queue_size items are waiting, so that a
+    faster upstream stage is paused instead of piling up items (e.g. downloaded
+    videos waiting for transcoding on disk). Errors of func are logged and do not
+    stop the stage."""
+
+    def __init__(self, name, func, workers, queue_size):
+        self.func = func
+        self.stats = StageStats(name, workers)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._nb_stops = 0  # end of items markers sent to workers
+        self.threads = [
+            threading.Thread(
+                target=self._work, name=f"{name.lower()}-{index}", daemon=True
+            )
+            for index in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, item):
+        """queue item for processing, waiting for room in the queue"""
+        self.queue.put(item)
+
+    def _work(self):
+        while (item := self.queue.get()) is not None:
+            try:
+                with self.stats.measure_busy():
+                    self.func(item)
+            except Exception as exc:
+                logger.error(f"{self.stats.name} failed to process {item}")
+                logger.debug("", exc_info=exc)
+
+    def join(self):
+        """wait for all items to be processed and stop workers
+
+        Can be called again if interrupted"""
+        while self._nb_stops < len(self.threads):
+            self.queue.put(None)
+            self._nb_stops += 1
+        for thread in self.threads:
+            # wake up regularly so that signals are handled in the main thread
+            while thread.is_alive():
+                thread.join(timeout=1)
+        self.stats.end()
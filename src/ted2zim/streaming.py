@@ -0,0 +1,120 @@
+import struct
+import subprocess
+import tempfile
+
+from zimscraperlib.logging import nicer_args_join
+
+from ted2zim.constants import REQUESTS_TIMEOUT, get_logger
+from ted2zim.network import get_session, rate_limiter
+from ted2zim.segmented_download import CHUNK_SIZE
+
+logger = get_logger()
+
+# bytes fetched to find whether the MP4 index comes before media data
+PROBE_SIZE = 2**16
+# MP4 boxes indexing media data, needed by ffmpeg before it can decode it
+INDEX_BOXES = (b"moov", b"moof")
+
+
+class StreamingError(Exception):
+    """ffmpeg could not encode a streamed video"""
+
+
+def is_streamable(url):
+    """whether url's MP4 file can be read by ffmpeg from a pipe
+
+    ffmpeg has to seek back to the index of MP4 files stored after their media data
+    (mdat box), which a pipe does not allow. Top level boxes in the first
+    PROBE_SIZE bytes are walked to find whether the index (moov box, or moof boxes
+    of fragmented files) comes first."""
+
+    rate_limiter.acquire(url)
+    head = b""
+    with get_session().get(
+        url,
+        headers={"Range": f"bytes=0-{PROBE_SIZE - 1}"},
+        stream=True,
+        timeout=REQUESTS_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        # servers ignoring the range send the whole file, of which we only read
+        # the start
+        for chunk in response.iter_content(CHUNK_SIZE):
+            head += chunk
+            if len(head) >= PROBE_SIZE:
+                break
+
+    offset = 0
+    while offset + 8 <= len(head):
+        size, box_type = struct.unpack(">I4s", head[offset : offset + 8])
+        if box_type in INDEX_BOXES:
+            return True
+        if box_type == b"mdat":
+            return False
+        if size == 1:  # 64 bits size following the type
+            if offset + 16 > len(head):
+                break
+            size = struct.unpack(">Q", head[offset + 8 : offset + 16])[0]
+        if size < 8:  # noqa: PLR2004 # 0 (box up to the end of file) or invalid
+            break
+        offset += size
+    return False
+
+
+def stream_reencode(url, dst_path, ffmpeg_args, threads=1):
+    """encode url into dst_path with ffmpeg_args, the download being piped into
+    ffmpeg's stdin so that encoding runs while downloading
+
+    The download is not retried: a failure raises (StreamingError if ffmpeg failed)
+    and leaves no dst_path, the caller downloading the file instead."""
+
+    tmp_path = dst_path.with_name(f"{dst_path.stem}.tmp{dst_path.suffix}")
+    args = [
+        "/usr/bin/env",
+        "ffmpeg",
+        "-y",
+        "-i",
+        "pipe:0",
+        *ffmpeg_args,
+        "-threads",
+        str(threads),
+        f"file:{tmp_path}",
+    ]
+    logger.debug(f"Encode {url} -> {dst_path} video format = {dst_path.suffix}")
+    logger.debug(nicer_args_join(args))
+    # ffmpeg's output goes to a file rather than a pipe which would have to be
+    # read while writing to stdin
+    with tempfile.TemporaryFile() as output:
+        process = subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=output, stderr=subprocess.STDOUT
+        )
+        try:
+            rate_limiter.acquire(url)
+            with get_session().get(
+                url, stream=True, timeout=REQUESTS_TIMEOUT
+            ) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    process.stdin.write(chunk)  # pyright: ignore
+        except BrokenPipeError:
+            # ffmpeg exited early, reported below from its return code
+            pass
+        except BaseException:
+            process.kill()
+            process.wait()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            try:
+                process.stdin.close()  # pyright: ignore
+            except BrokenPipeError:
+                pass
+
+        if process.wait():
+            tmp_path.unlink(missing_ok=True)
+            output.seek(0)
+            raise StreamingError(
+                f"Exception while re-encoding {url}: "
+                f"{output.read().decode('utf-8', 'replace')}"
+            )
+    tmp_path.replace(dst_path)
@@ -2,12 +2,15 @@ import contextlib
 import json
 import pathlib
 import tempfile
-import time
 from http import HTTPStatus
 
 import requests
 
-from ted2zim.constants import BASE_URL, REQUESTS_TIMEOUT
+from ted2zim.constants import BASE_URL, REQUESTS_TIMEOUT, get_logger
+from ted2zim.http_cache import http_cache
+from ted2zim.network import get_session, rate_limiter, retry_policy
+
+logger = get_logger()
 
 
 def has_argument(arg_name, all_args):
@@ -30,52 +33,37 @@ def request_url(url, json_data=None):
     """performs an HTTP request and returns the response, either GET or POST
 
     - json_data is used as POST body when passed, otherwise a GET request is done
-    - request is retried 5 times, with a 30*attemp_no secs pause between retries
-    - a pause of 1 sec is done before every request (including first one)
+    - requests go through the shared pooled session, reusing kept-alive connections
+    - every request (including first one) waits for the per host rate limiter
+    - failed requests are retried according to the shared retry policy: capped
+      exponential backoff with jitter, Retry-After honoured on throttling responses,
+      within a retry budget for the whole run. 404 are not retried.
+    - when the HTTP cache is enabled, fresh cached responses are returned without
+      any request and stale ones are revalidated with a conditional request
     """
 
     if url == f"{BASE_URL}playlists/57":
         url = f"{BASE_URL}playlists/57/björk_6_talks_that_are_music"
-    max_attempts, attempt = 5, 1
-    while True:
-        req = None
-        last_exc = None
-        try:
-            time.sleep(1)  # delay requests
-            if json_data:
-                req = requests.post(
-                    url,
-                    headers={"User-Agent": "Mozilla/5.0"},
-                    json=json_data,
-                    timeout=REQUESTS_TIMEOUT,
-                )
-            else:
-                req = requests.get(
-                    url, headers={"User-Agent": "Mozilla/5.0"}, timeout=REQUESTS_TIMEOUT
-                )
-            req.raise_for_status()
-            return req
-        except Exception as exc:
-            if req and req.status_code == HTTPStatus.NOT_FOUND:
-                raise exc
-            last_exc = exc
-            time.sleep(30 * attempt)  # wait upon failure
-
-        if attempt < max_attempts:
-            attempt += 1
-            continue
 
+    response, cached = http_cache.lookup(url, json_data)
+    if response is not None:
+        return response
+    headers = cached.validators if cached else {}
+
+    def send():
+        rate_limiter.acquire(url)  # delay requests
         if json_data:
-            raise ConnectionRefusedError(
-                f"Failed to query {url} after {attempt} attempts (HTTP status "
-                f"{req.status_code if req else '<unknown>'}); sent data was: "
-                f"{json.dumps(json_data)}"
-            ) from last_exc
+            req = get_session().post(
+                url, json=json_data, headers=headers, timeout=REQUESTS_TIMEOUT
+            )
         else:
-            raise ConnectionRefusedError(
-                f"Failed to download {url} after {attempt} attempts "
-                f"(HTTP status {req.status_code if req else '<unknown>'})"
-            ) from last_exc
+            req = get_session().get(url, headers=headers, timeout=REQUESTS_TIMEOUT)
+        return http_cache.resolve(url, json_data, req, cached)
+
+    return retry_policy.run(
+        send,
+        f"{url} with data {json.dumps(json_data)}" if json_data else url,
+    )
 
 
 class WebVTT:
@@ -86,13 +74,20 @@ class WebVTT:
 
     def convert(self, offset):
         """download and convert its URL to WebVTT text"""
-        req = request_url(self.url)
+        try:
+            req = request_url(self.url)
+        except requests.HTTPError as exc:
+            if (
+                exc.response is not None
+                and exc.response.status_code == HTTPStatus.NOT_FOUND
+            ):
+                return None
+            raise
 
-        if req.status_code == HTTPStatus.NOT_FOUND:
-            return None
         try:
             source_subtitles = req.json()
         except json.JSONDecodeError:
+            http_cache.discard(self.url)
             return None
 
         return self.json_to_vtt(source_subtitles, offset)
@@ -153,18 +148,13 @@ def get_temp_fpath(**kwargs):
 
 
 def get_main_title(titles, locale_ted_codes: list[str]):
-    """main title from list of titles dict based on language pref with fallback"""
+    """main title from localized titles based on language pref with fallback"""
     missing = "n/a"
     if not titles:
         return missing
 
-    def get_for(lang: str):
-        filtered = [title["text"] for title in titles if title["lang"] == lang]
-        if filtered:
-            return filtered[0]
-
     for code in [*locale_ted_codes, "default", "en"]:
-        title = get_for(code)
+        title = titles.get(code)
         if title:
             return title
 
@@ -0,0 +1,286 @@
+import dataclasses
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+
+DEFAULT_LANG = "default"
+
+# processing steps of a video, recorded in Video.done
+DOWNLOADED = "downloaded"
+ENCODED = "encoded"
+SUBTITLES = "subtitles"
+
+
+class LocalizedText:
+    """Texts of a field in several languages, keyed by language code
+
+    Iterates over {"lang", "text"} dicts in insertion order, the default text (see
+    set_default) first. Only the first text of a language is kept."""
+
+    __slots__ = ("_texts",)
+
+    def __init__(self, texts=None):
+        self._texts: dict[str, str] = {}
+        for lang, text in (texts or {}).items():
+            self.add(lang, text)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, lang):
+        return lang in self._texts
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if not isinstance(other, LocalizedText):
+            return NotImplemented
+        return list(self._texts.items()) == list(other._texts.items())
+
+    def __repr__(self):
+        return f"LocalizedText({self._texts!r})"
+
+    def add(self, lang: str, text: str) -> bool:
+        """add text in lang ; False (and not added) if lang already has a text"""
+        if lang in self._texts:
+            return False
+        self._texts[lang] = text
+        return True
+
+    def get(self, lang: str) -> str | None:
+        return self._texts.get(lang)
+
+    @property
+    def default(self) -> str | None:
+        """default text if set, first text otherwise"""
+        return next(iter(self._texts.values()), None)
+
+    def set_default(self, text: str):
+        """set the text used when no text matches a language, as the first one"""
+        self._texts.pop(DEFAULT_LANG, None)
+        self._texts = {DEFAULT_LANG: text, **self._texts}
+
+    def to_list(self) -> list[dict]:
+        return [{"lang": lang, "text": text} for lang, text in self._texts.items()]
+
+    @classmethod
+    def from_list(cls, items: list[dict]) -> "LocalizedText":
+        localized = cls()
+        for item in items:
+            localized.add(item["lang"], item["text"])
+        return localized
+
+
+@dataclasses.dataclass(slots=True)
+class Video:
+    """A TED talk to include in the ZIM, with its metadata in all fetched languages
+
+    languages and subtitles are lists of {"languageCode", "languageName"} dicts,
+    metadata_link the URL of the HLS metadata from which subtitles_offset is
+    computed and hls_link the URL of the HLS master playlist. done lists the
+    processing steps already completed (see DOWNLOADED, ENCODED and SUBTITLES)"""
+
+    id: str
+    languages: list[dict]
+    title: LocalizedText
+    description: LocalizedText
+    speaker: str
+    speaker_profession: str | None
+    speaker_bio: str
+    speaker_picture: str
+    date: str
+    thumbnail: str
+    video_link: str | None
+    youtube_id: str | None
+    length: int
+    subtitles: list[dict]
+    metadata_link: str | None
+    native_talk_language: str
+    # in ms, computed once needed (None until then)
+    subtitles_offset: int | None = None
+    hls_link: str | None = None
+    slug: str | None = None
+    failed: bool = False
+    done: list[str] = dataclasses.field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """JSON-serializable dict ; hls_link, slug, failed and done are only set once
+        known"""
+        data = {
+            field.name: getattr(self, field.name)
+            for field in dataclasses.fields(self)
+            if field.name not in ("hls_link", "slug", "failed", "done")
+        }
+        data["title"] = self.title.to_list()
+        data["description"] = self.description.to_list()
+        if self.hls_link is not None:
+            data["hls_link"] = self.hls_link
+        if self.slug is not None:
+            data["slug"] = self.slug
+        if self.failed:
+            data["failed"] = True
+        if self.done:
+            data["done"] = list(self.done)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Video":
+        return cls(
+            **{
+                **data,
+                "title": LocalizedText.from_list(data["title"]),
+                "description": LocalizedText.from_list(data["description"]),
+            }
+        )
+
+
+class VideoRegistry:
+    """Videos indexed by talk ID, iterated in insertion order"""
+
+    def __init__(self, videos=None):
+        self._videos: dict[str, Video] = {}
+        for video in videos or []:
+            self.add(video)
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __iter__(self):
+        return iter(self._videos.values())
+
+    def __contains__(self, video_id):
+        return video_id in self._videos
+
+    def get(self, video_id) -> Video | None:
+        return self._videos.get(video_id)
+
+    def add(self, video: Video) -> bool:
+        """add video ; False (and not added) if one with the same ID is present"""
+        if video.id in self._videos:
+            return False
+        self._videos[video.id] = video
+        return True
+
+    def save(self, video: Video):
+        """record changes made to a video of the registry (none needed in memory)"""
+
+    def remove(self, video_id):
+        self._videos.pop(video_id, None)
+
+    def close(self):
+        """release resources of the registry"""
+
+    def to_list(self) -> list[dict]:
+        return [video.to_dict() for video in self]
+
+    def dump(self, fpath: pathlib.Path):
+        """atomically write videos to a JSON file (ted_videos.json)
+
+        Videos are written one per line so that they can be read one at a time"""
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=fpath.parent, delete=False
+        ) as fh:
+            separator = "[\n"
+            for video in self:
+                fh.write(separator)
+                fh.write(json.dumps(video.to_dict(), ensure_ascii=False))
+                separator = ",\n"
+            fh.write("[\n]\n" if separator == "[\n" else "\n]\n")
+        os.replace(fh.name, fpath)
+
+    @staticmethod
+    def read(fpath: pathlib.Path):
+        """videos of a JSON file written by dump, one at a time"""
+        with open(fpath, encoding="utf-8") as fh:
+            for line in fh:
+                data = line.strip().removesuffix(",")
+                if data not in ("[", "]"):
+                    yield Video.from_dict(json.loads(data))
+
+    @classmethod
+    def load(cls, fpath: pathlib.Path) -> "VideoRegistry":
+        return cls(cls.read(fpath))
+
+
+class SpilledVideoRegistry(VideoRegistry):
+    """Videos kept in a SQLite database file instead of memory
+
+    Each access returns a new Video: changes made to it must be recorded with save.
+    Iteration reads videos by batches, so that only a few are in memory at once."""
+
+    BATCH_SIZE = 500
+
+    def __init__(self, fpath: pathlib.Path, videos=None):
+        self.fpath = fpath
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            fpath, isolation_level=None, check_same_thread=False
+        )
+        # a scratch file: durability is not needed
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos "
+            "(rank INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, data TEXT NOT NULL)"
+        )
+        super().__init__(videos)
+
+    def _execute(self, query, parameters=()):
+        with self._lock:
+            return self._conn.execute(query, parameters).fetchall()
+
+    @staticmethod
+    def _serialize(video):
+        return json.dumps(video.to_dict(), ensure_ascii=False)
+
+    def __len__(self):
+        return self._execute("SELECT COUNT(*) FROM videos")[0][0]
+
+    def __iter__(self):
+        rank = -1
+        while True:
+            rows = self._execute(
+                "SELECT rank, data FROM videos WHERE rank > ? ORDER BY rank LIMIT ?",
+                (rank, self.BATCH_SIZE),
+            )
+            for _, data in rows:
+                yield Video.from_dict(json.loads(data))
+            if len(rows) < self.BATCH_SIZE:
+                return
+            rank = rows[-1][0]
+
+    def __contains__(self, video_id):
+        return bool(self._execute("SELECT 1 FROM videos WHERE id = ?", (video_id,)))
+
+    def get(self, video_id) -> Video | None:
+        rows = self._execute("SELECT data FROM videos WHERE id = ?", (video_id,))
+        return Video.from_dict(json.loads(rows[0][0])) if rows else None
+
+    def add(self, video: Video) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO videos (id, data) VALUES (?, ?)",
+                    (video.id, self._serialize(video)),
+                ).rowcount
+                == 1
+            )
+
+    def save(self, video: Video):
+        self._execute(
+            "UPDATE videos SET data = ? WHERE id = ?",
+            (self._serialize(video), video.id),
+        )
+
+    def remove(self, video_id):
+        self._execute("DELETE FROM videos WHERE id = ?", (video_id,))
+
+    def close(self):
+        """close and delete the database file"""
+        with self._lock:
+            self._conn.close()
+        self.fpath.unlink(missing_ok=True)
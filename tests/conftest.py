@@ -0,0 +1,63 @@
+import http.server
+import threading
+
+import pytest
+
+from ted2zim.network import rate_limiter, retry_policy
+from ted2zim.videos import LocalizedText, Video
+
+
+@pytest.fixture(scope="session")
+def make_video():
+    """builder of Video with placeholder metadata"""
+
+    def make(video_id, lang="en", video_link="https://example.com/video.mp4"):
+        return Video(
+            id=video_id,
+            languages=[{"languageCode": lang, "languageName": lang.upper()}],
+            title=LocalizedText({lang: f"Title {video_id}"}),
+            description=LocalizedText({lang: f"Description {video_id}"}),
+            speaker="Speaker",
+            speaker_profession=None,
+            speaker_bio="-",
+            speaker_picture="-",
+            date="01 January 2020",
+            thumbnail="https://example.com/thumb.jpg",
+            video_link=video_link,
+            youtube_id=None,
+            length=10,
+            subtitles=[],
+            metadata_link=None,
+            native_talk_language=lang,
+        )
+
+    return make
+
+
+class LocalServer(http.server.ThreadingHTTPServer):
+    """HTTP server on localhost, lock being available to handlers"""
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+
+    def get_url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+@pytest.fixture
+def server(handler):
+    """LocalServer running the module's handler fixture
+
+    Rate limits and retry delays are disabled while it runs"""
+
+    server = LocalServer(handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    rate_limiter.configure(rate=0)
+    retry_policy.configure(base_delay=0)
+    yield server
+    rate_limiter.configure()
+    retry_policy.configure()
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+import requests
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+
+from ted2zim.async_discovery import AsyncDiscoveryEngine  # noqa: E402
+from ted2zim.network import rate_limiter, retry_policy  # noqa: E402
+
+
+@pytest.fixture
+def engine_factory():
+    engines = []
+
+    def factory(fetch, concurrency):
+        engines.append(AsyncDiscoveryEngine(fetch, concurrency))
+        return engines[-1]
+
+    yield factory
+    for engine in engines:
+        engine.shutdown()
+
+
+def test_fetch_all_keeps_order_and_is_bounded(engine_factory):
+    running = 0
+    max_running = 0
+
+    async def fetch(url, _):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        # finish in reverse order of submission
+        await asyncio.sleep(0.001 * (50 - url))
+        running -= 1
+        return f"page-{url}"
+
+    engine = engine_factory(fetch, concurrency=20)
+    assert engine.fetch_all(range(50)) == [f"page-{index}" for index in range(50)]
+    assert max_running == 20
+    assert engine.fetch_all([]) == []
+
+
+def test_fetch_all_coalesces_and_shares_errors(engine_factory):
+    fetched = []
+
+    async def fetch(url, _):
+        fetched.append(url)
+        await asyncio.sleep(0.01)
+        if url == "error":
+            raise ValueError(url)
+        return {"url": url}
+
+    engine = engine_factory(fetch, concurrency=4)
+    results = engine.fetch_all(["a", "a", "b", "a"])
+    assert sorted(fetched) == ["a", "b"]
+    assert engine.nb_coalesced == 2
+    assert results[0] is results[1] is results[3]
+
+    with pytest.raises(ValueError, match="error"):
+        engine.fetch_all(["c", "error", "error"])
+    # nothing left in flight, a new fetch is attempted
+    with pytest.raises(ValueError, match="error"):
+        engine.fetch_once("error")
+    assert fetched.count("error") == 2
+
+
+def test_submit_all_coalesces_and_keeps_order(engine_factory):
+    fetched = []
+
+    async def fetch(url, _):
+        fetched.append(url)
+        await asyncio.sleep(0.001 * (5 - len(url)))
+        return {"url": url}
+
+    engine = engine_factory(fetch, concurrency=4)
+    futures = engine.submit_all(["a", "bb", "a", "ccc"])
+    results = [future.result() for future in futures]
+    assert [result["url"] for result in results] == ["a", "bb", "a", "ccc"]
+    assert sorted(fetched) == ["a", "bb", "ccc"]
+    assert results[0] is results[2]
+    assert engine.submit_all([]) == []
+
+
+@pytest.fixture
+def server_url(engine_factory):
+    calls = []
+
+    async def handle(request):
+        name = request.match_info["name"]
+        calls.append(name)
+        if name == "missing":
+            return web.Response(status=404)
+        if name == "flaky" and calls.count(name) == 1:
+            return web.Response(status=503)
+        return web.Response(text=f"<html>{name}</html>", content_type="text/html")
+
+    async def start():
+        app = web.Application()
+        app.router.add_get("/{name}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]  # pyright: ignore
+
+    # the server is run by the loop of an engine of its own
+    loop_engine = engine_factory(None, concurrency=1)
+    runner, port = loop_engine.run(start())
+    rate_limiter.configure(rate=0)
+    retry_policy.configure(base_delay=0)
+    yield f"http://127.0.0.1:{port}", calls
+    rate_limiter.configure()
+    retry_policy.configure()
+    loop_engine.run(runner.cleanup())
+
+
+def test_get(engine_factory, server_url):
+    url, calls = server_url
+
+    async def fetch(url, get):
+        return await get(url)
+
+    engine = engine_factory(fetch, concurrency=2)
+    response = engine.fetch_once(f"{url}/talk")
+    assert response.status_code == 200
+    assert response.text == "<html>talk</html>"
+    assert response.headers["Content-Type"].startswith("text/html")
+
+    # retried
+    assert engine.fetch_once(f"{url}/flaky").text == "<html>flaky</html>"
+    assert calls.count("flaky") == 2
+
+    # not retried
+    with pytest.raises(requests.HTTPError):
+        engine.fetch_once(f"{url}/missing")
+    assert calls.count("missing") == 1
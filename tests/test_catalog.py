@@ -0,0 +1,74 @@
+import pytest
+
+from ted2zim.catalog import HIT, PAGE, TalkCatalog
+
+URL = "https://www.ted.com/talks/some_talk"
+FR_URL = f"{URL}?language=fr"
+DATA = {"id": "1", "language": "en", "playerData": {"languages": []}}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "catalog.db"
+
+
+def fill(db_path):
+    catalog = TalkCatalog(db_path)
+    assert not catalog.check_freshness(URL, ["en", "fr"], HIT)
+    catalog.save_page(URL, DATA)
+    catalog.save_page(FR_URL, None)
+    catalog.close()
+
+
+def test_unknown_talk_is_fetched(db_path):
+    catalog = TalkCatalog(db_path)
+    assert catalog.get_page(URL) == (False, None)
+    assert not catalog.check_freshness(URL, ["en"], PAGE)
+
+
+def test_fresh_talk_pages(db_path):
+    fill(db_path)
+    catalog = TalkCatalog(db_path)
+    # not checked yet
+    assert catalog.get_page(URL) == (False, None)
+    assert catalog.check_freshness(URL, ["fr", "en"], HIT)
+    assert catalog.get_page(URL) == (True, DATA)
+    # known not to be translated
+    assert catalog.get_page(FR_URL) == (True, None)
+    assert catalog.get_page(f"{URL}?language=de") == (False, None)
+    assert catalog.hits == 2
+
+
+@pytest.mark.parametrize(
+    "languages, source, max_age",
+    [
+        pytest.param(["en", "fr", "de"], HIT, 30, id="new-language"),
+        pytest.param(["en", "fr"], HIT, 0, id="expired"),
+        pytest.param(["en", "fr"], PAGE, 30, id="unknown-source"),
+    ],
+)
+def test_stale_talk_pages(db_path, languages, source, max_age):
+    fill(db_path)
+    catalog = TalkCatalog(db_path, max_age=max_age)
+    assert not catalog.check_freshness(URL, languages, source)
+    assert catalog.get_page(URL) == (False, None)
+    assert catalog.refreshed == 1
+
+    # pages fetched during this run are used in later runs
+    catalog.save_page(URL, DATA)
+    catalog.close()
+    catalog = TalkCatalog(db_path)
+    assert catalog.check_freshness(URL, languages, source)
+    assert catalog.get_page(URL) == (True, DATA)
+
+
+def test_other_source_recorded_once_fresh(db_path):
+    fill(db_path)
+    catalog = TalkCatalog(db_path)
+    assert catalog.check_freshness(URL, ["en", "fr"], HIT)
+    assert catalog.check_freshness(URL, ["en"], PAGE)
+    assert catalog.get_page(URL) == (True, DATA)
+    catalog.close()
+
+    catalog = TalkCatalog(db_path)
+    assert catalog.check_freshness(URL, ["en"], PAGE)
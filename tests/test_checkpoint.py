@@ -0,0 +1,73 @@
+import pytest
+
+from ted2zim.checkpoint import Checkpoint
+from ted2zim.videos import ENCODED, VideoRegistry
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    return Checkpoint(
+        build_dir / "ted_videos.json", build_dir / "ted_topics.json", interval=3600
+    )
+
+
+def test_save_discovery_and_load(checkpoint, make_video):
+    assert not checkpoint.exists
+    videos = VideoRegistry([make_video("1"), make_video("2")])
+    checkpoint.save_discovery(videos, {"topics": ["science"]})
+    assert checkpoint.exists
+
+    videos.get("1").done.append(ENCODED)  # pyright: ignore
+    checkpoint.save(videos, force=True)
+    loaded, state = checkpoint.load()
+    assert state == {"topics": ["science"]}
+    assert loaded.to_list() == videos.to_list()
+    assert loaded.get("1").done == [ENCODED]  # pyright: ignore
+
+
+def test_save_is_throttled(checkpoint, make_video):
+    videos = VideoRegistry([make_video("1")])
+    checkpoint.save_discovery(videos, {})
+    videos.get("1").done.append(ENCODED)  # pyright: ignore
+    checkpoint.save(videos)
+    assert checkpoint.load()[0].get("1").done == []  # pyright: ignore
+    checkpoint.save(videos, force=True)
+    assert checkpoint.load()[0].get("1").done == [ENCODED]  # pyright: ignore
+
+
+def test_disable(checkpoint, make_video):
+    videos = VideoRegistry([make_video("1")])
+    checkpoint.save_discovery(videos, {})
+    checkpoint.disable()
+    videos.add(make_video("2"))
+    checkpoint.save(videos, force=True)
+    assert len(checkpoint.load()[0]) == 1
+
+
+def test_set_aside(checkpoint, make_video):
+    checkpoint.save_discovery(VideoRegistry([make_video("1")]), {})
+    build_dir = checkpoint.videos_path.parent
+    video_dir = build_dir / "videos" / "1"
+    video_dir.mkdir(parents=True)
+    (video_dir / "video.mp4").write_bytes(b"partial")
+
+    with checkpoint.set_aside([video_dir]):
+        assert not checkpoint.videos_path.exists()
+        assert not checkpoint.discovery_path.exists()
+        assert not video_dir.exists()
+        assert (build_dir / "videos").exists()
+
+    assert checkpoint.exists
+    assert (video_dir / "video.mp4").read_bytes() == b"partial"
+    # holding directory has been removed
+    assert [path.name for path in build_dir.parent.iterdir()] == ["build"]
+
+
+def test_save_ignored_until_discovered(checkpoint, make_video):
+    videos = VideoRegistry([make_video("1")])
+    checkpoint.save(videos, force=True)
+    assert not checkpoint.videos_path.exists()
+    checkpoint.save_discovery(videos, {})
+    assert checkpoint.exists
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from ted2zim.discovery import DiscoveryEngine
+
+
+def test_fetch_all_keeps_order():
+    def fetch(url):
+        # finish in reverse order of submission
+        time.sleep(0.01 * (5 - int(url)))
+        return f"page-{url}"
+
+    engine = DiscoveryEngine(fetch, concurrency=5)
+    try:
+        assert engine.fetch_all(str(index) for index in range(5)) == [
+            f"page-{index}" for index in range(5)
+        ]
+    finally:
+        engine.shutdown()
+
+
+def test_fetch_all_is_bounded():
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def fetch(url):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return url
+
+    engine = DiscoveryEngine(fetch, concurrency=3)
+    try:
+        assert engine.fetch_all(range(20)) == list(range(20))
+    finally:
+        engine.shutdown()
+    assert 1 < max_running <= 3
+
+
+def test_fetch_all_empty():
+    assert DiscoveryEngine(lambda url: url, concurrency=2).fetch_all([]) == []
+
+
+def test_fetch_all_coalesces_in_flight_urls():
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        time.sleep(0.05)
+        return {"url": url}
+
+    engine = DiscoveryEngine(fetch, concurrency=4)
+    try:
+        results = engine.fetch_all(["a", "a", "b", "a"])
+    finally:
+        engine.shutdown()
+    assert sorted(fetched) == ["a", "b"]
+    assert engine.nb_coalesced == 2
+    # coalesced calls share the result
+    assert results[0] is results[1] is results[3]
+    assert results[2] == {"url": "b"}
+
+
+def test_fetch_once_shares_errors():
+    def fetch(url):
+        time.sleep(0.05)
+        raise ValueError(url)
+
+    engine = DiscoveryEngine(fetch, concurrency=2)
+    try:
+        with pytest.raises(ValueError, match="a"):
+            engine.fetch_all(["a", "a"])
+    finally:
+        engine.shutdown()
+    # nothing left in flight, a new fetch is attempted
+    with pytest.raises(ValueError, match="a"):
+        engine.fetch_once("a")
+
+
+def test_submit_all_returns_futures_in_order():
+    def fetch(url):
+        # finish in reverse order of submission
+        time.sleep(0.01 * (5 - int(url)))
+        return f"page-{url}"
+
+    engine = DiscoveryEngine(fetch, concurrency=5)
+    try:
+        futures = engine.submit_all(str(index) for index in range(5))
+        assert [future.result() for future in futures] == [
+            f"page-{index}" for index in range(5)
+        ]
+        assert engine.submit_all([]) == []
+    finally:
+        engine.shutdown()
+
+
+def make_search_query(nb_hits, per_page, *, with_nb_pages=True):
+    queried = []
+
+    def query(page):
+        queried.append(page)
+        hits = list(range(nb_hits))[page * per_page : (page + 1) * per_page]
+        result = {"hits": hits, "page": page}
+        if with_nb_pages:
+            result["nbPages"] = (nb_hits + per_page - 1) // per_page
+        return {"results": [result]}
+
+    return query, queried
+
+
+def test_paginate_uses_page_count():
+    query, queried = make_search_query(nb_hits=10, per_page=3)
+    engine = DiscoveryEngine(lambda url: url, concurrency=3)
+    try:
+        pages = [result["results"][0]["hits"] for result in engine.paginate(query)]
+    finally:
+        engine.shutdown()
+    assert pages == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    # no extra empty page was requested
+    assert sorted(queried) == [0, 1, 2, 3]
+
+
+def test_paginate_without_page_count():
+    query, queried = make_search_query(nb_hits=5, per_page=3, with_nb_pages=False)
+    engine = DiscoveryEngine(lambda url: url, concurrency=3)
+    try:
+        pages = [result["results"][0]["hits"] for result in engine.paginate(query)]
+    finally:
+        engine.shutdown()
+    assert pages == [[0, 1, 2], [3, 4], []]
+    assert queried == [0, 1, 2]
@@ -0,0 +1,188 @@
+import http.server
+import os
+
+import pytest
+from zimscraperlib.video.presets import VideoMp4Low, VideoWebmLow
+
+from ted2zim.hls import (
+    HlsDownloader,
+    HlsError,
+    parse_master_playlist,
+    parse_media_playlist,
+    select_variant,
+)
+from ted2zim.network import rate_limiter
+
+MASTER_PLAYLIST = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="audio",NAME="en",DEFAULT=YES,URI="audio/en.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=180000,RESOLUTION=320x180,CODECS="avc1.42c00d",AUDIO="audio"
+180k/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=320000,RESOLUTION=512x288,CODECS="avc1.42c015",AUDIO="audio"
+320k/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=950000,RESOLUTION=1280x720,CODECS="avc1.4d401f",AUDIO="audio"
+https://cdn.example.com/950k/index.m3u8
+"""
+
+MEDIA_PLAYLIST = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:6.0,
+segment0.m4s
+#EXTINF:6.0,
+segment1.m4s
+#EXTINF:2.5,
+segment2.m4s
+#EXT-X-ENDLIST
+"""
+
+SEGMENTS = {
+    f"/{name}": os.urandom(1000)
+    for name in ("init.mp4", *[f"segment{i}.m4s" for i in range(3)])
+}
+
+
+def test_parse_master_playlist():
+    variants, media = parse_master_playlist(
+        MASTER_PLAYLIST, "https://hls.example.com/talk/master.m3u8"
+    )
+    assert [variant["bandwidth"] for variant in variants] == [180000, 320000, 950000]
+    assert [variant["uri"] for variant in variants] == [
+        "https://hls.example.com/talk/180k/index.m3u8",
+        "https://hls.example.com/talk/320k/index.m3u8",
+        "https://cdn.example.com/950k/index.m3u8",
+    ]
+    assert variants[0]["CODECS"] == "avc1.42c00d"
+    assert variants[0]["AUDIO"] == "audio"
+    assert media == [
+        {
+            "TYPE": "AUDIO",
+            "GROUP-ID": "audio",
+            "NAME": "en",
+            "DEFAULT": "YES",
+            "URI": "https://hls.example.com/talk/audio/en.m3u8",
+        }
+    ]
+
+
+def test_parse_media_playlist():
+    assert parse_media_playlist(MEDIA_PLAYLIST, "https://example.com/a/index.m3u8") == (
+        "https://example.com/a/init.mp4",
+        [f"https://example.com/a/segment{index}.m4s" for index in range(3)],
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        pytest.param(
+            '#EXTM3U\n#EXT-X-KEY:METHOD=AES-128,URI="key"\n#EXTINF:6.0,\na.ts\n',
+            id="encrypted",
+        ),
+        pytest.param(
+            "#EXTM3U\n#EXTINF:6.0,\n#EXT-X-BYTERANGE:1000@0\na.ts\n", id="byterange"
+        ),
+        pytest.param("#EXTM3U\n#EXT-X-ENDLIST\n", id="empty"),
+    ],
+)
+def test_parse_media_playlist_unsupported(text):
+    with pytest.raises(HlsError):
+        parse_media_playlist(text, "https://example.com/index.m3u8")
+
+
+@pytest.mark.parametrize(
+    "video_format, low_quality, expected_bandwidth",
+    [
+        pytest.param("mp4", False, 950000, id="kept-as-is"),
+        pytest.param("mp4", True, 320000, id="within-target"),
+        pytest.param("webm", True, 320000, id="reencoded"),
+    ],
+)
+def test_select_variant(video_format, low_quality, expected_bandwidth):
+    variants, _ = parse_master_playlist(MASTER_PLAYLIST, "https://example.com/")
+    preset = {"mp4": VideoMp4Low}.get(video_format, VideoWebmLow)()
+    variant = select_variant(variants, preset, video_format, low_quality)
+    assert variant is not None
+    assert variant["bandwidth"] == expected_bandwidth
+    assert select_variant([], preset, video_format, low_quality) is None
+
+
+class HlsHandler(http.server.BaseHTTPRequestHandler):
+    """serves playlists and SEGMENTS, failing the first request to server.fail_at"""
+
+    def do_GET(self):  # noqa: N802
+        if self.path in self.server.fail_at:  # pyright: ignore
+            self.server.fail_at.remove(self.path)  # pyright: ignore
+            self.send_error(503)
+            return
+        if self.path == "/master.m3u8":
+            body = MASTER_PLAYLIST.encode()
+        elif self.path.endswith(".m3u8"):
+            body = MEDIA_PLAYLIST.replace('"init.mp4"', '"/init.mp4"').encode()
+            body = body.replace(b"\nsegment", b"\n/segment")
+        elif self.path in SEGMENTS:
+            body = SEGMENTS[self.path]
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:  # pyright: ignore
+            self.server.requested.append(self.path)  # pyright: ignore
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def handler():
+    return HlsHandler
+
+
+@pytest.fixture
+def server(server):
+    server.fail_at = set()  # pyright: ignore
+    server.requested = []  # pyright: ignore
+    return server
+
+
+def test_get_tracks(server):
+    downloader = HlsDownloader(VideoMp4Low(), "mp4", low_quality=True)
+    assert downloader.get_tracks(server.get_url("/master.m3u8")) == [
+        server.get_url("/320k/index.m3u8"),
+        server.get_url("/audio/en.m3u8"),
+    ]
+
+
+def test_download_track(server, tmp_path):
+    server.fail_at.add("/segment1.m4s")
+    track_path = tmp_path / "track0"
+    HlsDownloader(VideoMp4Low(), "mp4", low_quality=True).download_track(
+        server.get_url("/320k/index.m3u8"), track_path
+    )
+    assert track_path.read_bytes() == b"".join(SEGMENTS.values())
+    assert not server.fail_at
+
+
+def test_download_track_resumes_kept_segments(server, tmp_path):
+    track_path = tmp_path / "track0"
+    # init section and first segment of a previous attempt
+    (tmp_path / "track0-00000").write_bytes(SEGMENTS["/init.mp4"])
+    (tmp_path / "track0-00001").write_bytes(SEGMENTS["/segment0.m4s"])
+    HlsDownloader(VideoMp4Low(), "mp4", low_quality=True).download_track(
+        server.get_url("/320k/index.m3u8"), track_path
+    )
+    assert track_path.read_bytes() == b"".join(SEGMENTS.values())
+    assert "/init.mp4" not in server.requested
+    assert "/segment0.m4s" not in server.requested
+
+
+def test_download_segments_not_rate_limited(server, tmp_path):
+    # a single request every 100s for cdn hosts
+    rate_limiter.configure(rate=0.01, burst=1)
+    for index, path in enumerate(SEGMENTS):
+        HlsDownloader.download_segment(
+            server.get_url(path), tmp_path / f"track0-{index:05}"
+        )
+    assert sorted(server.requested) == sorted(SEGMENTS)
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+import requests
+
+from ted2zim.http_cache import HttpCache
+
+
+def make_response(url, content, headers=None):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache()
+    cache.configure(tmp_path, ttls={"pages": 60, "cdn": 0})
+    return cache
+
+
+def test_store_and_get(cache):
+    url = "https://www.ted.com/talks/a"
+    assert cache.get(url) is None
+    cache.store(url, None, make_response(url, b"<html/>", {"ETag": '"abc"'}))
+    entry = cache.get(url)
+    assert entry
+    assert cache.is_fresh(entry, "pages")
+    assert not cache.is_fresh(entry, "cdn")
+    assert entry.validators == {"If-None-Match": '"abc"'}
+    response = entry.to_response()
+    assert response.content == b"<html/>"
+    assert response.text == "<html/>"
+    assert response.headers["etag"] == '"abc"'
+
+
+def test_key_depends_on_body(cache):
+    url = "https://search.example.com/api"
+    cache.store(url, [{"page": 0}], make_response(url, b"page0"))
+    assert cache.get(url, [{"page": 1}]) is None
+    assert cache.get(url, [{"page": 0}]).to_response().content == b"page0"
+
+
+def test_persistent(cache, tmp_path):
+    url = "https://www.ted.com/talks/a"
+    cache.store(url, None, make_response(url, b"data"))
+    other = HttpCache()
+    other.configure(tmp_path)
+    assert other.get(url).to_response().content == b"data"
+
+
+def test_lru_eviction(tmp_path):
+    cache = HttpCache()
+    cache.configure(tmp_path, max_size=2500 / 2**20)
+    for name in ("a", "b"):
+        cache.store(name, None, make_response(name, b"x" * 1000))
+    time.sleep(0.01)
+    cache.use(cache.get("a"))  # b is now the least recently used
+    cache.store("c", None, make_response("c", b"x" * 1000))
+    assert cache.get("a")
+    assert cache.get("b") is None
+    assert cache.get("c")
+
+
+def test_discard(cache):
+    url = "https://www.ted.com/talks/a"
+    cache.store(url, None, make_response(url, b"<html/>"))
+    cache.discard(url)
+    assert cache.get(url) is None
+    # unknown entries are ignored
+    cache.discard(url)
+
+
+def test_lookup_and_resolve(cache):
+    url = "https://www.ted.com/talks/a"
+    assert cache.lookup(url) == (None, None)
+    assert cache.resolve(url, None, make_response(url, b"v1"), None).content == b"v1"
+    response, entry = cache.lookup(url)
+    assert response.content == b"v1"  # pyright: ignore
+    # stale entries are revalidated
+    cdn_url = "https://cdn.example.com/a"
+    cache.store(cdn_url, None, make_response(cdn_url, b"v1"))
+    response, entry = cache.lookup(cdn_url)
+    assert response is None
+    assert entry
+    not_modified = make_response(cdn_url, b"")
+    not_modified.status_code = 304
+    assert cache.resolve(cdn_url, None, not_modified, entry).content == b"v1"
+    assert cache.revalidated == 1
+    error = make_response(cdn_url, b"")
+    error.status_code = 500
+    with pytest.raises(requests.HTTPError):
+        cache.resolve(cdn_url, None, error, entry)
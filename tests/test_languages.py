@@ -73,3 +73,31 @@ def test_to_ted_languages(input_languages, expected_languages):
 )
 def test_ted_to_iso639_3_langcodes(input_languages, expected_mapping):
     assert tedlang.ted_to_iso639_3_langcodes(input_languages) == expected_mapping
+
+
+@pytest.mark.parametrize(
+    "lang_code, lang_name, expected",
+    [
+        pytest.param("fr", "French", "français - French", id="native"),
+        pytest.param("en", "English", "English", id="english"),
+        pytest.param("fake", "Fake", "Fake", id="not_existing"),
+    ],
+)
+def test_get_display_name(lang_code, lang_name, expected):
+    assert tedlang.get_display_name(lang_code, lang_name) == expected
+
+
+def test_lookups_are_memoized(monkeypatch):
+    queries = []
+
+    def get_language_details(query, **_):
+        queries.append(query)
+
+    tedlang.get_language_info.cache_clear()
+    monkeypatch.setattr(tedlang, "get_language_details", get_language_details)
+    try:
+        for _ in range(3):
+            tedlang.get_language_info("xx")
+        assert queries == ["xx"]
+    finally:
+        tedlang.get_language_info.cache_clear()
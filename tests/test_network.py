@@ -0,0 +1,172 @@
+import asyncio
+import time
+
+import pytest
+
+from ted2zim.constants import SEARCH_URL
+from ted2zim.network import (
+    RateLimiter,
+    RetryPolicy,
+    TokenBucket,
+    parse_per_host_values,
+    parse_retry_after,
+)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        pytest.param("10", (10, {}), id="default_only"),
+        pytest.param(
+            "10,www.ted.com=20", (10, {"www.ted.com": 20}), id="default_and_host"
+        ),
+        pytest.param("www.ted.com=20", (None, {"www.ted.com": 20}), id="host_only"),
+        pytest.param(
+            " 4 , a.ted.com = 1,b.ted.com=2 ",
+            (4, {"a.ted.com": 1, "b.ted.com": 2}),
+            id="spaces",
+        ),
+        pytest.param("", (None, {}), id="empty"),
+    ],
+)
+def test_parse_per_host_values(value, expected):
+    assert parse_per_host_values(value, int) == expected
+
+
+def test_parse_per_host_values_invalid():
+    with pytest.raises(ValueError):
+        parse_per_host_values("www.ted.com=many", int)
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        pytest.param("https://www.ted.com/talks/some_talk", "pages", id="talk"),
+        pytest.param("https://ted.com/playlists/57", "pages", id="playlist"),
+        pytest.param(
+            "https://www.ted.com/talks/subtitles/id/1/lang/fr", "subtitles", id="subs"
+        ),
+        pytest.param(SEARCH_URL, "search", id="search"),
+        pytest.param("https://hls.ted.com/talks/1/metadata.json", "cdn", id="hls"),
+        pytest.param("https://py.tedcdn.com/video.mp4", "cdn", id="cdn"),
+    ],
+)
+def test_get_host_class(url, expected):
+    assert RateLimiter.get_host_class(url) == expected
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(12):
+        bucket.acquire()
+    # 2 tokens available at once, then 10 more at 50 per second
+    assert 0.18 <= time.monotonic() - start < 1
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert sum(bucket.acquire() for _ in range(100)) == 0
+
+
+def test_rate_limiter_unknown_class():
+    with pytest.raises(ValueError):
+        RateLimiter().configure(rates={"youtube": 1})
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def policy():
+    policy = RetryPolicy()
+    policy.configure(max_attempts=5, base_delay=2, max_delay=10, budget=3)
+    return policy
+
+
+def test_retry_policy_backoff_is_capped_with_jitter(policy):
+    for attempt, delay in ((1, 2), (2, 4), (3, 8), (4, 10), (10, 10)):
+        assert delay / 2 <= policy.get_delay(attempt) <= delay
+
+
+def test_retry_policy_honours_retry_after(policy):
+    assert policy.get_delay(1, FakeResponse(429, {"Retry-After": "7"})) == 7
+    assert policy.get_delay(1, FakeResponse(503, {"Retry-After": "60"})) == 10
+    # Retry-After is only used on throttling responses
+    assert policy.get_delay(1, FakeResponse(500, {"Retry-After": "7"})) <= 2
+
+
+def test_retry_policy_budget(policy):
+    assert [policy.consume(1) for _ in range(4)] == [True, True, True, False]
+    assert policy.budget_exhausted
+
+
+def test_retry_policy_limits(policy):
+    assert not policy.consume(5)
+    assert not policy.consume(1, FakeResponse(404))
+    assert policy.consume(1, FakeResponse(429))
+    assert policy.consume(1, FakeResponse(500))
+
+
+def test_retry_policy_unlimited_budget(policy):
+    policy.configure(budget=-1)
+    assert all(policy.consume(1) for _ in range(1000))
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.response = FakeResponse(status_code)
+
+
+def failing(*errors):
+    """function raising errors, one per call, then returning the number of calls"""
+    calls = []
+
+    def func():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return len(calls)
+
+    return func
+
+
+def test_retry_policy_run(policy):
+    policy.configure(base_delay=0)
+    assert policy.run(failing(OSError(), FakeHTTPError(500)), "a") == 3
+    assert policy.retries == 2
+    with pytest.raises(FakeHTTPError):
+        policy.run(failing(FakeHTTPError(404)), "a")
+    with pytest.raises(ValueError):
+        policy.run(failing(ValueError()), "a", fatal=(ValueError,))
+    with pytest.raises(ConnectionRefusedError, match="after 5 attempts"):
+        policy.run(failing(*[OSError()] * 5), "a")
+    assert policy.retries == 6
+
+
+def test_retry_policy_run_async(policy):
+    policy.configure(base_delay=0)
+
+    sync_func = failing(OSError())
+
+    async def func():
+        return sync_func()
+
+    assert asyncio.run(policy.run_async(func, "a")) == 2
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        pytest.param("120", 120, id="seconds"),
+        pytest.param("Wed, 21 Oct 2015 07:28:00 GMT", 0, id="past_date"),
+        pytest.param("", None, id="empty"),
+        pytest.param("soon", None, id="invalid"),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
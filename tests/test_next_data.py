@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from ted2zim.next_data import (
+    NextDataNotFoundError,
+    extract_video_data,
+    extract_video_data_from_soup,
+    find_next_data,
+)
+
+VIDEO_DATA = {
+    "id": "1234",
+    "language": "en",
+    "title": "A </b> title with é",
+    "playerData": json.dumps({"languages": [], "videoData": "not this one"}),
+}
+
+
+def make_page(next_data, *, separators=(",", ":"), attrs='type="application/json"'):
+    payload = json.dumps(next_data, separators=separators).replace("<", "\\u003c")
+    return (
+        '<html><head><script src="app.js"></script></head><body>'
+        '<p>uses id="__NEXT_DATA__" in text</p>'
+        f'<script id="__NEXT_DATA__" {attrs}>{payload}</script>'
+        "<script>var x = 1;</script></body></html>"
+    ).encode()
+
+
+@pytest.mark.parametrize(
+    "next_data",
+    [
+        pytest.param({"props": {"pageProps": {"videoData": VIDEO_DATA}}}, id="simple"),
+        pytest.param(
+            {
+                "buildId": "abc",
+                "props": {
+                    "pageProps": {
+                        "related": {"videoData": {"id": "other"}},
+                        "videoData": VIDEO_DATA,
+                    }
+                },
+            },
+            id="decoy",
+        ),
+    ],
+)
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_extract_video_data(next_data, separators):
+    page = make_page(next_data, separators=separators)
+    assert extract_video_data(page) == VIDEO_DATA
+    assert extract_video_data_from_soup(page.decode("utf-8")) == VIDEO_DATA
+
+
+def test_extract_video_data_missing_script():
+    page = b"<html><body><p>__NEXT_DATA__</p></body></html>"
+    assert find_next_data(page) is None
+    assert extract_video_data(page) is None
+    with pytest.raises(NextDataNotFoundError):
+        extract_video_data_from_soup(page.decode("utf-8"))
+
+
+def test_extract_video_data_missing_video_data():
+    page = make_page({"props": {"pageProps": {}}})
+    with pytest.raises(KeyError):
+        extract_video_data(page)
+    with pytest.raises(KeyError):
+        extract_video_data_from_soup(page.decode("utf-8"))
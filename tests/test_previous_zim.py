@@ -0,0 +1,77 @@
+import pytest
+from PIL import Image
+from zimscraperlib.zim import make_zim_file
+
+from ted2zim.previous_zim import PreviousZim, write_videos_info
+
+
+@pytest.fixture(scope="module")
+def previous_zim_path(tmp_path_factory, make_video):
+    build_dir = tmp_path_factory.mktemp("build")
+    (build_dir / "index").write_text("<html></html>")
+    Image.new("RGB", (48, 48)).save(build_dir / "favicon.png")
+    video_dir = build_dir / "videos" / "1"
+    (video_dir / "subs").mkdir(parents=True)
+    (video_dir / "video.webm").write_bytes(b"video 1")
+    (video_dir / "thumbnail.webp").write_bytes(b"thumbnail 1")
+    (video_dir / "subs" / "subs_en.vtt").write_text("WEBVTT")
+    write_videos_info(
+        build_dir,
+        [make_video("1", video_link="https://example.com/1.mp4")],
+        "webm",
+        "low",
+        3,
+    )
+    fpath = tmp_path_factory.mktemp("output") / "previous.zim"
+    make_zim_file(
+        build_dir=build_dir,
+        fpath=fpath,
+        name="test",
+        main_page="index",
+        illustration="favicon.png",
+        title="Test",
+        description="Test",
+        disable_metadata_checks=True,
+    )
+    return fpath
+
+
+def test_reuse_video(previous_zim_path, tmp_path, make_video):
+    previous_zim = PreviousZim(previous_zim_path, "webm", "low", 3)
+    video = make_video("1", video_link="https://example.com/1.mp4")
+    assert previous_zim.copy_video(video, tmp_path / "1")
+    assert (tmp_path / "1" / "video.webm").read_bytes() == b"video 1"
+    assert (tmp_path / "1" / "thumbnail.webp").read_bytes() == b"thumbnail 1"
+    # missing in previous ZIM
+    assert not (tmp_path / "1" / "speaker.webp").exists()
+    assert previous_zim.nb_reused == 1
+
+    assert previous_zim.has_subtitles(video, ["en"])
+    assert not previous_zim.has_subtitles(video, ["en", "fr"])
+    assert previous_zim.copy_subtitles(video, "en", tmp_path / "subs_en.vtt")
+    assert (tmp_path / "subs_en.vtt").read_text() == "WEBVTT"
+    assert not previous_zim.copy_subtitles(video, "fr", tmp_path / "subs_fr.vtt")
+
+
+@pytest.mark.parametrize(
+    "video_id, video_link, encoding",
+    [
+        pytest.param(
+            "1", "https://example.com/1-new.mp4", ("webm", "low", 3), id="changed"
+        ),
+        pytest.param("2", "https://example.com/2.mp4", ("webm", "low", 3), id="new"),
+        pytest.param("1", "https://example.com/1.mp4", ("webm", "low", 4), id="preset"),
+        pytest.param(
+            "1", "https://example.com/1.mp4", ("webm", "high", 3), id="quality"
+        ),
+    ],
+)
+def test_no_reuse(
+    previous_zim_path, tmp_path, make_video, video_id, video_link, encoding
+):
+    video = make_video(video_id, video_link=video_link)
+    previous_zim = PreviousZim(previous_zim_path, *encoding)
+    assert not previous_zim.has_video(video)
+    assert not previous_zim.copy_video(video, tmp_path / "1")
+    assert not previous_zim.copy_subtitles(video, "en", tmp_path / "subs_en.vtt")
+    assert not list(tmp_path.iterdir())
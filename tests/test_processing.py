@@ -0,0 +1,59 @@
+import pytest
+from zimscraperlib.video.presets import VideoMp4Low, VideoWebmLow
+
+from ted2zim.processing import (
+    estimate_bytes_saved,
+    get_target_bitrate,
+    select_rendition,
+)
+
+RENDITIONS = [
+    {"bitrate": 320, "file": "https://example.com/320k.mp4"},
+    {"bitrate": 64, "file": "https://example.com/64k.mp4"},
+    {"bitrate": 180, "file": "https://example.com/180k.mp4"},
+    {"bitrate": 950, "file": "https://example.com/950k.mp4"},
+    {"bitrate": 450, "file": "https://example.com/450k.mp4"},
+]
+
+
+def test_get_target_bitrate():
+    assert get_target_bitrate(VideoMp4Low()) == 348
+    assert get_target_bitrate(VideoWebmLow()) == 188
+
+
+@pytest.mark.parametrize(
+    "renditions, video_format, low_quality, expected_bitrate",
+    [
+        pytest.param(RENDITIONS, "mp4", False, 320, id="kept-as-is"),
+        pytest.param(RENDITIONS, "mp4", True, 320, id="within-target"),
+        pytest.param(RENDITIONS[3:], "mp4", True, 450, id="lightest-above-target"),
+        pytest.param(RENDITIONS, "webm", True, 320, id="reencoded"),
+        pytest.param(RENDITIONS, "webm", False, 320, id="reencoded-high"),
+        pytest.param(RENDITIONS[1:3], "webm", True, 180, id="closest-below-target"),
+        pytest.param(
+            [{"file": "https://example.com/a.mp4"}, {"bitrate": 64}],
+            "webm",
+            True,
+            None,
+            id="unknown-bitrates",
+        ),
+    ],
+)
+def test_select_rendition(renditions, video_format, low_quality, expected_bitrate):
+    preset = {"mp4": VideoMp4Low}.get(video_format, VideoWebmLow)()
+    rendition = select_rendition(renditions, preset, video_format, low_quality)
+    assert rendition is not None
+    assert rendition.get("bitrate") == expected_bitrate
+
+
+def test_select_rendition_without_file():
+    assert select_rendition([{"bitrate": 64}], VideoWebmLow(), "webm", True) is None
+    assert select_rendition([], VideoWebmLow(), "webm", True) is None
+
+
+def test_estimate_bytes_saved():
+    # 1 minute at 320-180=140 kbps
+    assert estimate_bytes_saved(RENDITIONS, RENDITIONS[2], 60) == 1_050_000
+    assert estimate_bytes_saved(RENDITIONS, RENDITIONS[0], 60) == 0
+    assert estimate_bytes_saved(RENDITIONS, RENDITIONS[3], 60) < 0
+    assert estimate_bytes_saved([{"file": "a"}], {"file": "a"}, 60) == 0
@@ -0,0 +1,121 @@
+import http.server
+import json
+import os
+import re
+
+import pytest
+
+from ted2zim.segmented_download import MIN_SEGMENT_SIZE, SegmentedDownloader
+
+CONTENT = os.urandom(3 * MIN_SEGMENT_SIZE + 123)
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """serves CONTENT, with byte ranges unless path is /no-ranges
+
+    Responses to ranges starting at an offset in server.drop_at are cut halfway,
+    once. Bytes sent are counted in server.nb_bytes_sent."""
+
+    def do_GET(self):  # noqa: N802
+        match = re.match(r"bytes=(\d+)-(\d+)$", self.headers.get("Range", ""))
+        if self.path == "/no-ranges" or not match:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(CONTENT)))
+            self.end_headers()
+            self.write(CONTENT)
+            return
+        start, end = int(match.group(1)), int(match.group(2))
+        body = CONTENT[start : end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(CONTENT)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        if start in self.server.drop_at:  # pyright: ignore
+            self.server.drop_at.remove(start)  # pyright: ignore
+            self.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.write(body)
+
+    def write(self, data):
+        # counted first, for the count to be complete once the client got data
+        with self.server.lock:  # pyright: ignore
+            self.server.nb_bytes_sent += len(data)  # pyright: ignore
+        self.wfile.write(data)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def handler():
+    return RangeHandler
+
+
+@pytest.fixture
+def server(server):
+    server.drop_at = set()  # pyright: ignore
+    server.nb_bytes_sent = 0  # pyright: ignore
+    return server
+
+
+def test_get_segments():
+    assert SegmentedDownloader(connections=4).get_segments(10) == [(0, 9)]
+    # at least MIN_SEGMENT_SIZE per segment
+    assert SegmentedDownloader(connections=4).get_segments(len(CONTENT)) == [
+        (0, 1048616),
+        (1048617, 2097233),
+        (2097234, 3145850),
+    ]
+    assert SegmentedDownloader(connections=2).get_segments(len(CONTENT)) == [
+        (0, 1572925),
+        (1572926, 3145850),
+    ]
+
+
+def test_download(server, tmp_path):
+    fpath = tmp_path / "video.mp4"
+    SegmentedDownloader(connections=4).download(server.get_url("/video.mp4"), fpath)
+    assert fpath.read_bytes() == CONTENT
+    assert not SegmentedDownloader.get_parts_dir(fpath).exists()
+
+
+def test_download_resumes_dropped_segments(server, tmp_path):
+    downloader = SegmentedDownloader(connections=4)
+    server.drop_at.update(
+        start for start, _ in downloader.get_segments(len(CONTENT)) if start
+    )
+    fpath = tmp_path / "video.mp4"
+    downloader.download(server.get_url("/video.mp4"), fpath)
+    assert fpath.read_bytes() == CONTENT
+    assert not server.drop_at
+    # only the 1 byte probe and the last incomplete chunks were sent twice
+    assert len(CONTENT) + 1 <= server.nb_bytes_sent <= len(CONTENT) + 1 + 2 * 2**16
+
+
+def test_download_resumes_kept_segments(server, tmp_path):
+    fpath = tmp_path / "video.mp4"
+    downloader = SegmentedDownloader(connections=2)
+    parts_dir = SegmentedDownloader.get_parts_dir(fpath)
+    # segments of a previous attempt, one of them partial
+    info = {
+        "url": server.get_url("/video.mp4"),
+        "size": len(CONTENT),
+        "etag": '"v1"',
+        "last_modified": None,
+    }
+    parts_dir.mkdir()
+    (parts_dir / "info.json").write_text(json.dumps(info))
+    (start, end), _ = downloader.get_segments(len(CONTENT))
+    (parts_dir / "0000").write_bytes(CONTENT[start : end // 2])
+
+    downloader.download(server.get_url("/video.mp4"), fpath)
+    assert fpath.read_bytes() == CONTENT
+    assert server.nb_bytes_sent == 1 + len(CONTENT) - end // 2
+
+
+def test_download_without_ranges(server, tmp_path):
+    fpath = tmp_path / "video.mp4"
+    SegmentedDownloader(connections=4).download(server.get_url("/no-ranges"), fpath)
+    assert fpath.read_bytes() == CONTENT
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from ted2zim.stages import StageStats, WorkerStage
+
+
+def test_worker_stage_processes_all_items():
+    lock = threading.Lock()
+    processed = []
+    running = 0
+    max_running = 0
+
+    def func(item):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        if item == 3:
+            raise ValueError(item)
+        with lock:
+            processed.append(item)
+
+    stage = WorkerStage("Test", func, workers=3, queue_size=2)
+    for item in range(10):
+        stage.put(item)
+    stage.join()
+    # errors do not stop the stage
+    assert sorted(processed) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert max_running == 3
+    assert stage.stats.nb_items == 10
+    assert not any(thread.is_alive() for thread in stage.threads)
+
+
+def test_worker_stage_queue_is_bounded():
+    release = threading.Event()
+    stage = WorkerStage("Test", lambda _: release.wait(), workers=1, queue_size=1)
+    stage.put(1)  # being processed
+    stage.put(2)  # queued
+    putter = threading.Thread(target=stage.put, args=(3,))
+    putter.start()
+    putter.join(timeout=0.1)
+    assert putter.is_alive()
+    release.set()
+    putter.join()
+    stage.join()
+    assert stage.stats.nb_items == 3
+
+
+def test_stage_stats():
+    stats = StageStats("Downloads", workers=2)
+    with stats.measure_busy():
+        time.sleep(0.05)
+    with stats.measure_waiting():
+        time.sleep(0.05)
+    stats.end()
+    assert stats.nb_items == 1
+    assert stats.busy >= 0.05
+    assert stats.waiting >= 0.05
+    assert str(stats).startswith("Downloads: 1 video(s) by 2 worker(s) in ")
+    assert "% busy, " in str(stats)
+    assert str(stats).endswith("% waiting for next stage")
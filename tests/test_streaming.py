@@ -0,0 +1,72 @@
+import http.server
+import struct
+
+import pytest
+
+from ted2zim.streaming import (
+    PROBE_SIZE,
+    StreamingError,
+    is_streamable,
+    stream_reencode,
+)
+
+
+def box(box_type, size=16):
+    return struct.pack(">I4s", size, box_type) + bytes(size - 8)
+
+
+FILES = {
+    "/faststart.mp4": box(b"ftyp") + box(b"moov") + box(b"mdat", 1000),
+    "/fragmented.mp4": box(b"ftyp") + box(b"moof") + box(b"mdat", 1000),
+    "/index-at-end.mp4": box(b"ftyp") + box(b"mdat", 1000) + box(b"moov"),
+    # index after more than PROBE_SIZE bytes
+    "/large-free.mp4": box(b"ftyp") + box(b"free", 2 * PROBE_SIZE) + box(b"moov"),
+    "/large-mdat.mp4": box(b"ftyp")
+    + struct.pack(">I4sQ", 1, b"mdat", 2 * PROBE_SIZE)
+    + bytes(2 * PROBE_SIZE - 16),
+    "/garbage.mp4": b"not a video" * 100,
+}
+
+
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    """serves FILES, ignoring ranges"""
+
+    def do_GET(self):  # noqa: N802
+        if self.path not in FILES:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(FILES[self.path])))
+        self.end_headers()
+        self.wfile.write(FILES[self.path])
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def handler():
+    return FileHandler
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/faststart.mp4", True),
+        ("/fragmented.mp4", True),
+        ("/index-at-end.mp4", False),
+        ("/large-free.mp4", False),
+        ("/large-mdat.mp4", False),
+        ("/garbage.mp4", False),
+    ],
+)
+def test_is_streamable(server, path, expected):
+    assert is_streamable(server.get_url(path)) is expected
+
+
+def test_stream_reencode_failure(server, tmp_path):
+    dst_path = tmp_path / "video.webm"
+    # whether ffmpeg is missing or can't decode the input
+    with pytest.raises(StreamingError):
+        stream_reencode(server.get_url("/garbage.mp4"), dst_path, ["-f", "webm"])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from ted2zim.utils import get_main_title
+from ted2zim.videos import (
+    DOWNLOADED,
+    LocalizedText,
+    SpilledVideoRegistry,
+    Video,
+    VideoRegistry,
+)
+
+BASE_KEYS = {
+    "id",
+    "languages",
+    "title",
+    "description",
+    "speaker",
+    "speaker_profession",
+    "speaker_bio",
+    "speaker_picture",
+    "date",
+    "thumbnail",
+    "video_link",
+    "youtube_id",
+    "length",
+    "subtitles",
+    "metadata_link",
+    "subtitles_offset",
+    "native_talk_language",
+}
+
+
+def test_registry_add_and_get(make_video):
+    registry = VideoRegistry()
+    assert registry.add(make_video("2"))
+    assert registry.add(make_video("1"))
+    assert not registry.add(make_video("2", lang="fr"))
+    assert len(registry) == 2
+    assert "1" in registry
+    assert "3" not in registry
+    assert registry.get("2").native_talk_language == "en"  # pyright: ignore
+    assert registry.get("3") is None
+    # insertion order is kept
+    assert [video.id for video in registry] == ["2", "1"]
+
+
+def test_video_is_slotted(make_video):
+    with pytest.raises(AttributeError):
+        make_video("1").unknown = True  # pyright: ignore
+
+
+@pytest.mark.parametrize(
+    "slug, failed, expected_extra_keys",
+    [
+        (None, False, set()),
+        ("a-talk", False, {"slug"}),
+        ("a-talk", True, {"slug", "failed"}),
+    ],
+)
+def test_video_to_dict(slug, failed, expected_extra_keys, make_video):
+    video = make_video("1")
+    video.slug = slug
+    video.failed = failed
+    if failed:
+        video.done.append(DOWNLOADED)
+        expected_extra_keys = {*expected_extra_keys, "done"}
+    data = video.to_dict()
+    assert set(data.keys()) - BASE_KEYS == expected_extra_keys
+    assert Video.from_dict(data) == video
+
+
+def test_registry_dump_load(tmp_path, make_video):
+    registry = VideoRegistry([make_video("1"), make_video("2", lang="fr")])
+    registry.get("2").failed = True  # pyright: ignore
+    fpath = tmp_path / "ted_videos.json"
+    registry.dump(fpath)
+    loaded = VideoRegistry.load(fpath)
+    assert loaded.to_list() == registry.to_list()
+    assert loaded.get("2").failed  # pyright: ignore
+    # still a JSON file
+    with open(fpath) as fh:
+        assert json.load(fh) == registry.to_list()
+
+
+def test_registry_dump_empty(tmp_path):
+    fpath = tmp_path / "ted_videos.json"
+    VideoRegistry().dump(fpath)
+    assert len(VideoRegistry.load(fpath)) == 0
+
+
+def test_spilled_registry(tmp_path, monkeypatch, make_video):
+    monkeypatch.setattr(SpilledVideoRegistry, "BATCH_SIZE", 2)
+    fpath = tmp_path / "videos.db"
+    registry = SpilledVideoRegistry(fpath, [make_video(str(i)) for i in range(5)])
+    assert len(registry) == 5
+    assert not registry.add(make_video("1", lang="fr"))
+    assert [video.id for video in registry] == ["0", "1", "2", "3", "4"]
+    assert "3" in registry
+    assert registry.get("9") is None
+
+    # changes are only kept once saved
+    video = registry.get("1")
+    video.title.add("fr", "Titre 1")  # pyright: ignore
+    assert registry.get("1").title.get("fr") is None  # pyright: ignore
+    registry.save(video)  # pyright: ignore
+    assert registry.get("1").title.get("fr") == "Titre 1"  # pyright: ignore
+
+    registry.remove("3")
+    assert [video.id for video in registry] == ["0", "1", "2", "4"]
+    registry.close()
+    assert not fpath.exists()
+
+
+def test_localized_text():
+    texts = LocalizedText({"fr": "Bonjour"})
+    assert texts.add("en", "Hello")
+    assert not texts.add("fr", "Salut")
+    assert texts.get("fr") == "Bonjour"
+    assert texts.get("de") is None
+    assert texts.default == "Bonjour"
+    texts.set_default("Hello")
+    assert texts.default == "Hello"
+    assert list(texts) == [
+        {"lang": "default", "text": "Hello"},
+        {"lang": "fr", "text": "Bonjour"},
+        {"lang": "en", "text": "Hello"},
+    ]
+    assert LocalizedText.from_list(texts.to_list()) == texts
+
+
+@pytest.mark.parametrize(
+    "texts, locale_ted_codes, expected",
+    [
+        ({}, ["fr"], "n/a"),
+        ({"en": "Hello", "fr": "Bonjour"}, ["fr"], "Bonjour"),
+        ({"en": "Hello", "fr": "Bonjour"}, ["de"], "Hello"),
+        ({"default": "Hallo", "en": "Hello"}, ["es"], "Hallo"),
+        ({"fr": "Bonjour"}, ["es"], "n/a"),
+    ],
+)
+def test_get_main_title(texts, locale_ted_codes, expected):
+    assert get_main_title(LocalizedText(texts), locale_ted_codes) == expected